@@ -18,7 +18,7 @@ from app.app_utils import render_sidebar
 render_sidebar()
 import pandas as pd
 
-from fe_coo_analytics.db import get_conn
+from fe_coo_analytics.db import cursor
 
 st.set_page_config(page_title="FE-COO Analytics Sim", layout="wide")
 
@@ -27,20 +27,19 @@ st.caption("Mart tables built via SQL models + validated with unit tests + orche
 
 st.subheader("Pipeline status (latest runs)")
 
-con = get_conn(read_only=True)
-df = con.execute("""
-SELECT
-  run_ts,
-  status,
-  regenerated_raw,
-  duration_seconds,
-  models_ran,
-  error_message
-FROM ops.pipeline_runs
-ORDER BY run_ts DESC
-LIMIT 10;
-""").df()
-con.close()
+with cursor() as con:
+    df = con.execute("""
+    SELECT
+      run_ts,
+      status,
+      regenerated_raw,
+      duration_seconds,
+      models_ran,
+      error_message
+    FROM ops.pipeline_runs
+    ORDER BY run_ts DESC
+    LIMIT 10;
+    """).df()
 
 st.dataframe(df, use_container_width=True)
 
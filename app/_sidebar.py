@@ -1,17 +1,22 @@
+import pandas as pd
 import streamlit as st
-from fe_coo_analytics.db import get_conn
+from fe_coo_analytics.db import cursor, last_run_status
 
 def render_sidebar():
     st.sidebar.header("FE-COO Sim")
 
-    con = get_conn(read_only=True)
-    last = con.execute("""
-      SELECT run_ts, status, duration_seconds, regenerated_raw
-      FROM ops.pipeline_runs
-      ORDER BY run_ts DESC
-      LIMIT 1;
-    """).df()
-    con.close()
+    # failed runs are never published, so only the status file has them
+    status = last_run_status()
+    if status is not None:
+        last = pd.DataFrame([status])
+    else:
+        with cursor() as con:
+            last = con.execute("""
+              SELECT run_ts, status, duration_seconds, regenerated_raw
+              FROM ops.pipeline_runs
+              ORDER BY run_ts DESC
+              LIMIT 1;
+            """).df()
 
     if len(last) == 1:
         r = last.iloc[0]
@@ -1,14 +1,20 @@
 import streamlit as st
 import pandas as pd
 
-from app.app_utils import render_sidebar, load_distinct_strategies, load_date_bounds
-from fe_coo_analytics.db import get_conn
+from app.app_utils import CHART_POINTS, render_sidebar, load_distinct_strategies, load_date_bounds
+from fe_coo_analytics.batch import gather
+from fe_coo_analytics.cache import build_cached
+from fe_coo_analytics.downsample import pick_grain
+from fe_coo_analytics.metrics_risk import firm_var, var_by_day
+from fe_coo_analytics.metrics_rollup import latest_kpis, strategy_daily
 
 render_sidebar()
 st.title("Overview")
 
-strategies = load_distinct_strategies()
-min_d, max_d = load_date_bounds("mart.daily_exposures")
+strategies, (min_d, max_d) = gather(
+    load_distinct_strategies,
+    lambda: load_date_bounds("mart.daily_exposures"),
+)
 
 c1, c2 = st.columns([2, 1])
 with c1:
@@ -18,63 +24,43 @@ with c2:
 
 start_d, end_d = date_range if isinstance(date_range, tuple) else (min_d, max_d)
 
-@st.cache_data(show_spinner=False, ttl=30)
-def load_overview_data(chosen_strats, start_d, end_d):
-    con = get_conn(read_only=True)
-
-    exp = con.execute("""
-        SELECT date, strategy, gross_exposure, net_exposure
-        FROM mart.daily_exposures
-        WHERE strategy IN (SELECT UNNEST(?))
-          AND date BETWEEN ? AND ?
-        ORDER BY date, strategy;
-    """, [chosen_strats, start_d, end_d]).df()
-
-    pnl = con.execute("""
-        SELECT date, strategy, SUM(pnl) AS pnl
-        FROM mart.daily_pnl
-        WHERE strategy IN (SELECT UNNEST(?))
-          AND date BETWEEN ? AND ?
-        GROUP BY 1,2
-        ORDER BY 1,2;
-    """, [chosen_strats, start_d, end_d]).df()
-
-    latest = con.execute("""
-        SELECT MAX(date) FROM mart.daily_exposures
-    """).fetchone()[0]
-
-    kpis = con.execute("""
-        WITH latest_exp AS (
-          SELECT * FROM mart.daily_exposures WHERE date = ? AND strategy IN (SELECT UNNEST(?))
-        ),
-        latest_pnl AS (
-          SELECT SUM(pnl) AS total_pnl FROM mart.daily_pnl WHERE date = ? AND strategy IN (SELECT UNNEST(?))
-        ),
-        liq AS (
-          SELECT SUM(illiquid_flag) AS illiquid_positions
-          FROM mart.daily_liquidity
-          WHERE date = ? AND strategy IN (SELECT UNNEST(?))
-        )
-        SELECT
-          (SELECT total_pnl FROM latest_pnl) AS total_pnl,
-          (SELECT SUM(gross_exposure) FROM latest_exp) AS gross_exposure,
-          (SELECT SUM(net_exposure) FROM latest_exp) AS net_exposure,
-          (SELECT illiquid_positions FROM liq) AS illiquid_positions
-    """, [latest, chosen_strats, latest, chosen_strats, latest, chosen_strats]).df()
-
-    con.close()
-    return exp, pnl, kpis, latest
-
-exp_df, pnl_df, kpis_df, latest_date = load_overview_data(chosen_strats, start_d, end_d)
+@build_cached
+def load_overview_data(chosen_strats, start_d, end_d, all_strats):
+    # strategy/firm rollups: one pre-aggregated row per (date, strategy)
+    # the queries run at once, so the page waits for the slowest one only
+    daily, kpis, var, firm = gather(
+        lambda: strategy_daily(chosen_strats, start_d, end_d, max_points=CHART_POINTS),
+        lambda: latest_kpis(None if all_strats else chosen_strats),
+        lambda: var_by_day(chosen_strats, start_d, end_d, max_points=CHART_POINTS),
+        firm_var,
+    )
+    exp = daily[["date", "strategy", "gross_exposure", "net_exposure"]]
+    pnl = daily.loc[daily["pnl"].notna(), ["date", "strategy", "pnl"]]
+    return exp, pnl, kpis, kpis["date"][0].date(), var, firm
+
+exp_df, pnl_df, kpis_df, latest_date, var_df, firm_var_df = load_overview_data(
+    chosen_strats, start_d, end_d, set(chosen_strats) == set(strategies)
+)
 
 # KPI cards
-k1, k2, k3, k4 = st.columns(4)
+k1, k2, k3, k4, k5 = st.columns(5)
 k1.metric("Total PnL (latest day)", f"{float(kpis_df['total_pnl'][0]):,.0f}")
 k2.metric("Gross exposure", f"{float(kpis_df['gross_exposure'][0]):,.0f}")
 k3.metric("Net exposure", f"{float(kpis_df['net_exposure'][0]):,.0f}")
 k4.metric("Illiquid positions", int(kpis_df["illiquid_positions"][0]))
-
-st.caption(f"Latest exposure day in DB: {latest_date}")
+# VaR doesn't add up across strategies: only the firm's and a single strategy's
+# combined books are revalued, so other selections get no figure
+if set(chosen_strats) == set(strategies):
+    latest_var = firm_var_df.dropna(subset=["var_99"]).tail(1)["var_99"]
+    k5.metric("1d 99% VaR (firm)", f"{float(latest_var.iloc[0]):,.0f}" if len(latest_var) else "n/a")
+elif len(chosen_strats) == 1:
+    latest_var = var_df.dropna(subset=["var_99"]).tail(1)["var_99"]
+    k5.metric(f"1d 99% VaR ({chosen_strats[0]})", f"{float(latest_var.iloc[0]):,.0f}" if len(latest_var) else "n/a")
+else:
+    k5.metric("1d 99% VaR", "n/a", help="Select one strategy or all of them: VaR of a partial book isn't stored")
+
+grain = pick_grain(start_d, end_d, CHART_POINTS)
+st.caption(f"Latest exposure day in DB: {latest_date}" + ("" if grain == "day" else f" · charts at {grain}ly grain"))
 
 st.markdown("## Exposure")
 exp_pivot_g = exp_df.pivot(index="date", columns="strategy", values="gross_exposure").fillna(0)
@@ -90,6 +76,14 @@ st.markdown("## PnL")
 pnl_pivot = pnl_df.pivot(index="date", columns="strategy", values="pnl").fillna(0)
 st.line_chart(pnl_pivot)
 
+st.markdown("## Risk")
+st.caption("Historical-simulation 1-day VaR / ES over up to 250 return days")
+r1, r2 = st.tabs(["99% VaR", "99% ES"])
+with r1:
+    st.line_chart(var_df.pivot(index="date", columns="strategy", values="var_99"))
+with r2:
+    st.line_chart(var_df.pivot(index="date", columns="strategy", values="es_99"))
+
 with st.expander("Show underlying tables"):
     st.dataframe(exp_df, use_container_width=True, height=250)
     st.dataframe(pnl_df, use_container_width=True, height=250)
\ No newline at end of file
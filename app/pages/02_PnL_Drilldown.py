@@ -1,17 +1,23 @@
 import streamlit as st
 import pandas as pd
 
-from app.app_utils import render_sidebar
-from fe_coo_analytics.db import get_conn
+from app.app_utils import CHART_POINTS, render_sidebar
+from fe_coo_analytics.batch import query_batch
+from fe_coo_analytics.cache import build_cached
+from fe_coo_analytics.db import cursor
+from fe_coo_analytics.downsample import lttb
 
 render_sidebar()
 st.title("PnL Drilldown")
 
-con = get_conn(read_only=True)
-strategies = [r[0] for r in con.execute("SELECT DISTINCT strategy FROM mart.daily_pnl ORDER BY 1;").fetchall()]
-tickers = [r[0] for r in con.execute("SELECT DISTINCT ticker FROM mart.daily_pnl ORDER BY 1;").fetchall()]
-min_d, max_d = con.execute("SELECT MIN(date), MAX(date) FROM mart.daily_pnl;").fetchone()
-con.close()
+strategies_df, tickers_df, bounds = query_batch([
+    "SELECT DISTINCT strategy FROM mart.daily_pnl ORDER BY 1;",
+    "SELECT DISTINCT ticker FROM mart.daily_pnl ORDER BY 1;",
+    "SELECT MIN(date) AS min_d, MAX(date) AS max_d FROM mart.daily_pnl;",
+])
+strategies = strategies_df["strategy"].tolist()
+tickers = tickers_df["ticker"].tolist()
+min_d, max_d = bounds["min_d"][0].date(), bounds["max_d"][0].date()
 
 c1, c2, c3 = st.columns([1, 1, 1.4])
 with c1:
@@ -23,17 +29,16 @@ with c3:
 
 start_d, end_d = date_range if isinstance(date_range, tuple) else (min_d, max_d)
 
-@st.cache_data(show_spinner=False, ttl=30)
+@build_cached
 def load_drill(strategy, ticker, start_d, end_d):
-    con = get_conn(read_only=True)
-    df = con.execute("""
-        SELECT date, shares_held, price_change, pnl
-        FROM mart.daily_pnl
-        WHERE strategy = ? AND ticker = ?
-          AND date BETWEEN ? AND ?
-        ORDER BY date;
-    """, [strategy, ticker, start_d, end_d]).df()
-    con.close()
+    with cursor() as con:
+        df = con.execute("""
+            SELECT date, shares_held, price_change, pnl
+            FROM mart.daily_pnl
+            WHERE strategy = ? AND ticker = ?
+              AND date BETWEEN ? AND ?
+            ORDER BY date;
+        """, [strategy, ticker, start_d, end_d]).df()
     return df
 
 df = load_drill(strategy, ticker, start_d, end_d)
@@ -45,7 +50,8 @@ k1, k2 = st.columns(2)
 k1.metric("Total PnL (selected range)", f"{df['pnl'].sum():,.0f}")
 k2.metric("Max |daily PnL|", f"{df['pnl'].abs().max():,.0f}")
 
-st.line_chart(df.set_index("date")[["pnl", "cum_pnl"]])
+# LTTB keeps the spikes and turns of both lines within CHART_POINTS rows
+st.line_chart(lttb(df, "date", ["pnl", "cum_pnl"], CHART_POINTS).set_index("date")[["pnl", "cum_pnl"]])
 
 st.dataframe(df, use_container_width=True, height=350)
 st.download_button("Download CSV", df.to_csv(index=False), file_name=f"pnl_{strategy}_{ticker}.csv")
\ No newline at end of file
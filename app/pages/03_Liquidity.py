@@ -1,15 +1,18 @@
 import streamlit as st
 
 from app.app_utils import render_sidebar
-from fe_coo_analytics.db import get_conn
+from fe_coo_analytics.batch import query_batch
+from fe_coo_analytics.metrics_liquidity import most_illiquid
 
 render_sidebar()
 st.title("Liquidity Risk")
 
-con = get_conn(read_only=True)
-dates = [r[0] for r in con.execute("SELECT DISTINCT date FROM mart.daily_liquidity ORDER BY date;").fetchall()]
-strategies = [r[0] for r in con.execute("SELECT DISTINCT strategy FROM mart.daily_liquidity ORDER BY 1;").fetchall()]
-con.close()
+dates_df, strategies_df = query_batch([
+    "SELECT DISTINCT date FROM mart.daily_liquidity ORDER BY date;",
+    "SELECT DISTINCT strategy FROM mart.daily_liquidity ORDER BY 1;",
+])
+dates = [d.date() for d in dates_df["date"]]
+strategies = strategies_df["strategy"].tolist()
 
 c1, c2, c3 = st.columns([1, 1, 1])
 with c1:
@@ -21,18 +24,8 @@ with c3:
 
 n = st.slider("Top N", 5, 50, 15)
 
-con = get_conn(read_only=True)
-df = con.execute("""
-    SELECT date, strategy, ticker, shares, adv_shares, days_to_liquidate, illiquid_flag
-    FROM mart.daily_liquidity
-    WHERE date = ? AND strategy = ?
-""", [date, strategy]).df()
-con.close()
-
-if only_flagged:
-    df = df[df["illiquid_flag"] == 1]
-
-df = df.sort_values("days_to_liquidate", ascending=False).head(n)
+# ranked lookup in mart.top_illiquid rather than sorting the whole day
+df = most_illiquid(date, n, strategy=strategy, only_flagged=only_flagged)
 
 st.subheader("Most illiquid positions (days to liquidate)")
 st.dataframe(df, use_container_width=True, height=350)
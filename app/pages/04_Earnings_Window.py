@@ -1,32 +1,19 @@
 import streamlit as st
 
 from app.app_utils import render_sidebar, load_distinct_strategies
-from fe_coo_analytics.db import get_conn
+from fe_coo_analytics.metrics_earnings import EARNINGS_WINDOWS, biggest_earnings_windows
 
 render_sidebar()
 st.title("Earnings Window Analysis")
 
 strategies = load_distinct_strategies()
 strategy = st.selectbox("Strategy", ["(all)"] + strategies)
+window = st.radio(
+    "Window (± business days)", EARNINGS_WINDOWS, index=EARNINGS_WINDOWS.index(2), horizontal=True
+)
 n = st.slider("Top N", 5, 50, 15)
 
-con = get_conn(read_only=True)
-if strategy == "(all)":
-    df = con.execute("""
-        SELECT strategy, ticker, earnings_date, pnl_total_window
-        FROM mart.earnings_window_pnl
-        ORDER BY ABS(pnl_total_window) DESC
-        LIMIT ?;
-    """, [n]).df()
-else:
-    df = con.execute("""
-        SELECT strategy, ticker, earnings_date, pnl_total_window
-        FROM mart.earnings_window_pnl
-        WHERE strategy = ?
-        ORDER BY ABS(pnl_total_window) DESC
-        LIMIT ?;
-    """, [strategy, n]).df()
-con.close()
+df = biggest_earnings_windows(n, strategy=None if strategy == "(all)" else strategy, window=window)
 
 st.dataframe(df, use_container_width=True, height=350)
 st.caption("Useful for: “How did we perform through the earnings window?”")
\ No newline at end of file
@@ -0,0 +1,95 @@
+import streamlit as st
+import pandas as pd
+
+from app.app_utils import render_sidebar
+from fe_coo_analytics.cache import build_cached
+from fe_coo_analytics.db import cursor
+
+render_sidebar()
+st.title("Build Profiles")
+
+@build_cached
+def load_runs() -> pd.DataFrame:
+    with cursor() as con:
+        exists = con.execute("""
+            SELECT COUNT(*) FROM information_schema.tables
+            WHERE table_schema = 'ops' AND table_name = 'model_profiles';
+        """).fetchone()[0]
+        if not exists:
+            return pd.DataFrame(columns=["run_id", "run_ts"])
+        df = con.execute("""
+            SELECT run_id, MAX(run_ts) AS run_ts
+            FROM ops.model_profiles
+            GROUP BY run_id
+            ORDER BY run_ts DESC;
+        """).df()
+    return df
+
+@build_cached
+def load_slowest(run_id: str, model: str | None, n: int) -> pd.DataFrame:
+    with cursor() as con:
+        df = con.execute("""
+            SELECT model, COALESCE(mode, 'unknown') AS mode, statement, operator_id, operator_name, operator_seconds,
+            cardinality, rows_scanned, query_peak_memory_bytes / 1e6 AS query_peak_mb, extra_info
+            FROM ops.model_profiles
+            WHERE run_id = ? AND (? IS NULL OR model = ?)
+            ORDER BY operator_seconds DESC
+            LIMIT ?;
+        """, [run_id, model, model, n]).df()
+    return df
+
+@build_cached
+def load_history(operators: list[tuple], model: str | None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    with cursor() as con:
+        ops_df = con.execute("""
+            SELECT run_ts,
+            model || ' [' || COALESCE(mode, 'unknown') || ']#' || statement || ':' || operator_id || ' ' || operator_name
+            AS operator, operator_seconds
+            FROM ops.model_profiles
+            WHERE (model, COALESCE(mode, 'unknown'), statement, operator_id) IN (SELECT UNNEST(?, recursive := true))
+            ORDER BY run_ts;
+        """, [[{"model": m, "mode": md, "statement": s, "operator_id": o} for m, md, s, o in operators]]).df()
+        mem = con.execute("""
+            SELECT run_ts, model || ' [' || COALESCE(mode, 'unknown') || ']' AS model,
+            MAX(query_peak_memory_bytes) / 1e6 AS peak_mb
+            FROM ops.model_profiles
+            WHERE ? IS NULL OR model = ?
+            GROUP BY run_id, run_ts, 2
+            ORDER BY run_ts;
+        """, [model, model]).df()
+    return ops_df, mem
+
+runs = load_runs()
+if runs.empty:
+    st.info("No profiles yet. Run the build-mart flow or `python -m models.run_sql_models --profile`.")
+    st.stop()
+
+c1, c2, c3 = st.columns([1.4, 1.4, 1])
+with c1:
+    run_id = st.selectbox("Run", runs["run_id"])
+with c2:
+    with cursor() as con:
+        models = [r[0] for r in con.execute(
+            "SELECT DISTINCT model FROM ops.model_profiles ORDER BY 1;"
+        ).fetchall()]
+    model = st.selectbox("Model", ["(all)"] + models)
+with c3:
+    n = st.slider("Top N operators", 5, 50, 15)
+
+model_filter = None if model == "(all)" else model
+slowest = load_slowest(run_id, model_filter, n)
+
+st.subheader("Slowest operators in this run")
+st.dataframe(slowest, use_container_width=True, height=350)
+
+if len(slowest) > 0:
+    # track this run's slowest operators across every profiled run of the same SQL:
+    # incremental and full builds of a model have unrelated plans
+    top = list(slowest[["model", "mode", "statement", "operator_id"]].head(8).itertuples(index=False, name=None))
+    history, mem = load_history([(m, md, int(s), int(o)) for m, md, s, o in top], model_filter)
+
+    st.subheader("Operator time over runs (seconds)")
+    st.line_chart(history.pivot_table(index="run_ts", columns="operator", values="operator_seconds"))
+
+    st.subheader("Peak query memory per model (MB)")
+    st.line_chart(mem.pivot_table(index="run_ts", columns="model", values="peak_mb", aggfunc="max"))
@@ -4,86 +4,80 @@ sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 import streamlit as st
 import pandas as pd
-from fe_coo_analytics.db import get_conn
+from fe_coo_analytics.cache import build_cached
+from fe_coo_analytics import explorer
 from app.app_utils import render_sidebar
 render_sidebar()
 
 st.set_page_config(page_title="Raw Data Explorer", layout="wide")
 st.title("Raw Data Explorer (Simulated FE-COO Inputs)")
 
-@st.cache_data(show_spinner=False)
-def load_table(sql: str) -> pd.DataFrame:
-    con = get_conn(read_only=True)
-    df = con.execute(sql).df()
-    con.close()
-    return df
+# filters and paging run in DuckDB; only the current page comes back
+load_page = build_cached(explorer.page)
+load_count = build_cached(explorer.count_rows)
+load_options = build_cached(explorer.distinct_values)
+load_volume = build_cached(explorer.daily_trade_volume)
 
-table = st.selectbox(
-    "Choose a raw table",
-    ["raw.trades", "raw.prices", "raw.security_master", "raw.liquidity", "raw.earnings_calendar"],
-)
+table = st.selectbox("Choose a raw table", list(explorer.TABLES))
+spec = explorer.TABLES[table]
+limit = st.slider("Rows per page", 50, 5000, 500, step=50)
 
-limit = st.slider("Row limit", 50, 5000, 500, step=50)
+filters = {}
+if spec.filters:
+    st.write("Filters (empty = all):")
+    cols = st.columns(len(spec.filters) + (1 if spec.date_col else 0))
+    for c, col in zip(cols, spec.filters):
+        filters[col] = c.multiselect(col.capitalize(), load_options(table, col))
+start = end = None
+if spec.date_col:
+    picked = cols[-1].date_input("Date range", value=())
+    if isinstance(picked, tuple) and len(picked) == 2:
+        start, end = picked
 
-if table == "raw.trades":
-    df = load_table(f"SELECT * FROM raw.trades ORDER BY timestamp DESC LIMIT {limit}")
-    st.subheader("Trades")
-    st.write("Filters:")
-    c1, c2, c3 = st.columns(3)
-    strategies = sorted(df["strategy"].unique())
-    tickers = sorted(df["ticker"].unique())
-    strat = c1.multiselect("Strategy", strategies, default=strategies)
-    tick = c2.multiselect("Ticker", tickers, default=tickers[:10])
-    side = c3.multiselect("Side", sorted(df["side"].unique()), default=sorted(df["side"].unique()))
+# keyset cursors of the pages visited so far, reset whenever the query changes
+query_key = (table, limit, tuple((k, tuple(v)) for k, v in filters.items()), start, end)
+if st.session_state.get("explorer_query") != query_key:
+    st.session_state["explorer_query"] = query_key
+    st.session_state["explorer_cursors"] = [None]
+cursors = st.session_state["explorer_cursors"]
+
+df = load_page(table, filters, start, end, after=cursors[-1], limit=limit)
+nxt = explorer.next_cursor(table, df, limit)
+
+total = load_count(table, filters, start, end)
+p1, p2, p3 = st.columns([1, 1, 4])
+if p1.button("◀ Newer", disabled=len(cursors) == 1):
+    cursors.pop()
+    st.rerun()
+if p2.button("Older ▶", disabled=nxt is None):
+    cursors.append(nxt)
+    st.rerun()
+p3.caption(f"Page {len(cursors)} · {total:,} matching rows")
 
-    f = df[df["strategy"].isin(strat) & df["ticker"].isin(tick) & df["side"].isin(side)]
-    st.dataframe(f, use_container_width=True, height=400)
+st.dataframe(df, use_container_width=True, height=400)
 
+if table == "raw.trades":
     st.subheader("Trade volume by day")
-    vol = (
-        f.assign(trade_date=pd.to_datetime(f["trade_date"]))
-         .groupby("trade_date")["quantity"]
-         .sum()
-         .reset_index()
-         .sort_values("trade_date")
-    )
+    vol = load_volume(filters, start, end)
     st.line_chart(vol, x="trade_date", y="quantity")
 
 elif table == "raw.prices":
-    df = load_table(f"SELECT * FROM raw.prices ORDER BY date DESC, ticker LIMIT {limit}")
-    st.subheader("Prices")
-    tickers = sorted(df["ticker"].unique())
-    chosen = st.multiselect("Tickers to plot", tickers, default=tickers[:5])
-    f = df[df["ticker"].isin(chosen)].copy()
-    f["date"] = pd.to_datetime(f["date"])
-    st.dataframe(f.sort_values(["date","ticker"]), use_container_width=True, height=400)
-
-    st.subheader("Price chart")
-    pivot = f.pivot_table(index="date", columns="ticker", values="close").sort_index()
+    st.subheader("Price chart (this page)")
+    pivot = df.pivot_table(index="date", columns="ticker", values="close").sort_index()
     st.line_chart(pivot)
 
 elif table == "raw.security_master":
-    df = load_table(f"SELECT * FROM raw.security_master LIMIT {limit}")
-    st.subheader("Security Master (Ticker metadata)")
-    st.dataframe(df, use_container_width=True, height=450)
     st.subheader("Tickers by sector")
     counts = df.groupby("sector")["ticker"].count().reset_index(name="n_tickers").sort_values("n_tickers", ascending=False)
     st.bar_chart(counts, x="sector", y="n_tickers")
 
 elif table == "raw.liquidity":
-    df = load_table(f"SELECT * FROM raw.liquidity LIMIT {limit}")
-    st.subheader("Liquidity (ADV shares)")
-    st.dataframe(df, use_container_width=True, height=450)
     st.subheader("ADV distribution")
     st.write("Higher ADV = more liquid (easier to trade).")
     st.bar_chart(df.sort_values("adv_shares", ascending=False).head(20), x="ticker", y="adv_shares")
 
 else:  # earnings_calendar
-    df = load_table(f"SELECT * FROM raw.earnings_calendar LIMIT {limit}")
-    st.subheader("Earnings Calendar")
-    df["earnings_date"] = pd.to_datetime(df["earnings_date"])
-    st.dataframe(df.sort_values("earnings_date"), use_container_width=True, height=450)
     st.subheader("Earnings dates count by week")
-    df["week"] = df["earnings_date"].dt.to_period("W").astype(str)
+    df["week"] = pd.to_datetime(df["earnings_date"]).dt.to_period("W").astype(str)
     counts = df.groupby("week")["ticker"].count().reset_index(name="n")
     st.bar_chart(counts, x="week", y="n")
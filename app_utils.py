@@ -2,41 +2,39 @@ from dotenv import load_dotenv
 load_dotenv()
 import streamlit as st
 import pandas as pd
-from fe_coo_analytics.db import get_conn
+from fe_coo_analytics.cache import build_cached, cache_stats
+from fe_coo_analytics.db import cursor
 
 
-@st.cache_data(show_spinner=False, ttl=30)
+@build_cached
 def load_last_pipeline_run() -> pd.DataFrame:
-    con = get_conn(read_only=True)
-    df = con.execute("""
-        SELECT
-          run_ts,
-          status,
-          regenerated_raw,
-          duration_seconds,
-          models_ran,
-          error_message
-        FROM ops.pipeline_runs
-        ORDER BY run_ts DESC
-        LIMIT 1;
-    """).df()
-    con.close()
+    with cursor() as con:
+        df = con.execute("""
+            SELECT
+              run_ts,
+              status,
+              regenerated_raw,
+              duration_seconds,
+              models_ran,
+              error_message
+            FROM ops.pipeline_runs
+            ORDER BY run_ts DESC
+            LIMIT 1;
+        """).df()
     return df
 
 
-@st.cache_data(show_spinner=False, ttl=60)
+@build_cached
 def load_distinct_strategies() -> list[str]:
-    con = get_conn(read_only=True)
-    rows = con.execute("SELECT DISTINCT strategy FROM mart.daily_pnl ORDER BY 1;").fetchall()
-    con.close()
+    with cursor() as con:
+        rows = con.execute("SELECT DISTINCT strategy FROM mart.daily_pnl ORDER BY 1;").fetchall()
     return [r[0] for r in rows]
 
 
-@st.cache_data(show_spinner=False, ttl=60)
+@build_cached
 def load_date_bounds(table: str = "mart.daily_exposures") -> tuple:
-    con = get_conn(read_only=True)
-    mn, mx = con.execute(f"SELECT MIN(date), MAX(date) FROM {table};").fetchone()
-    con.close()
+    with cursor() as con:
+        mn, mx = con.execute(f"SELECT MIN(date), MAX(date) FROM {table};").fetchone()
     return mn, mx
 
 
@@ -59,6 +57,9 @@ def render_sidebar() -> None:
     else:
         st.sidebar.warning("No pipeline runs logged yet.")
 
+    stats = cache_stats()
+    st.sidebar.caption(f"Result cache: {stats.hits} hits / {stats.misses} misses, {stats.bytes / 1e6:.1f} MB")
+
     st.sidebar.markdown("---")
     st.sidebar.markdown("### Refresh marts")
     st.sidebar.code("python -m pipelines.build_mart_flow", language="bash")
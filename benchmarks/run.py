@@ -0,0 +1,354 @@
+"""
+Benchmark the build across generator scales.
+
+    python -m benchmarks.run --scales small,medium
+    python -m benchmarks.run --scales small --save-baseline
+
+Each scale runs in its own subprocess against its own DuckDB file (via
+FE_COO_DB_PATH), so the real mart is untouched. Peak RSS is sampled per stage.
+Stages are timed separately: generation, raw load, each sql/ model (built
+serially so timings don't overlap), each Python-built mart, the DQ suite,
+each metric function and publishing the snapshot (a full file copy).
+Results are appended to ops.benchmarks in the main database and compared
+with the stored baseline in ops.benchmark_baselines.
+"""
+from __future__ import annotations
+
+import argparse
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime, timezone
+import json
+import os
+from pathlib import Path
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+WORK_DIR = Path("data/bench")
+
+SCALES = {
+    "small": dict(n_tickers=40, n_days=90, n_trades=2_500),
+    "medium": dict(n_tickers=500, n_days=250, n_trades=200_000),
+    "large": dict(n_tickers=2_000, n_days=750, n_trades=2_000_000),
+    "xlarge": dict(n_tickers=10_000, n_days=2_520, n_trades=20_000_000),
+}
+
+# A stage regresses when it is this much slower than baseline, and by more
+# than the noise floor (sub-10ms stages jitter by more than any tolerance).
+TOLERANCE = 0.25
+NOISE_FLOOR_SECONDS = 0.05
+
+
+@dataclass
+class StageResult:
+    scale: str
+    stage: str
+    seconds: float
+    peak_rss_mb: float
+    rows: int
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def current_rss_mb() -> float | None:
+    """Resident set size right now (VmRSS from /proc, in kB); None where /proc isn't available."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class RssSampler:
+    """
+    Peak RSS while a stage runs, sampled from VmRSS on a background thread.
+    ru_maxrss is a high-water mark for the whole process, so every stage
+    after the heaviest would report that stage's peak; it is only used as a
+    fallback where /proc is missing (macOS).
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self) -> None:
+        rss = current_rss_mb()
+        self.peak_mb = max(self.peak_mb, rss if rss is not None else peak_rss_mb())
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self) -> "RssSampler":
+        self._sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def metric_calls(latest: str) -> dict:
+    """Each fe_coo_analytics metric function with representative arguments."""
+    from fe_coo_analytics.metrics_earnings import biggest_earnings_windows
+    from fe_coo_analytics.metrics_exposure import exposures_over_time, positions_as_of
+    from fe_coo_analytics.metrics_liquidity import most_illiquid
+    from fe_coo_analytics.metrics_pnl import pnl_by_day, top_pnl_movers
+    from fe_coo_analytics.metrics_rollup import firm_daily, latest_kpis, strategy_daily
+
+    return {
+        "pnl_by_day": lambda: pnl_by_day(),
+        "top_pnl_movers": lambda: top_pnl_movers(10),
+        "exposures_over_time": lambda: exposures_over_time(),
+        "positions_as_of": lambda: positions_as_of(latest),
+        "most_illiquid": lambda: most_illiquid(latest, 10),
+        "biggest_earnings_windows": lambda: biggest_earnings_windows(10),
+        "strategy_daily": lambda: strategy_daily(),
+        "firm_daily": lambda: firm_daily(),
+        "latest_kpis": lambda: latest_kpis(),
+    }
+
+
+def run_scale(scale: str, overrides: dict) -> list[StageResult]:
+    """Build one scale from scratch in this process. FE_COO_DB_PATH must already point at a scratch DB."""
+    from models.dag import build_dag, discover_models, parse_tables
+    from models.db import get_conn
+    from models.generate_data import Config, load_raw_parquet, write_raw
+    from models.incremental import ensure_watermark_table, plan_models, run_model
+    from models.publish import publish
+    from models.run_sql_models import PYTHON_MODELS
+    from fe_coo_analytics.db import close_shared, cursor
+    from fe_coo_analytics.validate import MART_SUITE, run_suite
+
+    cfg = replace(Config(), **overrides)
+    raw_dir = Path(os.environ["FE_COO_DB_PATH"]).with_suffix("") / "raw"
+    results = []
+
+    def timed(stage: str, fn, rows=None) -> None:
+        with RssSampler() as rss:
+            t0 = time.perf_counter()
+            out = fn()
+            seconds = time.perf_counter() - t0
+        n = rows(out) if rows else 0
+        results.append(StageResult(scale, stage, seconds, rss.peak_mb, int(n)))
+
+    def count(tables) -> int:
+        con = get_conn(read_only=True)
+        try:
+            return sum(con.execute(f"SELECT COUNT(*) FROM {t};").fetchone()[0] for t in tables)
+        finally:
+            con.close()
+
+    timed("generate", lambda: write_raw(cfg, raw_dir), rows=lambda r: sum(r.values()))
+    timed("load_raw", lambda: load_raw_parquet(raw_dir, as_views=cfg.raw_as_views),
+          rows=lambda _: count([f"raw.{p.name}" for p in raw_dir.iterdir() if p.is_dir()]))
+
+    sql_files = discover_models()
+    con = get_conn()
+    try:
+        ensure_watermark_table(con)
+        plan = plan_models(con, sql_files, full_refresh=True, deps=build_dag(sql_files))
+        for f, path, _ in plan:
+            produces, _ = parse_tables(path.read_text())
+            timed(f"model:{Path(f).stem}", lambda: run_model(con, f, path))
+            con.execute("CHECKPOINT;")
+            results[-1].rows = sum(con.execute(f"SELECT COUNT(*) FROM {t};").fetchone()[0] for t in produces)
+        for name, build in PYTHON_MODELS.items():
+            timed(f"python:{name}", lambda: build(con, True), rows=lambda n: n)
+            con.execute("CHECKPOINT;")
+    finally:
+        con.close()
+
+    def dq():
+        checks = run_suite(MART_SUITE)
+        failed = [c.name for c in checks if not c.passed]
+        if failed:
+            raise RuntimeError(f"DQ checks failed at scale {scale}: {failed}")
+        return checks
+
+    timed("dq", dq, rows=lambda _: count([s.name for s in MART_SUITE]))
+
+    with cursor() as c:
+        latest = str(c.execute("SELECT MAX(date) FROM mart.daily_pnl;").fetchone()[0])
+    for name, call in metric_calls(latest).items():
+        timed(f"metric:{name}", call, rows=len)
+    close_shared()
+
+    # publish copies the whole database file, so it scales with the build's size
+    published = raw_dir.parent / "published" / "current.duckdb"
+    timed("publish", lambda: publish(f"bench-{scale}", Path(os.environ["FE_COO_DB_PATH"]), published, keep=1))
+    return results
+
+
+def run_scale_subprocess(scale: str, overrides: dict, work_dir: Path = WORK_DIR) -> list[StageResult]:
+    """Run one scale in a fresh interpreter against work_dir/<scale>.duckdb."""
+    work_dir.mkdir(parents=True, exist_ok=True)
+    db_path = work_dir / f"{scale}.duckdb"
+    for p in (db_path, db_path.with_name(db_path.name + ".wal")):
+        p.unlink(missing_ok=True)
+
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as out:
+        out_path = Path(out.name)
+    try:
+        # metric calls read the scratch build directly, not a published snapshot
+        env = {
+            **os.environ,
+            "FE_COO_DB_PATH": str(db_path),
+            "FE_COO_PUBLISHED_PATH": str(db_path),
+            "FE_COO_IDLE_CLOSE_SECONDS": "0",
+        }
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.run", "--worker", scale,
+             "--overrides", json.dumps(overrides), "--out", str(out_path)],
+            env=env, check=True,
+        )
+        return [StageResult(**r) for r in json.loads(out_path.read_text())]
+    finally:
+        out_path.unlink(missing_ok=True)
+
+
+def ensure_benchmark_tables(con) -> None:
+    con.execute("CREATE SCHEMA IF NOT EXISTS ops;")
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ops.benchmarks (
+            run_id VARCHAR,
+            run_ts TIMESTAMP,
+            scale VARCHAR,
+            n_tickers INTEGER,
+            n_days INTEGER,
+            n_trades BIGINT,
+            stage VARCHAR,
+            seconds DOUBLE,
+            peak_rss_mb DOUBLE,
+            rows BIGINT,
+            rows_per_sec DOUBLE
+        );
+        """
+    )
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ops.benchmark_baselines (
+            scale VARCHAR,
+            stage VARCHAR,
+            seconds DOUBLE,
+            peak_rss_mb DOUBLE,
+            run_id VARCHAR
+        );
+        """
+    )
+
+
+def results_frame(run_id: str, results: list[StageResult], scales: dict) -> pd.DataFrame:
+    now = datetime.now(timezone.utc)
+    return pd.DataFrame([
+        {
+            "run_id": run_id,
+            "run_ts": now,
+            "scale": r.scale,
+            **scales[r.scale],
+            "stage": r.stage,
+            "seconds": r.seconds,
+            "peak_rss_mb": r.peak_rss_mb,
+            "rows": r.rows,
+            "rows_per_sec": r.rows_per_sec,
+        }
+        for r in results
+    ])
+
+
+def compare_to_baseline(
+    current: pd.DataFrame,
+    baseline: pd.DataFrame,
+    tolerance: float = TOLERANCE,
+    noise_floor: float = NOISE_FLOOR_SECONDS,
+) -> pd.DataFrame:
+    """
+    Join current stage timings to the baseline on (scale, stage) and flag
+    stages that are more than `tolerance` slower, ignoring differences under
+    `noise_floor` seconds. Stages without a baseline are kept with NaNs.
+    """
+    df = current[["scale", "stage", "seconds", "peak_rss_mb"]].merge(
+        baseline[["scale", "stage", "seconds", "peak_rss_mb"]],
+        on=["scale", "stage"], how="left", suffixes=("", "_baseline"),
+    )
+    df["ratio"] = df["seconds"] / df["seconds_baseline"]
+    df["regressed"] = (
+        (df["ratio"] > 1 + tolerance)
+        & (df["seconds"] - df["seconds_baseline"] > noise_floor)
+    )
+    return df
+
+
+def main(scales: list[str], save_baseline: bool = False, tolerance: float = TOLERANCE) -> bool:
+    """Run the sweep, record it and report regressions. Returns False if any stage regressed."""
+    from models.db import get_conn
+
+    run_id = f"bench-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}"
+    results = []
+    for scale in scales:
+        print(f"Benchmarking {scale}: {SCALES[scale]}")
+        results.extend(run_scale_subprocess(scale, SCALES[scale]))
+    df = results_frame(run_id, results, SCALES)
+
+    con = get_conn()
+    try:
+        ensure_benchmark_tables(con)
+        con.execute("INSERT INTO ops.benchmarks SELECT * FROM df;")
+        if save_baseline:
+            con.execute("DELETE FROM ops.benchmark_baselines WHERE scale IN (SELECT UNNEST(?));", [scales])
+            con.execute("""
+                INSERT INTO ops.benchmark_baselines
+                SELECT scale, stage, seconds, peak_rss_mb, run_id FROM df;
+            """)
+        baseline = con.execute("SELECT * FROM ops.benchmark_baselines;").df()
+    finally:
+        con.close()
+
+    report = compare_to_baseline(df, baseline, tolerance)
+    with pd.option_context("display.max_rows", None, "display.width", 160):
+        print(report.to_string(index=False, float_format=lambda v: f"{v:,.3f}"))
+
+    regressed = report[report["regressed"]]
+    if len(regressed):
+        print(f"Regressions vs baseline (> {tolerance:.0%} slower): {', '.join(regressed['scale'] + '/' + regressed['stage'])}")
+    print(f"Recorded {len(df)} stage timings as {run_id} in ops.benchmarks")
+    return regressed.empty
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", default="small,medium", help=f"comma-separated, from {', '.join(SCALES)}")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline for its scales")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed slowdown before flagging, e.g. 0.25")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--overrides", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        stage_results = run_scale(args.worker, json.loads(args.overrides))
+        Path(args.out).write_text(json.dumps([asdict(r) for r in stage_results]))
+    else:
+        ok = main(args.scales.split(","), args.save_baseline, args.tolerance)
+        sys.exit(0 if ok else 1)
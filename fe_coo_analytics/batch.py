@@ -0,0 +1,45 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+from typing import Any, Callable, Sequence
+from .db import checked_out
+from .results import Result, query
+
+MAX_WORKERS = int(os.getenv("FE_COO_QUERY_WORKERS", "8"))
+
+_pool_lock = threading.Lock()
+_pool: list = [None]
+
+def _executor() -> ThreadPoolExecutor:
+    # long-lived, so each worker thread keeps its cursor on the shared connection
+    with _pool_lock:
+        if _pool[0] is None:
+            _pool[0] = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="fe-coo-query")
+        return _pool[0]
+
+def gather(*calls: Callable[[], Any]) -> list:
+    """
+    Run zero-argument callables concurrently and return their results in
+    order, so a batch takes as long as its slowest call. Each pool thread
+    queries through its own cursor; the first exception is re-raised.
+
+    Runs the calls in turn when the caller holds a cursor (inside
+    `with cursor()` or an open reader), since a pool thread could otherwise
+    wait on that checkout to reopen the connection after a rebuild.
+    """
+    if len(calls) <= 1 or checked_out():
+        return [call() for call in calls]
+    futures = [_executor().submit(call) for call in calls]
+    return [f.result() for f in futures]
+
+def query_batch(
+    queries: Sequence[str | tuple[str, list]],
+    output: str = "pandas",
+) -> list[Result]:
+    """Run SQL strings or (sql, params) pairs concurrently; results in the same order."""
+    calls = []
+    for q in queries:
+        sql, params = (q, []) if isinstance(q, str) else q
+        calls.append(lambda sql=sql, params=params: query(sql, params, output))
+    return gather(*calls)
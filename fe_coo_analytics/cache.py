@@ -0,0 +1,159 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+import functools
+import os
+import sys
+import threading
+import duckdb
+import pandas as pd
+from .db import cursor, file_stamp
+
+DEFAULT_MAX_BYTES = int(float(os.getenv("FE_COO_CACHE_MAX_MB", "256")) * 1024 * 1024)
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+_version_lock = threading.Lock()
+_version: list = [None, None]
+
+def latest_build_version() -> tuple:
+    """
+    (latest successful ops.pipeline_runs.run_id, database file stamp).
+
+    The run_id is only re-queried when the file stamp changes, so checking the
+    version of an unchanged mart never touches DuckDB.
+    """
+    stamp = file_stamp()
+    with _version_lock:
+        if stamp != _version[1]:
+            try:
+                with cursor() as con:
+                    row = con.execute("""
+                      SELECT run_id FROM ops.pipeline_runs
+                      WHERE status = 'success'
+                      ORDER BY run_ts DESC
+                      LIMIT 1;
+                    """).fetchone()
+                run_id = row[0] if row else None
+            except duckdb.CatalogException:
+                run_id = None
+            _version[:] = [run_id, stamp]
+        return tuple(_version)
+
+def _freeze(obj):
+    if isinstance(obj, (list, tuple)):
+        return tuple(_freeze(o) for o in obj)
+    if isinstance(obj, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in obj.items()))
+    if isinstance(obj, (set, frozenset)):
+        return frozenset(_freeze(o) for o in obj)
+    return obj
+
+def _sizeof(value) -> int:
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+def _copy(value):
+    # callers add columns to what they get back; keep the cached frame pristine
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    if isinstance(value, tuple):
+        return tuple(_copy(v) for v in value)
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    return value
+
+class BuildCache:
+    """
+    LRU result cache whose entries stay valid until the build version changes.
+
+    Every lookup compares the current `version_fn()` with the version the
+    entries were stored under; on a change all entries are dropped at once.
+    Entries are evicted least-recently-used first once they exceed `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, version_fn=latest_build_version):
+        self.max_bytes = max_bytes
+        self.version_fn = version_fn
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+        self._version = None
+        self._stats = CacheStats()
+
+    def _sync_version(self):
+        version = self.version_fn()
+        if version != self._version:
+            if self._entries:
+                self._stats.invalidations += 1
+            self._entries.clear()
+            self._stats.bytes = 0
+            self._version = version
+        return version
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            version = self._sync_version()
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats.hits += 1
+                return _copy(self._entries[key][0])
+            self._stats.misses += 1
+
+        value = compute()
+        size = _sizeof(value)
+
+        with self._lock:
+            if version != self._version or size > self.max_bytes:
+                return value
+            if key in self._entries:
+                self._stats.bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._stats.bytes += size
+            while self._stats.bytes > self.max_bytes:
+                _, (_, old_size) = self._entries.popitem(last=False)
+                self._stats.bytes -= old_size
+                self._stats.evictions += 1
+        return _copy(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._stats.bytes = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(**{**self._stats.__dict__, "entries": len(self._entries)})
+
+_cache = BuildCache()
+
+def build_cached(fn=None, *, cache: BuildCache | None = None):
+    """
+    Decorator: memoize `fn` in the build-version cache, keyed on its
+    arguments. Results are recomputed only after a new build lands.
+    """
+    def decorate(f):
+        target = cache or _cache
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            # Streamlit pages all run as __main__, so key on the defining file
+            key = (f.__code__.co_filename, f.__qualname__, _freeze(args), _freeze(kwargs))
+            return target.get_or_compute(key, lambda: f(*args, **kwargs))
+
+        wrapper.cache = target
+        return wrapper
+
+    return decorate(fn) if fn is not None else decorate
+
+def cache_stats() -> CacheStats:
+    return _cache.stats()
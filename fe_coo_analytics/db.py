@@ -1,8 +1,19 @@
+from contextlib import contextmanager
 from pathlib import Path
+import json
 import os
+import threading
+import time
 import duckdb
 
 DEFAULT_DB_PATH = Path(os.getenv("FE_COO_DB_PATH", "data/fe_coo.duckdb"))
+# Symlink to the latest published snapshot (see models/publish.py); readers
+# use it once it exists and the build's staging database until then.
+PUBLISHED_PATH = Path(os.getenv("FE_COO_PUBLISHED_PATH", "data/published/current.duckdb"))
+# Latest build's outcome, written beside the snapshots by every run, failed
+# ones included (see models/publish.py write_run_status).
+RUN_STATUS_PATH = PUBLISHED_PATH.parent / "last_run.json"
+IDLE_CLOSE_SECONDS = float(os.getenv("FE_COO_IDLE_CLOSE_SECONDS", "5"))
 
 def get_conn(read_only: bool = False, db_path: Path | str = DEFAULT_DB_PATH):
     db_path = Path(db_path)
@@ -12,4 +23,158 @@ def get_conn(read_only: bool = False, db_path: Path | str = DEFAULT_DB_PATH):
     if read_only and not db_path.exists():
         return duckdb.connect(str(db_path), read_only=False)
 
-    return duckdb.connect(str(db_path), read_only=read_only)
\ No newline at end of file
+    return duckdb.connect(str(db_path), read_only=read_only)
+
+
+class ConnectionManager:
+    """
+    One read-only connection per process, handed out as per-thread cursors.
+
+    The database file (and its WAL) is stat'ed on every checkout; when a new
+    build has landed the connection is reopened once no cursor is in use.
+    DuckDB's file lock blocks writers while any connection is open, so the
+    connection is also closed after `idle_seconds` without checkouts, by one
+    reaper thread per manager that sleeps until the idle deadline.
+
+    `db_path` may be a symlink: the connection opens the file it points at,
+    and re-pointing it counts as a new build. `fallback_path` is read while
+    `db_path` does not exist yet.
+    """
+
+    def __init__(
+        self,
+        db_path: Path | str = DEFAULT_DB_PATH,
+        idle_seconds: float = IDLE_CLOSE_SECONDS,
+        fallback_path: Path | str | None = None,
+    ):
+        self.db_path = Path(db_path)
+        self.fallback_path = Path(fallback_path) if fallback_path is not None else None
+        self.idle_seconds = idle_seconds
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._con = None
+        self._stamp = None
+        self._generation = 0
+        self._in_use = 0
+        self._last_release = 0.0
+        self._reaper = None
+
+    def target(self) -> Path:
+        """The database file a connection opened now would read."""
+        if self.fallback_path is not None and not self.db_path.exists():
+            return self.fallback_path
+        return self.db_path.resolve()
+
+    def file_stamp(self, target: Path | None = None) -> tuple:
+        """
+        Resolved path plus (mtime_ns, size) of the database file and its WAL;
+        changes whenever a build writes or a new snapshot is published.
+        """
+        target = target or self.target()
+        stamp = [str(target)]
+        for p in (target, target.with_name(target.name + ".wal")):
+            try:
+                st = p.stat()
+                stamp.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def _close_locked(self) -> None:
+        if self._con is not None:
+            self._con.close()  # also closes every cursor derived from it
+            self._con = None
+            self._generation += 1
+
+    @contextmanager
+    def cursor(self):
+        """Check out this thread's cursor on the current build."""
+        depth = getattr(self._local, "depth", 0)
+        with self._cond:
+            stamp = self.file_stamp()
+            # nested checkouts on this thread keep the connection they started on
+            if depth == 0 and (self._con is None or stamp != self._stamp):
+                while self._in_use:
+                    self._cond.wait()
+                if self._con is None or self.file_stamp() != self._stamp:
+                    self._close_locked()
+                    target = self.target()
+                    self._con = get_conn(read_only=True, db_path=target)
+                    self._stamp = self.file_stamp(target)
+            if getattr(self._local, "generation", None) != self._generation:
+                self._local.cur = self._con.cursor()
+                self._local.generation = self._generation
+            self._in_use += 1
+            cur = self._local.cur
+        self._local.depth = depth + 1
+        try:
+            yield cur
+        finally:
+            self._local.depth = depth
+            with self._cond:
+                self._in_use -= 1
+                if self._in_use == 0:
+                    self._last_release = time.monotonic()
+                    if self.idle_seconds > 0 and self._reaper is None:
+                        self._reaper = threading.Thread(target=self._reap, name="duckdb-idle-reaper", daemon=True)
+                        self._reaper.start()
+                    self._cond.notify_all()
+
+    def connect(self):
+        """
+        A dedicated read-only connection on the current build, for long-lived
+        readers (streams, replays) that must not hold a checkout: the caller
+        closes it, and reopening or closing the shared connection leaves it alone.
+        """
+        return get_conn(read_only=True, db_path=self.target())
+
+    def checked_out(self) -> bool:
+        """True while the calling thread holds a cursor from this manager."""
+        return getattr(self._local, "depth", 0) > 0
+
+    def _reap(self) -> None:
+        """Close the connection once it has gone `idle_seconds` without a checkout."""
+        with self._cond:
+            while True:
+                if self._con is None or self._in_use:
+                    self._cond.wait()  # woken by the next release
+                    continue
+                remaining = self._last_release + self.idle_seconds - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                else:
+                    self._close_locked()
+
+    def close(self) -> None:
+        """Release the connection now, e.g. before opening the file read-write in this process."""
+        with self._cond:
+            while self._in_use:
+                self._cond.wait()
+            self._close_locked()
+
+
+_manager = ConnectionManager(PUBLISHED_PATH, fallback_path=DEFAULT_DB_PATH)
+
+def cursor():
+    """`with cursor() as con:` -- read-only cursor on the shared process-wide connection."""
+    return _manager.cursor()
+
+def connect():
+    """Dedicated read-only connection on the current build; the caller closes it."""
+    return _manager.connect()
+
+def checked_out() -> bool:
+    return _manager.checked_out()
+
+def close_shared() -> None:
+    _manager.close()
+
+def file_stamp() -> tuple:
+    return _manager.file_stamp()
+
+def last_run_status(path: Path | str = RUN_STATUS_PATH) -> dict | None:
+    """The latest build's ops.pipeline_runs record from the status file, or None before any run wrote one."""
+    try:
+        return json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,93 @@
+from __future__ import annotations
+from datetime import date as Date
+import numpy as np
+import pandas as pd
+from .db import cursor
+
+# Coarsening steps for chart queries, with their approximate length in days.
+GRAINS = {"day": 1.0, "week": 7.0, "month": 30.44, "quarter": 91.31, "year": 365.25}
+
+def pick_grain(start, end, max_points: int) -> str:
+    """Finest grain that puts at most `max_points` buckets between `start` and `end`."""
+    span = (pd.Timestamp(end) - pd.Timestamp(start)).days + 1
+    for grain, days in GRAINS.items():
+        # +1: a range rarely starts on a bucket boundary
+        if span / days + 1 <= max_points:
+            return grain
+    return "year"
+
+def grain_for(
+    table: str,
+    start: str | Date | None,
+    end: str | Date | None,
+    max_points: int | None,
+) -> str:
+    """pick_grain over [start, end], with open bounds taken from `table`'s dates."""
+    if not max_points:
+        return "day"
+    if start is None or end is None:
+        with cursor() as con:
+            lo, hi = con.execute(f"SELECT MIN(date), MAX(date) FROM {table};").fetchone()
+        if lo is None:
+            return "day"
+        start, end = start or lo, end or hi
+    return pick_grain(start, end, max_points)
+
+def bucketed(source: str, grain: str, keys: tuple[str, ...], flows: tuple[str, ...], levels: tuple[str, ...]) -> str:
+    """
+    `source` (a FROM item with a date column) rolled up to `grain`: flows are
+    summed, levels take their value on the bucket's last date, and each
+    bucket is dated by that last date. The day grain returns `source` as is.
+    """
+    if grain == "day":
+        return source
+    cols = ["MAX(date) AS date", *keys]
+    cols += [f"SUM({c}) AS {c}" for c in flows]
+    cols += [f"arg_max({c}, date) AS {c}" for c in levels]
+    group = ", ".join([f"date_trunc('{grain}', date)", *keys])
+    return f"(SELECT {', '.join(cols)} FROM {source} b GROUP BY {group})"
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: positions of `n` (at least 3) points of
+    (x, y) that keep the visual shape of the series. The first and last
+    points are always kept; each bucket in between keeps the point forming
+    the largest triangle with the previous pick and the next bucket's mean.
+    """
+    size = len(x)
+    n = max(n, 3)
+    if n >= size:
+        return np.arange(size)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # n - 2 buckets over the interior points; edges[-1] is the last point
+    edges = (np.arange(n - 1) * (size - 2) / (n - 2)).astype(int) + 1
+    out = np.empty(n, dtype=int)
+    out[0], out[-1] = 0, size - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt = slice(hi, edges[i + 2] if i + 2 < len(edges) else size)
+        cx, cy = x[nxt].mean(), y[nxt].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+def lttb(df: pd.DataFrame, x: str, y: list[str], max_points: int) -> pd.DataFrame:
+    """
+    Rows of `df` (sorted by `x`) picked by LTTB on each of the `y` columns,
+    which share `max_points` equally. Each series keeps at least its first,
+    last and one interior point, so at most max(max_points, 3 * len(y)) rows
+    come back.
+    """
+    if len(df) <= max_points or not y:
+        return df
+    xs = df[x]
+    if not pd.api.types.is_numeric_dtype(xs):
+        xs = pd.to_datetime(xs).astype("int64")
+    per = max(max_points // len(y), 3)
+    keep = np.unique(np.concatenate([
+        lttb_indices(xs.to_numpy(dtype=float), df[c].fillna(0).to_numpy(dtype=float), per) for c in y
+    ]))
+    return df.iloc[keep]
@@ -0,0 +1,132 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import date as Date
+from typing import Any, Mapping, Sequence
+import numpy as np
+from .results import Result, query
+
+@dataclass(frozen=True)
+class ExplorerTable:
+    """A raw table the explorer can page through: its unique sort key, filterable columns and date column."""
+    name: str
+    key: tuple[str, ...]
+    filters: tuple[str, ...] = ()
+    date_col: str | None = None
+
+TABLES = {
+    t.name: t for t in [
+        ExplorerTable("raw.trades", ("timestamp", "trade_id"), ("strategy", "ticker", "side"), "trade_date"),
+        ExplorerTable("raw.prices", ("date", "ticker"), ("ticker",), "date"),
+        ExplorerTable("raw.security_master", ("ticker",), ("sector", "country", "currency")),
+        ExplorerTable("raw.liquidity", ("ticker",), ("ticker",)),
+        ExplorerTable("raw.earnings_calendar", ("earnings_date", "ticker"), ("ticker",), "earnings_date"),
+    ]
+}
+
+Filters = Mapping[str, Sequence[Any]]
+
+def _table(name: str) -> ExplorerTable:
+    try:
+        return TABLES[name]
+    except KeyError:
+        raise ValueError(f"Unknown explorer table {name!r}; expected one of {sorted(TABLES)}") from None
+
+def _where(
+    spec: ExplorerTable,
+    filters: Filters | None,
+    start: str | Date | None,
+    end: str | Date | None,
+) -> tuple[list[str], list]:
+    """Parameterized predicates: IN lists for non-empty filters (empty means all) and a date range."""
+    where, params = ["TRUE"], []
+    for col, values in (filters or {}).items():
+        if col not in spec.filters:
+            raise ValueError(f"{spec.name} cannot be filtered on {col!r}; allowed: {spec.filters}")
+        if values:
+            where.append(f"{col} IN (SELECT UNNEST(?))")
+            params.append(list(values))
+    if (start or end) and spec.date_col is None:
+        raise ValueError(f"{spec.name} has no date column to filter on")
+    if start:
+        where.append(f"{spec.date_col} >= ?")
+        params.append(start)
+    if end:
+        where.append(f"{spec.date_col} <= ?")
+        params.append(end)
+    return where, params
+
+def page(
+    table: str,
+    filters: Filters | None = None,
+    start: str | Date | None = None,
+    end: str | Date | None = None,
+    after: Sequence[Any] | None = None,
+    limit: int = 500,
+    descending: bool = True,
+    output: str = "pandas",
+) -> Result:
+    """
+    One page of `table` in key order (newest first by default), filtered in
+    DuckDB. Pass the previous page's next_cursor() as `after` to continue;
+    each page costs a top-`limit` scan, however deep into the table it is.
+    """
+    spec = _table(table)
+    where, params = _where(spec, filters, start, end)
+    op, direction = ("<", "DESC") if descending else (">", "ASC")
+    if after is not None:
+        if len(after) != len(spec.key):
+            raise ValueError(f"cursor for {table} must have {len(spec.key)} values, got {len(after)}")
+        # the bound on the leading key lets DuckDB skip row groups outright
+        keys = ", ".join(spec.key)
+        where.append(f"{spec.key[0]} {op}= ? AND ({keys}) {op} ({', '.join('?' * len(after))})")
+        params += [after[0], *after]
+    order = ", ".join(f"{k} {direction}" for k in spec.key)
+    return query(f"""
+      SELECT * FROM {spec.name}
+      WHERE {' AND '.join(where)}
+      ORDER BY {order}
+      LIMIT ?;
+    """, params + [limit], output)
+
+def next_cursor(table: str, page_df, limit: int) -> tuple | None:
+    """Key of the last row of a full page, to pass as `after`; None once the table is exhausted."""
+    if len(page_df) < limit:
+        return None
+    last = [page_df[k].iloc[-1] for k in _table(table).key]
+    # numpy scalars don't bind as DuckDB parameters
+    return tuple(v.item() if isinstance(v, np.generic) else v for v in last)
+
+def count_rows(
+    table: str,
+    filters: Filters | None = None,
+    start: str | Date | None = None,
+    end: str | Date | None = None,
+) -> int:
+    spec = _table(table)
+    where, params = _where(spec, filters, start, end)
+    df = query(f"SELECT COUNT(*) AS n FROM {spec.name} WHERE {' AND '.join(where)};", params)
+    return int(df["n"][0])
+
+def distinct_values(table: str, column: str) -> list:
+    """Sorted distinct values of a filterable column, for filter pickers."""
+    spec = _table(table)
+    if column not in spec.filters:
+        raise ValueError(f"{table} cannot be filtered on {column!r}; allowed: {spec.filters}")
+    df = query(f"SELECT DISTINCT {column} AS v FROM {spec.name} WHERE {column} IS NOT NULL ORDER BY 1;")
+    return df["v"].tolist()
+
+def daily_trade_volume(
+    filters: Filters | None = None,
+    start: str | Date | None = None,
+    end: str | Date | None = None,
+    output: str = "pandas",
+) -> Result:
+    """Per trade_date share volume, trade count and notional of the filtered trades."""
+    where, params = _where(TABLES["raw.trades"], filters, start, end)
+    return query(f"""
+      SELECT trade_date, SUM(quantity) AS quantity, COUNT(*) AS trades, SUM(quantity * price) AS notional
+      FROM raw.trades
+      WHERE {' AND '.join(where)}
+      GROUP BY trade_date
+      ORDER BY trade_date;
+    """, params, output)
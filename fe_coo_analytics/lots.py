@@ -0,0 +1,238 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import os
+import numpy as np
+import pandas as pd
+
+METHODS = ("fifo", "average")
+WORKERS = min(8, os.cpu_count() or 1)
+
+@dataclass
+class TradeArrays:
+    """
+    Trades as flat arrays sorted by (strategy, ticker, timestamp), one lot
+    partition per (strategy, ticker); `part` is the partition's index into
+    `keys`.
+    """
+    keys: pd.DataFrame
+    part: np.ndarray
+    date: np.ndarray
+    qty: np.ndarray
+    price: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.part)
+
+    def take(self, rows: slice) -> "TradeArrays":
+        return TradeArrays(self.keys, self.part[rows], self.date[rows], self.qty[rows], self.price[rows])
+
+def load_trades(con) -> TradeArrays:
+    """Signed trades in the scope of mart.position_intervals (known tickers, price dates), in fill order."""
+    df = con.execute("""
+      SELECT DENSE_RANK() OVER (ORDER BY strategy, ticker) - 1 AS part, strategy, ticker,
+      trade_date::DATE AS date,
+      CASE WHEN side = 'BUY' THEN quantity ELSE -quantity END AS qty,
+      price
+      FROM raw.trades
+      WHERE ticker IN (SELECT ticker FROM raw.security_master)
+        AND trade_date::DATE IN (SELECT DISTINCT date::DATE FROM raw.prices)
+        AND quantity <> 0
+      ORDER BY strategy, ticker, timestamp, trade_id;
+    """).df()
+    part = df["part"].to_numpy(np.int64)
+    first = np.r_[True, part[1:] != part[:-1]] if len(df) else np.zeros(0, bool)
+    keys = df.loc[first, ["strategy", "ticker"]].reset_index(drop=True)
+    return TradeArrays(keys, part, df["date"].to_numpy(), df["qty"].to_numpy(np.int64),
+                       df["price"].to_numpy(float))
+
+def _starts(part: np.ndarray) -> np.ndarray:
+    return np.r_[True, part[1:] != part[:-1]]
+
+def _running(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Cumulative sum of `values` restarting at every True in `starts`."""
+    total = np.cumsum(values)
+    offset = (total - values)[starts]
+    return total - np.repeat(offset, np.diff(np.r_[np.flatnonzero(starts), len(values)]))
+
+def _split_flips(t: TradeArrays) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Split every trade that takes a position through zero into a closing leg
+    and an opening leg, so no leg changes the position's sign. Returns the
+    source trade of each leg, its signed quantity and the position before it.
+    """
+    pos = _running(t.qty, _starts(t.part))
+    prev = pos - t.qty
+    flips = (prev != 0) & (np.sign(pos) == -np.sign(prev))
+    src = np.repeat(np.arange(len(t)), 1 + flips)
+    qty = t.qty[src].copy()
+    before = prev[src].copy()
+    # first leg of a flip closes the old position, the second opens from flat
+    close_leg = np.flatnonzero(flips) + np.arange(flips.sum())
+    qty[close_leg] = -prev[flips]
+    qty[close_leg + 1] = pos[flips]
+    before[close_leg + 1] = 0
+    return src, qty, before
+
+def _affine_scan(a: np.ndarray, b: np.ndarray, span: int) -> np.ndarray:
+    """
+    y[i] = a[i] * y[i - 1] + b[i] for all i by log-step doubling (a = 0
+    restarts the recurrence); `span` bounds how far back any y reaches.
+    """
+    a, b = a.copy(), b.copy()
+    k = 1
+    while k < span:
+        b[k:] = b[k:] + a[k:] * b[:-k]
+        a[k:] = a[k:] * a[:-k]
+        k *= 2
+    return b
+
+def _lot_days(t: TradeArrays) -> dict[str, pd.DataFrame]:
+    """
+    Per method, one row per partition and trade date: closed_shares and
+    realized PnL summed over the day's legs, shares and open cost at the
+    close, all without a per-trade loop. A segment is a run of legs from
+    flat in which the position keeps one sign s: legs along s open lots,
+    legs against s close them.
+
+    FIFO consumes opening shares in order, so the cost of a close is the
+    cumulative opening-cost curve (shares opened -> cost paid) integrated
+    over the slice of opened shares it consumes: two interpolations.
+    Average cost per share follows u = u_prev * prev/pos + qty * price / pos
+    on opens and is unchanged on closes, an affine recurrence solved with a
+    prefix scan.
+    """
+    src, qty, before = _split_flips(t)
+    price = t.price[src]
+    after = before + qty
+    seg_start = before == 0
+    side = np.where(seg_start, np.sign(qty), np.sign(before)).astype(float)
+    opening = np.sign(qty) == side
+    size = np.abs(qty).astype(float)
+    held = np.abs(after).astype(float)
+    open_q = np.where(opening, size, 0.0)
+    close_q = size - open_q
+    seg = np.cumsum(seg_start) - 1
+
+    # FIFO: opened-share axis shared by all segments; closes index into it from the segment's base
+    opened = np.cumsum(open_q)
+    paid = np.cumsum(open_q * price)
+    curve_x, curve_y = np.r_[0.0, opened], np.r_[0.0, paid]
+    base = (opened - open_q)[seg_start][seg]
+    closed = _running(close_q, seg_start)
+    consumed_to = np.interp(base + closed, curve_x, curve_y)
+    consumed_from = np.interp(base + closed - close_q, curve_x, curve_y)
+    fifo_cost = consumed_to - consumed_from
+    fifo = (side * (close_q * price - fifo_cost), side * (paid - consumed_to))
+
+    # average cost: per-share cost u restarts at each segment start (before = 0)
+    safe = np.where(held > 0, held, 1.0)
+    a = np.where(opening, np.abs(before) / safe, 1.0)
+    b = np.where(opening, open_q * price / safe, 0.0)
+    span = int(np.diff(np.r_[np.flatnonzero(seg_start), len(seg)]).max()) if len(seg) else 0
+    unit = _affine_scan(a, b, span)  # closes leave it unchanged, so it is also the cost they realize at
+    average = (side * close_q * (price - unit), side * held * unit)
+
+    # legs are ordered by (partition, date): each day is a contiguous run
+    part, date = t.part[src], t.date[src]
+    first = np.flatnonzero(np.r_[True, (part[1:] != part[:-1]) | (date[1:] != date[:-1])])
+    last = np.r_[first[1:], len(part)] - 1
+    days = {"part": part[first], "date": date[first], "shares": after[last],
+            "closed_shares": np.add.reduceat(close_q, first)}
+    return {m: pd.DataFrame({**days, "cost_basis": cost[last], "realized_pnl": np.add.reduceat(realized, first)})
+            for m, (realized, cost) in (("fifo", fifo), ("average", average))}
+
+def _chunks(t: TradeArrays, workers: int) -> list[slice]:
+    """Row ranges of about equal size that never split a partition."""
+    starts = np.flatnonzero(_starts(t.part))
+    targets = np.linspace(0, len(t), workers + 1)[1:-1]
+    bounds = np.unique(np.r_[0, np.r_[starts, len(t)][np.searchsorted(starts, targets)], len(t)])
+    return [slice(int(lo), int(hi)) for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+def lot_state(t: TradeArrays, workers: int = WORKERS) -> pd.DataFrame:
+    """
+    End-of-day lot state per (date, strategy, ticker, method) on each trade
+    date: shares, signed cost_basis of open lots, closed_shares and
+    realized_pnl. Partitions are independent, so chunks of them run on a
+    thread pool (the numpy kernels release the GIL).
+    """
+    if not len(t):
+        return pd.DataFrame(columns=["date", "strategy", "ticker", "method", "shares", "cost_basis",
+                                     "closed_shares", "realized_pnl"])
+    chunks = _chunks(t, workers)
+    with ThreadPoolExecutor(max_workers=len(chunks)) as pool:
+        parts = list(pool.map(lambda rows: _lot_days(t.take(rows)), chunks))
+    state = pd.concat([p[m].assign(method=m) for p in parts for m in METHODS], ignore_index=True)
+    state = pd.concat([t.keys.iloc[state["part"]].reset_index(drop=True), state], axis=1)
+    state["shares"] = state["shares"].astype(np.int64)
+    return state[["date", "strategy", "ticker", "method", "shares", "cost_basis", "closed_shares", "realized_pnl"]]
+
+def build_lot_pnl(con, workers: int = WORKERS) -> int:
+    """
+    Build step: rewrite mart.realized_pnl (per close date), mart.unrealized_pnl
+    (per price date with an open position) and mart.lot_pnl_reconciliation,
+    which checks realized + change in unrealized against daily_pnl plus the
+    day's trading PnL (fills marked to the close). `con` must be read-write.
+    """
+    state = lot_state(load_trades(con), workers)
+    con.register("lot_state_tmp", state)
+    try:
+        con.execute("CREATE SCHEMA IF NOT EXISTS mart;")
+        con.execute("""
+          CREATE OR REPLACE TABLE mart.realized_pnl AS
+          SELECT date::DATE AS date, strategy, ticker, method, closed_shares, realized_pnl
+          FROM lot_state_tmp
+          WHERE closed_shares > 0
+          ORDER BY date, strategy, ticker, method;
+        """)
+        con.execute("""
+          CREATE OR REPLACE TABLE mart.unrealized_pnl AS
+          WITH grid AS (
+            SELECT p.date::DATE AS date, k.strategy, k.ticker, k.method, p.close
+            FROM raw.prices p
+            JOIN (SELECT DISTINCT strategy, ticker, method FROM lot_state_tmp) k ON k.ticker = p.ticker
+          )
+          SELECT g.date, g.strategy, g.ticker, g.method, s.shares, s.cost_basis, g.close,
+          s.shares * g.close - s.cost_basis AS unrealized_pnl
+          FROM grid g
+          ASOF JOIN lot_state_tmp s
+            ON g.strategy = s.strategy AND g.ticker = s.ticker AND g.method = s.method
+            AND g.date >= s.date::DATE
+          WHERE s.shares <> 0
+          ORDER BY g.date, g.strategy, g.ticker, g.method;
+        """)
+        con.execute("""
+          CREATE OR REPLACE TABLE mart.lot_pnl_reconciliation AS
+          WITH trading AS (
+            SELECT t.trade_date::DATE AS date, t.strategy, t.ticker,
+            SUM(CASE WHEN t.side = 'BUY' THEN t.quantity ELSE -t.quantity END * (p.close - t.price)) AS trading_pnl
+            FROM raw.trades t
+            JOIN raw.prices p ON p.ticker = t.ticker AND p.date::DATE = t.trade_date::DATE
+            GROUP BY ALL
+          ),
+          grid AS (
+            SELECT p.date::DATE AS date, k.strategy, k.ticker, k.method
+            FROM raw.prices p
+            JOIN (SELECT DISTINCT strategy, ticker, method FROM lot_state_tmp) k ON k.ticker = p.ticker
+          ),
+          joined AS (
+            SELECT g.date, g.strategy, g.ticker, g.method,
+            COALESCE(d.pnl, 0) AS daily_pnl,
+            COALESCE(t.trading_pnl, 0) AS trading_pnl,
+            COALESCE(r.realized_pnl, 0) AS realized_pnl,
+            COALESCE(u.unrealized_pnl, 0) - COALESCE(LAG(u.unrealized_pnl) OVER (
+              PARTITION BY g.strategy, g.ticker, g.method ORDER BY g.date
+            ), 0) AS unrealized_change
+            FROM grid g
+            LEFT JOIN mart.daily_pnl d USING (date, strategy, ticker)
+            LEFT JOIN trading t USING (date, strategy, ticker)
+            LEFT JOIN mart.realized_pnl r USING (date, strategy, ticker, method)
+            LEFT JOIN mart.unrealized_pnl u USING (date, strategy, ticker, method)
+          )
+          SELECT *, realized_pnl + unrealized_change - daily_pnl - trading_pnl AS pnl_break
+          FROM joined
+          ORDER BY date, strategy, ticker, method;
+        """)
+    finally:
+        con.unregister("lot_state_tmp")
+    return len(state)
@@ -1,15 +1,68 @@
-
 from __future__ import annotations
-import pandas as pd
-from .db import get_conn
-
-def biggest_earnings_windows(n: int = 10) -> pd.DataFrame:
-    con = get_conn(read_only=True)
-    df = con.execute("""
-      SELECT strategy, ticker, earnings_date, pnl_total_window
-      FROM mart.earnings_window_pnl
-      ORDER BY ABS(pnl_total_window) DESC
+from .results import Result, query
+from .metrics_rollup import available_tables, has_top_k
+
+# Windows (± business days) precomputed in mart.earnings_windows, and the
+# widest offset kept in mart.earnings_offset_pnl; see sql/05_earnings_window.sql.
+EARNINGS_WINDOWS = (1, 2, 5, 10)
+MAX_OFFSET = 10
+
+def _window_source(window: int) -> tuple[str, list]:
+    """FROM clause (strategy, ticker, earnings_date, pnl) for a ±`window` business-day window."""
+    tables = available_tables()
+    if window in EARNINGS_WINDOWS and "mart.earnings_windows" in tables:
+        return "(SELECT * FROM mart.earnings_windows WHERE window_days = ?)", [window]
+    if 0 <= window <= MAX_OFFSET and "mart.earnings_offset_pnl" in tables:
+        return """(
+          SELECT strategy, ticker, earnings_date, SUM(pnl) AS pnl
+          FROM mart.earnings_offset_pnl
+          WHERE ABS(day_offset) <= ?
+          GROUP BY 1,2,3
+        )""", [window]
+    if window == 2:
+        # builds that predate the business-day model
+        return "(SELECT *, pnl_total_window AS pnl FROM mart.earnings_window_pnl)", []
+    raise ValueError(f"window must be between 0 and {MAX_OFFSET} business days, got {window}")
+
+def earnings_window_pnl(
+    window: int = 2,
+    strategy: str | None = None,
+    ticker: str | None = None,
+    output: str = "pandas",
+) -> Result:
+    """PnL per (strategy, ticker, earnings event) summed over ±`window` business days."""
+    source, params = _window_source(window)
+    filters = [("strategy = ?", strategy), ("ticker = ?", ticker)]
+    where = " AND ".join(["TRUE"] + [f for f, v in filters if v])
+    return query(f"""
+      SELECT strategy, ticker, earnings_date, ? AS window_days, pnl
+      FROM {source} w
+      WHERE {where}
+      ORDER BY strategy, ticker, earnings_date;
+    """, [window] + params + [v for _, v in filters if v], output)
+
+def biggest_earnings_windows(
+    n: int = 10,
+    strategy: str | None = None,
+    window: int = 2,
+    output: str = "pandas",
+) -> Result:
+    """Largest |pnl| earnings events over a ±`window` business-day window."""
+    where, params = ("strategy = ?", [strategy]) if strategy else ("TRUE", [])
+    # the top-K extract is ranked on the ±2 window
+    if window == 2 and has_top_k("mart.top_earnings_windows", n):
+        rank = "strategy_rank" if strategy else "overall_rank"
+        return query(f"""
+          SELECT strategy, ticker, earnings_date, pnl_total_window
+          FROM mart.top_earnings_windows
+          WHERE {where} AND {rank} <= ?
+          ORDER BY {rank};
+        """, params + [n], output)
+    source, source_params = _window_source(window)
+    return query(f"""
+      SELECT strategy, ticker, earnings_date, pnl AS pnl_total_window
+      FROM {source} w
+      WHERE {where}
+      ORDER BY ABS(pnl) DESC
       LIMIT ?;
-    """, [n]).df()
-    con.close()
-    return df
+    """, source_params + params + [n], output)
@@ -1,19 +1,47 @@
 
 from __future__ import annotations
-import pandas as pd
-from .db import get_conn
+from .downsample import bucketed, grain_for
+from .results import Result, query
 
-def exposures_over_time(strategy: str | None = None) -> pd.DataFrame:
-    con = get_conn(read_only=True)
-    where, params = "", []
+def exposures_over_time(
+    strategy: str | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    max_points: int | None = None,
+    output: str = "pandas",
+) -> Result:
+    """Gross/net exposure per (date, strategy); `max_points` keeps end-of-period values on a coarser grain."""
+    where, params = ["TRUE"], []
     if strategy:
-        where = "WHERE strategy = ?"
-        params = [strategy]
-    df = con.execute(f"""
+        where.append("strategy = ?")
+        params.append(strategy)
+    # date bounds prune row groups: the mart is stored in date order
+    if start:
+        where.append("date >= ?")
+        params.append(start)
+    if end:
+        where.append("date <= ?")
+        params.append(end)
+    source = f"(SELECT * FROM mart.daily_exposures WHERE {' AND '.join(where)})"
+    grain = grain_for("mart.daily_exposures", start, end, max_points)
+    source = bucketed(source, grain, ("strategy",), flows=(), levels=("gross_exposure", "net_exposure"))
+    return query(f"""
       SELECT date, strategy, gross_exposure, net_exposure
-      FROM mart.daily_exposures
-      {where}
+      FROM {source} e
       ORDER BY date, strategy;
-    """, params).df()
-    con.close()
-    return df
+    """, params, output)
+
+def positions_as_of(date: str, strategy: str | None = None, output: str = "pandas") -> Result:
+    """Non-flat positions held on `date`, looked up from the sparse interval table."""
+    where, params = "", [date, date]
+    if strategy:
+        where = "AND strategy = ?"
+        params.append(strategy)
+    return query(f"""
+      SELECT CAST(? AS DATE) AS date, strategy, ticker, shares
+      FROM mart.position_intervals
+      WHERE CAST(? AS DATE) BETWEEN valid_from AND valid_to
+        AND shares <> 0
+        {where}
+      ORDER BY strategy, ticker;
+    """, params, output)
@@ -1,24 +1,42 @@
-
 from __future__ import annotations
-import pandas as pd
-from .db import get_conn
+from .results import Result, query
+from .metrics_rollup import has_top_k
 
-def most_illiquid(date: str | None = None, n: int = 10) -> pd.DataFrame:
-    con = get_conn(read_only=True)
-    if date:
-        df = con.execute("""
+def most_illiquid(
+    date: str | None = None,
+    n: int = 10,
+    strategy: str | None = None,
+    only_flagged: bool = False,
+    output: str = "pandas",
+) -> Result:
+    """
+    Positions with the most days to liquidate, overall or within a date (and
+    strategy). only_flagged keeps illiquid_flag = 1 rows; the flag is monotone
+    in days_to_liquidate, so those are always a prefix of the ranking.
+    """
+    flagged = "AND illiquid_flag = 1" if only_flagged else ""
+    if date and strategy:
+        rank, where, params = "day_strategy_rank", "date = ? AND strategy = ?", [date, strategy]
+    elif date:
+        rank, where, params = "day_rank", "date = ?", [date]
+    elif not strategy:
+        rank, where, params = "overall_rank", "TRUE", []
+    else:
+        rank = None
+    if rank and has_top_k("mart.top_illiquid", n):
+        return query(f"""
           SELECT date, strategy, ticker, shares, adv_shares, days_to_liquidate, illiquid_flag
-          FROM mart.daily_liquidity
-          WHERE date = ?
-          ORDER BY days_to_liquidate DESC
-          LIMIT ?;
-        """, [date, n]).df()
+          FROM mart.top_illiquid
+          WHERE {where} AND {rank} <= ? {flagged}
+          ORDER BY {rank};
+        """, params + [n], output)
     else:
-        df = con.execute("""
+        filters = [("date = ?", date), ("strategy = ?", strategy)]
+        where = " AND ".join(["TRUE"] + [f for f, v in filters if v])
+        return query(f"""
           SELECT date, strategy, ticker, shares, adv_shares, days_to_liquidate, illiquid_flag
           FROM mart.daily_liquidity
+          WHERE {where} {flagged}
           ORDER BY days_to_liquidate DESC
           LIMIT ?;
-        """, [n]).df()
-    con.close()
-    return df
+        """, [v for _, v in filters if v] + [n], output)
@@ -1,31 +1,112 @@
 from __future__ import annotations
-import pandas as pd
-from .db import get_conn
+from .results import Result, query
+from .downsample import bucketed, grain_for
+from .metrics_rollup import coarsest, has_top_k
 
-def pnl_by_day(strategy: str | None = None) -> pd.DataFrame:
-    con = get_conn(read_only=True)
+def pnl_by_day(
+    strategy: str | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    max_points: int | None = None,
+    output: str = "pandas",
+) -> Result:
+    """Daily pnl per strategy; `max_points` sums it to a coarser grain for long ranges."""
     where = ""
     params = []
     if strategy:
-        where = "WHERE strategy = ?"
-        params = [strategy]
-    df = con.execute(f"""
-      SELECT date, strategy, SUM(pnl) AS pnl
-      FROM mart.daily_pnl
-      {where}
-      GROUP BY 1,2
+        where += " AND strategy = ?"
+        params.append(strategy)
+    # date bounds prune row groups: the marts are stored in date order
+    if start:
+        where += " AND date >= ?"
+        params.append(start)
+    if end:
+        where += " AND date <= ?"
+        params.append(end)
+    # strategy_daily already holds SUM(pnl) per (date, strategy)
+    if coarsest("mart.strategy_daily", "mart.daily_pnl") == "mart.strategy_daily":
+        source = f"""(
+          SELECT date, strategy, pnl
+          FROM mart.strategy_daily
+          WHERE pnl IS NOT NULL {where}
+        )"""
+    else:
+        source = f"""(
+          SELECT date, strategy, SUM(pnl) AS pnl
+          FROM mart.daily_pnl
+          WHERE TRUE {where}
+          GROUP BY 1,2
+        )"""
+    grain = grain_for("mart.daily_pnl", start, end, max_points)
+    return query(f"""
+      SELECT date, strategy, pnl
+      FROM {bucketed(source, grain, ("strategy",), flows=("pnl",), levels=())} p
       ORDER BY 1,2;
-    """, params).df()
-    con.close()
-    return df
+    """, params, output)
 
-def top_pnl_movers(n: int = 10) -> pd.DataFrame:
-    con = get_conn(read_only=True)
-    df = con.execute("""
-      SELECT date, strategy, ticker, pnl
-      FROM mart.daily_pnl
-      ORDER BY ABS(pnl) DESC
-      LIMIT ?;
-    """, [n]).df()
-    con.close()
-    return df
+def lot_pnl_by_day(
+    method: str = "fifo",
+    strategy: str | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    output: str = "pandas",
+) -> Result:
+    """Realized PnL and end-of-day unrealized PnL per strategy under a lot method ("fifo" or "average")."""
+    where = " AND method = ?"
+    params = [method]
+    if strategy:
+        where += " AND strategy = ?"
+        params.append(strategy)
+    if start:
+        where += " AND date >= ?"
+        params.append(start)
+    if end:
+        where += " AND date <= ?"
+        params.append(end)
+    return query(f"""
+      WITH r AS (
+        SELECT date, strategy, SUM(realized_pnl) AS realized_pnl
+        FROM mart.realized_pnl WHERE TRUE {where} GROUP BY 1,2
+      ),
+      u AS (
+        SELECT date, strategy, SUM(unrealized_pnl) AS unrealized_pnl
+        FROM mart.unrealized_pnl WHERE TRUE {where} GROUP BY 1,2
+      )
+      SELECT date, strategy, COALESCE(r.realized_pnl, 0) AS realized_pnl,
+      COALESCE(u.unrealized_pnl, 0) AS unrealized_pnl
+      FROM r FULL OUTER JOIN u USING (date, strategy)
+      ORDER BY 1,2;
+    """, params + params, output)
+
+def top_pnl_movers(
+    n: int = 10,
+    date: str | None = None,
+    strategy: str | None = None,
+    output: str = "pandas",
+) -> Result:
+    """Largest |pnl| rows, overall or within a date (and strategy)."""
+    if date and strategy:
+        rank, where, params = "day_strategy_rank", "date = ? AND strategy = ?", [date, strategy]
+    elif date:
+        rank, where, params = "day_rank", "date = ?", [date]
+    elif not strategy:
+        rank, where, params = "overall_rank", "TRUE", []
+    else:
+        rank = None  # no per-strategy ranking across dates
+    if rank and has_top_k("mart.top_pnl_movers", n):
+        return query(f"""
+          SELECT date, strategy, ticker, pnl
+          FROM mart.top_pnl_movers
+          WHERE {where} AND {rank} <= ?
+          ORDER BY {rank};
+        """, params + [n], output)
+    else:
+        filters = [("date = ?", date), ("strategy = ?", strategy)]
+        where = " AND ".join(["TRUE"] + [f for f, v in filters if v])
+        return query(f"""
+          SELECT date, strategy, ticker, pnl
+          FROM mart.daily_pnl
+          WHERE {where}
+          ORDER BY ABS(pnl) DESC
+          LIMIT ?;
+        """, [v for _, v in filters if v] + [n], output)
@@ -0,0 +1,51 @@
+from __future__ import annotations
+from .downsample import bucketed, grain_for
+from .results import Result, query
+
+def var_by_day(
+    strategies: list[str] | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    max_points: int | None = None,
+    output: str = "pandas",
+) -> Result:
+    """
+    Historical 1-day VaR and ES (95% and 99%, as positive losses) per strategy.
+    NULL until a date has enough return history. `max_points` keeps each
+    coarser bucket's last value, as in strategy_daily.
+    """
+    where, params = ["TRUE"], []
+    if strategies is not None:
+        where.append("strategy IN (SELECT UNNEST(?))")
+        params.append(list(strategies))
+    if start:
+        where.append("date >= ?")
+        params.append(start)
+    if end:
+        where.append("date <= ?")
+        params.append(end)
+    source = f"(SELECT * FROM mart.daily_var WHERE {' AND '.join(where)})"
+    grain = grain_for("mart.daily_var", start, end, max_points)
+    source = bucketed(source, grain, ("strategy",), flows=(),
+                      levels=("n_obs", "var_95", "es_95", "var_99", "es_99"))
+    return query(f"""
+      SELECT date, strategy, n_obs, var_95, es_95, var_99, es_99
+      FROM {source} v
+      ORDER BY date, strategy;
+    """, params, output)
+
+def firm_var(start: str | None = None, end: str | None = None, output: str = "pandas") -> Result:
+    """Firm-wide VaR/ES from the combined book (not the sum of strategy VaRs)."""
+    where, params = ["TRUE"], []
+    if start:
+        where.append("date >= ?")
+        params.append(start)
+    if end:
+        where.append("date <= ?")
+        params.append(end)
+    return query(f"""
+      SELECT date, n_obs, var_95, es_95, var_99, es_99
+      FROM mart.firm_var
+      WHERE {' AND '.join(where)}
+      ORDER BY date;
+    """, params, output)
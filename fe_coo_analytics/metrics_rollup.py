@@ -0,0 +1,140 @@
+from __future__ import annotations
+import threading
+from .db import cursor, file_stamp
+from .downsample import bucketed, grain_for
+from .results import Result, query
+
+# K of the ranked extracts in sql/07_top_k.sql
+TOP_K = 50
+
+_tables_lock = threading.Lock()
+_tables: list = [None, frozenset()]
+
+def available_tables() -> frozenset[str]:
+    """schema.table names in the current build; re-read only when the database file changes."""
+    stamp = file_stamp()
+    with _tables_lock:
+        if stamp != _tables[0]:
+            with cursor() as con:
+                rows = con.execute("""
+                  SELECT table_schema || '.' || table_name FROM information_schema.tables;
+                """).fetchall()
+            _tables[:] = [stamp, frozenset(r[0] for r in rows)]
+        return _tables[1]
+
+def coarsest(*tables: str) -> str:
+    """
+    First of `tables` (ordered coarsest grain first) present in the build.
+    The last one is the ticker-grain fallback and is returned unconditionally.
+    """
+    names = available_tables()
+    for t in tables[:-1]:
+        if t in names:
+            return t
+    return tables[-1]
+
+def has_top_k(table: str, n: int) -> bool:
+    """True when the top `n` rows can be read by rank from the precomputed top-K `table`."""
+    return n <= TOP_K and table in available_tables()
+
+# Same SELECT as sql/06_rollups.sql, for builds that predate the rollups.
+_STRATEGY_DAILY_FALLBACK = """
+  WITH pnl AS (
+    SELECT date, strategy, SUM(pnl) AS pnl FROM mart.daily_pnl GROUP BY date, strategy
+  ),
+  liq AS (
+    SELECT date, strategy, SUM(illiquid_flag) AS illiquid_positions
+    FROM mart.daily_liquidity GROUP BY date, strategy
+  )
+  SELECT e.date, e.strategy, p.pnl,
+  SUM(p.pnl) OVER (
+    PARTITION BY e.strategy ORDER BY e.date
+    ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+  ) AS cum_pnl,
+  e.gross_exposure, e.net_exposure, l.illiquid_positions
+  FROM mart.daily_exposures e
+  LEFT JOIN pnl p ON e.date = p.date AND e.strategy = p.strategy
+  LEFT JOIN liq l ON e.date = l.date AND e.strategy = l.strategy
+"""
+
+def _strategy_daily_source() -> str:
+    if coarsest("mart.strategy_daily", "mart.daily_pnl") == "mart.strategy_daily":
+        return "mart.strategy_daily"
+    return f"({_STRATEGY_DAILY_FALLBACK})"
+
+def strategy_daily(
+    strategies: list[str] | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    max_points: int | None = None,
+    output: str = "pandas",
+) -> Result:
+    """
+    Per-strategy daily pnl, cum_pnl, gross/net exposure and illiquid position
+    count. pnl and cum_pnl are NULL on the first price date. With `max_points`,
+    rows are rolled up to the finest grain (week, month, ...) giving at most
+    that many dates: pnl is summed, the rest are as of each bucket's last date.
+    """
+    where = ["TRUE"]
+    params = []
+    if strategies is not None:
+        where.append("strategy IN (SELECT UNNEST(?))")
+        params.append(list(strategies))
+    if start:
+        where.append("date >= ?")
+        params.append(start)
+    if end:
+        where.append("date <= ?")
+        params.append(end)
+    source = f"(SELECT * FROM {_strategy_daily_source()} s WHERE {' AND '.join(where)})"
+    grain = grain_for("mart.strategy_daily", start, end, max_points)
+    source = bucketed(source, grain, ("strategy",), flows=("pnl",),
+                      levels=("cum_pnl", "gross_exposure", "net_exposure", "illiquid_positions"))
+    return query(f"""
+      SELECT date, strategy, pnl, cum_pnl, gross_exposure, net_exposure, illiquid_positions
+      FROM {source} s
+      ORDER BY date, strategy;
+    """, params, output)
+
+def firm_daily(max_points: int | None = None, output: str = "pandas") -> Result:
+    """Firm-wide daily pnl, cum_pnl, exposures and illiquid position count; `max_points` as in strategy_daily."""
+    if coarsest("mart.firm_daily", "mart.daily_pnl") == "mart.firm_daily":
+        source = "mart.firm_daily"
+    else:
+        source = f"""(
+          SELECT date, SUM(pnl) AS pnl, SUM(cum_pnl) AS cum_pnl,
+          SUM(gross_exposure) AS gross_exposure, SUM(net_exposure) AS net_exposure,
+          SUM(illiquid_positions) AS illiquid_positions
+          FROM {_strategy_daily_source()} s
+          GROUP BY date
+        )"""
+    grain = grain_for("mart.strategy_daily", None, None, max_points)
+    source = bucketed(source, grain, (), flows=("pnl",),
+                      levels=("cum_pnl", "gross_exposure", "net_exposure", "illiquid_positions"))
+    return query(f"""
+      SELECT date, pnl, cum_pnl, gross_exposure, net_exposure, illiquid_positions
+      FROM {source} f
+      ORDER BY date;
+    """, output=output)
+
+def latest_kpis(strategies: list[str] | None = None, output: str = "pandas") -> Result:
+    """
+    One row for the latest date: total_pnl, gross_exposure, net_exposure,
+    illiquid_positions, summed over `strategies` (all when None).
+    """
+    if strategies is None and coarsest("mart.firm_daily", "mart.daily_pnl") == "mart.firm_daily":
+        source, where, params = "mart.firm_daily", "TRUE", []
+    else:
+        source = _strategy_daily_source()
+        where, params = "TRUE", []
+        if strategies is not None:
+            where, params = "strategy IN (SELECT UNNEST(?))", [list(strategies)]
+    return query(f"""
+      SELECT MAX(date) AS date,
+      SUM(pnl) AS total_pnl,
+      SUM(gross_exposure) AS gross_exposure,
+      SUM(net_exposure) AS net_exposure,
+      SUM(illiquid_positions) AS illiquid_positions
+      FROM {source} s
+      WHERE date = (SELECT MAX(date) FROM {source} m) AND {where};
+    """, params, output)
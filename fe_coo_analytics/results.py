@@ -0,0 +1,101 @@
+from __future__ import annotations
+from typing import Any
+from .db import connect, cursor
+
+# pandas.DataFrame, pyarrow.Table, pyarrow.RecordBatchReader or
+# polars.DataFrame, depending on the `output` a metric was called with.
+Result = Any
+
+OUTPUTS = ("pandas", "arrow", "reader", "polars")
+
+# Low-cardinality string columns handed out dictionary-encoded in Arrow outputs.
+DICTIONARY_COLUMNS = frozenset({"strategy", "ticker", "sector", "country", "side"})
+
+READER_BATCH_ROWS = 1_000_000
+
+def _require(output: str, module: str):
+    try:
+        return __import__(module)
+    except ImportError as e:
+        raise ImportError(f"output={output!r} requires {module} (pip install {module}, or the [arrow] extra)") from e
+
+def _dictionary_encode(table):
+    """
+    Dictionary-encode DICTIONARY_COLUMNS. DuckDB exports VARCHAR as plain
+    strings, so this is a pass over each such column that builds indices and
+    a dictionary beside it: peak memory briefly holds both, per table for
+    "arrow"/"polars" and per batch for "reader"; the plain strings are freed
+    after.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    for i, field in enumerate(table.schema):
+        if field.name in DICTIONARY_COLUMNS and (
+            pa.types.is_string(field.type) or pa.types.is_large_string(field.type)
+        ):
+            table = table.set_column(i, field.name, pc.dictionary_encode(table.column(i)))
+    return table
+
+def _encoded_schema(schema):
+    import pyarrow as pa
+
+    return pa.schema([
+        f.with_type(pa.dictionary(pa.int32(), f.type))
+        if f.name in DICTIONARY_COLUMNS and (pa.types.is_string(f.type) or pa.types.is_large_string(f.type))
+        else f
+        for f in schema
+    ])
+
+def _stream(sql: str, params: list, batch_rows: int):
+    """
+    RecordBatchReader over a dedicated read-only connection, closed once the
+    reader is exhausted or garbage collected. It holds no checkout, so the
+    shared connection stays free to reopen on a new build meanwhile.
+    """
+    import pyarrow as pa
+
+    con = connect()
+    try:
+        res = con.execute(sql, params)
+        reader = (getattr(res, "to_arrow_reader", None) or res.fetch_record_batch)(batch_rows)
+    except BaseException:
+        con.close()
+        raise
+
+    def batches():
+        try:
+            for batch in reader:
+                yield from _dictionary_encode(pa.Table.from_batches([batch])).to_batches()
+        finally:
+            con.close()
+
+    return pa.RecordBatchReader.from_batches(_encoded_schema(reader.schema), batches())
+
+def query(sql: str, params: list | None = None, output: str = "pandas", batch_rows: int = READER_BATCH_ROWS) -> Result:
+    """
+    Run `sql` on the shared connection and return the result as `output`:
+
+    - "pandas": DataFrame (the default)
+    - "arrow": pyarrow.Table straight from DuckDB's Arrow export
+    - "reader": pyarrow.RecordBatchReader of `batch_rows`-row batches, streamed
+    - "polars": polars.DataFrame built from the Arrow table
+
+    Arrow outputs keep DICTIONARY_COLUMNS dictionary-encoded (Categorical in
+    polars). pyarrow and polars are imported only when asked for.
+    """
+    params = params or []
+    if output not in OUTPUTS:
+        raise ValueError(f"Unknown output {output!r}; expected one of {OUTPUTS}")
+    if output != "pandas":
+        _require(output, "pyarrow")
+    if output == "polars":
+        pl = _require(output, "polars")
+    if output == "reader":
+        return _stream(sql, params, batch_rows)
+    with cursor() as con:
+        res = con.execute(sql, params)
+        if output == "pandas":
+            return res.df()
+        table = _dictionary_encode((getattr(res, "to_arrow_table", None) or res.fetch_arrow_table)())
+    return table if output == "arrow" else pl.from_arrow(table)
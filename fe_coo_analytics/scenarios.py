@@ -0,0 +1,204 @@
+from __future__ import annotations
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import date as Date
+import numpy as np
+import pandas as pd
+from .db import cursor
+from .results import Result, query
+
+ATTRIBUTES = ("sector", "country", "currency")
+
+@dataclass
+class Book:
+    """One date's positions as a dense [strategy, ticker] matrix of market values (shares * close)."""
+    date: Date
+    strategies: list[str]
+    tickers: list[str]
+    market_value: np.ndarray
+
+@dataclass
+class ShockSet:
+    """
+    K scenarios as a [ticker, scenario] matrix of simple returns, aligned to
+    a Book's tickers. Sets concatenate with +.
+    """
+    names: list[str]
+    kinds: list[str]
+    returns: np.ndarray
+
+    def __add__(self, other: "ShockSet") -> "ShockSet":
+        return ShockSet(self.names + other.names, self.kinds + other.kinds,
+                        np.hstack([self.returns, other.returns]))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+def _checkout(con):
+    # library callers read the published snapshot; the build passes its staging connection
+    return nullcontext(con) if con is not None else cursor()
+
+def load_book(date: str | Date, con=None) -> Book:
+    """Positions held on `date` (from mart.position_intervals) marked at that day's close."""
+    with _checkout(con) as c:
+        tickers = [r[0] for r in c.execute("SELECT ticker FROM raw.security_master ORDER BY 1;").fetchall()]
+        strategies = [r[0] for r in c.execute(
+            "SELECT DISTINCT strategy FROM mart.position_intervals ORDER BY 1;"
+        ).fetchall()]
+        rows = c.execute("""
+          SELECT i.strategy, i.ticker, i.shares::DOUBLE * p.close AS market_value
+          FROM mart.position_intervals i
+          JOIN raw.prices p ON p.ticker = i.ticker AND p.date::DATE = CAST(? AS DATE)
+          WHERE CAST(? AS DATE) BETWEEN i.valid_from AND i.valid_to AND i.shares <> 0;
+        """, [date, date]).df()
+    s_idx = {s: i for i, s in enumerate(strategies)}
+    t_idx = {t: j for j, t in enumerate(tickers)}
+    mv = np.zeros((len(strategies), len(tickers)))
+    np.add.at(mv, (rows["strategy"].map(s_idx).to_numpy(), rows["ticker"].map(t_idx).to_numpy()),
+              rows["market_value"].to_numpy())
+    return Book(pd.Timestamp(date).date(), strategies, tickers, mv)
+
+def ticker_shocks(book: Book, shocks: pd.DataFrame, kind: str = "ticker") -> ShockSet:
+    """Scenarios given as rows of per-ticker returns (index = scenario name); missing tickers get 0."""
+    aligned = shocks.reindex(columns=book.tickers).fillna(0.0)
+    return ShockSet([str(n) for n in aligned.index], [kind] * len(aligned), aligned.to_numpy(dtype=float).T)
+
+def attribute_shocks(book: Book, attribute: str, shocks: pd.DataFrame, con=None) -> ShockSet:
+    """
+    Scenarios given as rows of returns per `attribute` value (sector, country
+    or currency); each ticker takes its group's shock via a one-hot map.
+    """
+    if attribute not in ATTRIBUTES:
+        raise ValueError(f"attribute must be one of {ATTRIBUTES}, got {attribute!r}")
+    with _checkout(con) as c:
+        groups = dict(c.execute(f"SELECT ticker, {attribute} FROM raw.security_master;").fetchall())
+    values = list(shocks.columns)
+    onehot = np.zeros((len(book.tickers), len(values)))
+    col = {v: k for k, v in enumerate(values)}
+    for j, t in enumerate(book.tickers):
+        if groups.get(t) in col:
+            onehot[j, col[groups[t]]] = 1.0
+    returns = onehot @ shocks.to_numpy(dtype=float).T
+    return ShockSet([str(n) for n in shocks.index], [attribute] * len(shocks), returns)
+
+def historical_shocks(book: Book, lookback: int = 250, con=None) -> ShockSet:
+    """One scenario per past price date (up to `lookback` of them): that day's close-to-close returns."""
+    with _checkout(con) as c:
+        rets = c.execute("""
+          WITH r AS (
+            SELECT date::DATE AS date, ticker,
+            close / LAG(close) OVER (PARTITION BY ticker ORDER BY date) - 1 AS ret
+            FROM raw.prices
+            WHERE date::DATE <= CAST(? AS DATE)
+          ),
+          days AS (
+            SELECT DISTINCT date FROM r WHERE ret IS NOT NULL ORDER BY date DESC LIMIT ?
+          )
+          SELECT r.date, r.ticker, r.ret FROM r JOIN days USING (date) WHERE r.ret IS NOT NULL;
+        """, [book.date, lookback]).df()
+    days = sorted(rets["date"].unique())
+    d_idx = {d: k for k, d in enumerate(days)}
+    t_idx = {t: j for j, t in enumerate(book.tickers)}
+    rets = rets[rets["ticker"].isin(t_idx)]
+    returns = np.zeros((len(book.tickers), len(days)))
+    returns[rets["ticker"].map(t_idx).to_numpy(), rets["date"].map(d_idx).to_numpy()] = rets["ret"].to_numpy()
+    names = [f"hist:{pd.Timestamp(d).date()}" for d in days]
+    return ShockSet(names, ["historical"] * len(days), returns)
+
+def standard_shocks(book: Book, con=None) -> ShockSet:
+    """Market moves, ±5/10/20% per sector, country and currency, and every historical day."""
+    moves = [-0.20, -0.10, -0.05, 0.05, 0.10, 0.20]
+    market = pd.DataFrame({t: moves for t in book.tickers}, index=[f"market:{m:+.0%}" for m in moves])
+    shocks = ticker_shocks(book, market, kind="market")
+    with _checkout(con) as c:
+        for attribute in ATTRIBUTES:
+            values = [r[0] for r in c.execute(
+                f"SELECT DISTINCT {attribute} FROM raw.security_master ORDER BY 1;"
+            ).fetchall()]
+            grid = pd.DataFrame(
+                [[m if v == hit else 0.0 for v in values] for hit in values for m in moves],
+                index=[f"{attribute}:{hit}:{m:+.0%}" for hit in values for m in moves],
+                columns=values,
+            )
+            shocks = shocks + attribute_shocks(book, attribute, grid, con=c)
+        shocks = shocks + historical_shocks(book, con=c)
+    return shocks
+
+def revalue(book: Book, shocks: ShockSet) -> pd.DataFrame:
+    """
+    Scenario PnL per strategy for every scenario at once: the [strategy,
+    ticker] market values times the [ticker, scenario] returns. Long format:
+    date, scenario, kind, strategy, pnl.
+    """
+    pnl = book.market_value @ shocks.returns
+    n_s, k = pnl.shape
+    return pd.DataFrame({
+        "date": book.date,
+        "scenario": np.tile(np.asarray(shocks.names, dtype=object), n_s),
+        "kind": np.tile(np.asarray(shocks.kinds, dtype=object), n_s),
+        "strategy": np.repeat(np.asarray(book.strategies, dtype=object), k),
+        "pnl": pnl.ravel(),
+    })
+
+def save_scenario_pnl(con, df: pd.DataFrame, replace_all: bool = False) -> int:
+    """
+    Replace mart.scenario_pnl rows for the dates in `df`, or every row with
+    `replace_all` (`con` must be read-write).
+    """
+    con.execute("CREATE SCHEMA IF NOT EXISTS mart;")
+    con.execute("""
+      CREATE TABLE IF NOT EXISTS mart.scenario_pnl (
+        date DATE, scenario VARCHAR, kind VARCHAR, strategy VARCHAR, pnl DOUBLE
+      );
+    """)
+    con.register("scenario_tmp", df)
+    try:
+        con.execute("BEGIN TRANSACTION;")
+        if replace_all:
+            con.execute("DELETE FROM mart.scenario_pnl;")
+        else:
+            con.execute("DELETE FROM mart.scenario_pnl WHERE date IN (SELECT DISTINCT date FROM scenario_tmp);")
+        con.execute("INSERT INTO mart.scenario_pnl SELECT date, scenario, kind, strategy, pnl FROM scenario_tmp;")
+        con.execute("COMMIT;")
+    except Exception:
+        con.execute("ROLLBACK;")
+        raise
+    finally:
+        con.unregister("scenario_tmp")
+    return len(df)
+
+def build_scenario_pnl(con, date: str | Date | None = None, full_refresh: bool = False) -> int:
+    """
+    Build step: revalue `date`'s book (default the latest price date) under
+    standard_shocks and save it. Earlier dates' rows are kept unless
+    `full_refresh`, since they may come from a since-replaced dataset.
+    """
+    if date is None:
+        date = con.execute("SELECT MAX(date::DATE) FROM raw.prices;").fetchone()[0]
+    book = load_book(date, con=con)
+    return save_scenario_pnl(con, revalue(book, standard_shocks(book, con=con)), replace_all=full_refresh)
+
+def scenario_pnl(
+    date: str | Date | None = None,
+    kind: str | None = None,
+    strategy: str | None = None,
+    output: str = "pandas",
+) -> Result:
+    """
+    Stored scenario PnL (latest date by default) with total_pnl summed over
+    the returned strategies, worst scenarios first.
+    """
+    where, params = ["date = COALESCE(CAST(? AS DATE), (SELECT MAX(date) FROM mart.scenario_pnl))"], [date]
+    if kind:
+        where.append("kind = ?")
+        params.append(kind)
+    if strategy:
+        where.append("strategy = ?")
+        params.append(strategy)
+    return query(f"""
+      SELECT date, scenario, kind, strategy, pnl,
+      SUM(pnl) OVER (PARTITION BY scenario) AS total_pnl
+      FROM mart.scenario_pnl
+      WHERE {' AND '.join(where)}
+      ORDER BY total_pnl, scenario, strategy;
+    """, params, output)
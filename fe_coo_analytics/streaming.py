@@ -0,0 +1,259 @@
+from __future__ import annotations
+from datetime import date as Date, datetime
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple
+import os
+import duckdb
+import numpy as np
+import pandas as pd
+from .db import connect, cursor
+
+CHECKPOINT_PATH = Path(os.getenv("FE_COO_INTRADAY_PATH", "data/intraday.duckdb"))
+
+class Trade(NamedTuple):
+    timestamp: datetime
+    strategy: str
+    ticker: str
+    side: str
+    quantity: int
+    price: float
+
+def replay_trades(
+    start: str | Date | None = None,
+    end: str | Date | None = None,
+    batch_size: int = 50_000,
+) -> Iterator[Trade]:
+    """raw.trades in timestamp order, fetched in batches so replay memory stays flat."""
+    where, params = ["TRUE"], []
+    if start:
+        where.append("trade_date >= ?")
+        params.append(start)
+    if end:
+        where.append("trade_date <= ?")
+        params.append(end)
+    # a dedicated connection rather than a checkout: the shared connection
+    # stays free to reopen on a new build while the caller consumes the replay
+    con = connect()
+    try:
+        res = con.execute(f"""
+          SELECT timestamp, strategy, ticker, side, quantity, price
+          FROM raw.trades
+          WHERE {' AND '.join(where)}
+          ORDER BY timestamp, trade_id;
+        """, params)
+        while rows := res.fetchmany(batch_size):
+            for r in rows:
+                yield Trade(*r)
+    finally:
+        con.close()
+
+def replay_parquet(path: Path | str = "data/raw/trades") -> Iterator[Trade]:
+    """Replay the Parquet landing zone directly, without the mart database."""
+    files = (Path(path).resolve() / "**" / "*.parquet").as_posix()
+    con = duckdb.connect()
+    try:
+        res = con.execute(f"""
+          SELECT timestamp, strategy, ticker, side, quantity, price
+          FROM read_parquet('{files}', hive_partitioning = true)
+          ORDER BY timestamp, trade_id;
+        """)
+        while rows := res.fetchmany(50_000):
+            for r in rows:
+                yield Trade(*r)
+    finally:
+        con.close()
+
+class IntradayEngine:
+    """
+    Running positions and PnL per (strategy, ticker), updated trade by trade.
+
+    State lives in dense [strategy, ticker] arrays: shares held, cost basis
+    (opening shares at the reference price plus today's signed trade value)
+    and the latest mark per ticker. Per-strategy pnl, gross and net exposure
+    are kept incrementally, so each event costs O(strategies) and a snapshot
+    does not touch the full grid. PnL is shares * mark - basis, measured from
+    the session's reference marks: `prev_close` for the first session, and the
+    last marks seen (the prior session's final trade prices, or any on_price
+    update) when a new trade date rolls the basis forward. To mark a later
+    session against its official close, call on_price with that close before
+    its first trade.
+    """
+
+    def __init__(
+        self,
+        strategies: list[str],
+        tickers: list[str],
+        prev_close: dict[str, float] | None = None,
+        opening_shares: pd.DataFrame | None = None,
+        checkpoint_path: Path | str | None = CHECKPOINT_PATH,
+        checkpoint_every: int = 10_000,
+    ):
+        self.strategies = list(strategies)
+        self.tickers = list(tickers)
+        self._s = {s: i for i, s in enumerate(self.strategies)}
+        self._t = {t: j for j, t in enumerate(self.tickers)}
+        n_s, n_t = len(self.strategies), len(self.tickers)
+
+        self.shares = np.zeros((n_s, n_t), dtype=np.int64)
+        self.basis = np.zeros((n_s, n_t))
+        self.marks = np.zeros(n_t)
+        for t, px in (prev_close or {}).items():
+            if t in self._t:
+                self.marks[self._t[t]] = px
+        if opening_shares is not None:
+            for s, t, q in opening_shares[["strategy", "ticker", "shares"]].itertuples(index=False):
+                if s in self._s and t in self._t:
+                    self.shares[self._s[s], self._t[t]] = q
+        self.basis[:] = self.shares * self.marks
+
+        self.pnl = np.zeros(n_s)
+        self.net = (self.shares * self.marks).sum(axis=1)
+        self.gross = np.abs(self.shares * self.marks).sum(axis=1)
+
+        self.as_of: datetime | None = None
+        self.trade_date: Date | None = None
+        self.events = 0
+        self.skipped = 0
+        self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else None
+        self.checkpoint_every = checkpoint_every
+
+    @classmethod
+    def from_mart(cls, start: str | Date, **kwargs) -> "IntradayEngine":
+        """Seed positions and marks from the mart as of the close before `start`."""
+        with cursor() as con:
+            strategies = [r[0] for r in con.execute(
+                "SELECT DISTINCT strategy FROM mart.position_intervals ORDER BY 1;"
+            ).fetchall()]
+            tickers = [r[0] for r in con.execute(
+                "SELECT ticker FROM raw.security_master ORDER BY 1;"
+            ).fetchall()]
+            prev = con.execute(
+                "SELECT MAX(date::DATE) FROM raw.prices WHERE date::DATE < ?;", [start]
+            ).fetchone()[0]
+            prev_close, opening = {}, None
+            if prev is not None:
+                prev_close = dict(con.execute(
+                    "SELECT ticker, close FROM raw.prices WHERE date::DATE = ?;", [prev]
+                ).fetchall())
+                opening = con.execute("""
+                  SELECT strategy, ticker, shares FROM mart.position_intervals
+                  WHERE ? BETWEEN valid_from AND valid_to AND shares <> 0;
+                """, [prev]).df()
+        return cls(strategies, tickers, prev_close, opening, **kwargs)
+
+    def _remark(self, j: int, price: float) -> None:
+        old = self.marks[j]
+        if price == old:
+            return
+        col = self.shares[:, j]
+        self.pnl += col * (price - old)
+        self.net += col * (price - old)
+        self.gross += np.abs(col * price) - np.abs(col * old)
+        self.marks[j] = price
+
+    def _roll(self, trade_date: Date) -> None:
+        # new session: today's PnL is measured from the last marks
+        self.basis[:] = self.shares * self.marks
+        self.pnl[:] = 0.0
+        self.trade_date = trade_date
+
+    def on_price(self, ticker: str, price: float, ts: datetime | None = None) -> None:
+        j = self._t.get(ticker)
+        if j is not None:
+            self._remark(j, price)
+            if ts is not None:
+                self.as_of = ts
+
+    def on_trade(self, trade: Trade) -> None:
+        i, j = self._s.get(trade.strategy), self._t.get(trade.ticker)
+        if i is None or j is None:
+            self.skipped += 1
+            return
+        ts = trade.timestamp
+        if ts.date() != self.trade_date:
+            self._roll(ts.date())
+        self._remark(j, trade.price)
+
+        q = trade.quantity if trade.side == "BUY" else -trade.quantity
+        old = self.shares[i, j]
+        mark = self.marks[j]
+        self.shares[i, j] = old + q
+        self.basis[i, j] += q * trade.price
+        self.pnl[i] += q * (mark - trade.price)
+        self.net[i] += q * mark
+        self.gross[i] += abs((old + q) * mark) - abs(old * mark)
+
+        self.as_of = ts
+        self.events += 1
+        if self.checkpoint_path and self.events % self.checkpoint_every == 0:
+            self.checkpoint()
+
+    def snapshot(self) -> pd.DataFrame:
+        """Per-strategy intraday pnl, gross and net exposure at the last event."""
+        return pd.DataFrame({
+            "as_of": self.as_of,
+            "strategy": self.strategies,
+            "pnl": self.pnl,
+            "gross_exposure": self.gross,
+            "net_exposure": self.net,
+        })
+
+    def positions(self) -> pd.DataFrame:
+        """Non-flat positions with their mark and intraday PnL."""
+        i, j = np.nonzero(self.shares)
+        shares = self.shares[i, j]
+        marks = self.marks[j]
+        return pd.DataFrame({
+            "as_of": self.as_of,
+            "strategy": np.asarray(self.strategies, dtype=object)[i],
+            "ticker": np.asarray(self.tickers, dtype=object)[j],
+            "shares": shares,
+            "mark": marks,
+            "pnl": shares * marks - self.basis[i, j],
+        })
+
+    def run(self, trades: Iterable[Trade], snapshot_every: str | pd.Timedelta = "5min") -> Iterator[pd.DataFrame]:
+        """
+        Consume `trades` (in time order) and yield a snapshot each time the
+        stream crosses a `snapshot_every` boundary, plus one at the end.
+        """
+        step = pd.Timedelta(snapshot_every)
+        next_emit = None
+        for trade in trades:
+            if next_emit is None or trade.timestamp >= next_emit:
+                if next_emit is not None:
+                    yield self.snapshot()
+                next_emit = pd.Timestamp(trade.timestamp).floor(step) + step
+            self.on_trade(trade)
+        if self.as_of is not None:
+            yield self.snapshot()
+        if self.checkpoint_path:
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        """Append the current snapshot and replace the stored positions in the checkpoint database."""
+        if self.checkpoint_path is None or self.as_of is None:
+            return
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        snap, pos = self.snapshot(), self.positions()
+        con = duckdb.connect(str(self.checkpoint_path))
+        try:
+            con.execute("""
+              CREATE TABLE IF NOT EXISTS intraday_snapshots (
+                as_of TIMESTAMP, strategy VARCHAR, pnl DOUBLE, gross_exposure DOUBLE, net_exposure DOUBLE
+              );
+            """)
+            con.execute("""
+              CREATE TABLE IF NOT EXISTS intraday_positions (
+                as_of TIMESTAMP, strategy VARCHAR, ticker VARCHAR, shares BIGINT, mark DOUBLE, pnl DOUBLE
+              );
+            """)
+            con.register("snap_tmp", snap)
+            con.register("pos_tmp", pos)
+            con.execute("BEGIN TRANSACTION;")
+            con.execute("INSERT INTO intraday_snapshots SELECT * FROM snap_tmp;")
+            con.execute("DELETE FROM intraday_positions;")
+            con.execute("INSERT INTO intraday_positions SELECT * FROM pos_tmp;")
+            con.execute("COMMIT;")
+        finally:
+            con.close()
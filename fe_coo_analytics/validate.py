@@ -1,7 +1,9 @@
 from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 import pandas as pd
-from .db import get_conn
+from .db import ConnectionManager, cursor
+from .var import LOOKBACK
 
 @dataclass
 class CheckResult:
@@ -10,25 +12,23 @@ class CheckResult:
     details: str = ""
 
 def check_table_exists(schema: str, table: str) -> CheckResult:
-    con = get_conn(read_only=True)
-    df = con.execute("""
-      SELECT COUNT(*) AS n
-      FROM duckdb_tables()
-      WHERE schema_name = ? AND table_name = ?;
-    """, [schema, table]).df()
-    con.close()
+    # information_schema covers views too (mart.daily_positions is one)
+    with cursor() as con:
+        df = con.execute("""
+          SELECT COUNT(*) AS n
+          FROM information_schema.tables
+          WHERE table_schema = ? AND table_name = ?;
+        """, [schema, table]).df()
     ok = int(df["n"][0]) == 1
     return CheckResult(f"exists:{schema}.{table}", ok, f"count={int(df['n'][0])}")
 
 def check_row_count(schema: str, table: str, min_rows: int = 1) -> CheckResult:
-    con = get_conn(read_only=True)
-    n = con.execute(f"SELECT COUNT(*) AS n FROM {schema}.{table};").fetchone()[0]
-    con.close()
+    with cursor() as con:
+        n = con.execute(f"SELECT COUNT(*) AS n FROM {schema}.{table};").fetchone()[0]
     ok = n >= min_rows
     return CheckResult(f"min_rows:{schema}.{table}", ok, f"rows={n}, min_rows={min_rows}")
 
 def check_unique_key(schema: str, table: str, key_cols: list[str]) -> CheckResult:
-    con = get_conn(read_only=True)
     cols = ", ".join(key_cols)
     q = f"""
       SELECT
@@ -46,7 +46,121 @@ def check_unique_key(schema: str, table: str, key_cols: list[str]) -> CheckResul
         HAVING COUNT(*) > 1
       );
     """
-    dup = con.execute(q2).fetchone()[0]
-    con.close()
+    with cursor() as con:
+        dup = con.execute(q2).fetchone()[0]
     ok = dup == 0
     return CheckResult(f"unique_key:{schema}.{table}({cols})", ok, f"dup_groups={dup}")
+
+@dataclass(frozen=True)
+class TableChecks:
+    """
+    Declarative checks for one table, compiled into a single scan.
+
+    ranges are (column, min, max) with inclusive bounds; None leaves a side open.
+    """
+    schema: str
+    table: str
+    min_rows: int = 1
+    not_null: tuple[str, ...] = ()
+    unique_key: tuple[str, ...] = ()
+    ranges: tuple[tuple[str, float | None, float | None], ...] = ()
+
+    @property
+    def name(self) -> str:
+        return f"{self.schema}.{self.table}"
+
+MART_SUITE = [
+    TableChecks("mart", "position_intervals", not_null=("shares",),
+                unique_key=("strategy", "ticker", "valid_from")),
+    TableChecks("mart", "daily_positions", unique_key=("date", "strategy", "ticker")),
+    TableChecks("mart", "daily_pnl", not_null=("pnl",), unique_key=("date", "strategy", "ticker"),
+                ranges=(("close", 0, None),)),
+    TableChecks("mart", "daily_exposures", unique_key=("date", "strategy"),
+                ranges=(("gross_exposure", 0, None),)),
+    TableChecks("mart", "daily_liquidity", unique_key=("date", "strategy", "ticker"),
+                ranges=(("days_to_liquidate", 0, None),)),
+    TableChecks("mart", "earnings_window_pnl", unique_key=("strategy", "ticker", "earnings_date")),
+    TableChecks("mart", "business_days", unique_key=("date",)),
+    TableChecks("mart", "earnings_offset_pnl", unique_key=("strategy", "ticker", "earnings_date", "day_offset"),
+                ranges=(("day_offset", -10, 10),)),
+    TableChecks("mart", "earnings_windows", unique_key=("strategy", "ticker", "earnings_date", "window_days")),
+    TableChecks("mart", "strategy_daily", unique_key=("date", "strategy"),
+                ranges=(("gross_exposure", 0, None),)),
+    TableChecks("mart", "firm_daily", unique_key=("date",)),
+    TableChecks("mart", "scenario_pnl", not_null=("pnl",), unique_key=("date", "scenario", "strategy")),
+    # a window never holds more than LOOKBACK return days
+    TableChecks("mart", "daily_var", unique_key=("date", "strategy"), ranges=(("n_obs", 0, LOOKBACK),)),
+    TableChecks("mart", "firm_var", unique_key=("date",), ranges=(("n_obs", 0, LOOKBACK),)),
+    TableChecks("mart", "realized_pnl", not_null=("realized_pnl",),
+                unique_key=("date", "strategy", "ticker", "method")),
+    TableChecks("mart", "unrealized_pnl", not_null=("unrealized_pnl",),
+                unique_key=("date", "strategy", "ticker", "method")),
+    # lot PnL must tie out to mark-to-market daily_pnl plus the fills' trading PnL
+    TableChecks("mart", "lot_pnl_reconciliation", unique_key=("date", "strategy", "ticker", "method"),
+                ranges=(("pnl_break", -0.01, 0.01),)),
+    TableChecks("mart", "top_pnl_movers"),
+    TableChecks("mart", "top_illiquid"),
+    TableChecks("mart", "top_earnings_windows"),
+]
+
+def _compile(spec: TableChecks) -> tuple[str, list]:
+    """One aggregate SELECT over the table plus a decoder for each output column."""
+    exprs = ["COUNT(*)"]
+    decoders = [lambda v, rows: CheckResult(
+        f"min_rows:{spec.name}", v >= spec.min_rows, f"rows={v}, min_rows={spec.min_rows}"
+    )]
+    for c in spec.not_null:
+        exprs.append(f"COUNT(*) - COUNT({c})")
+        decoders.append(lambda v, rows, c=c: CheckResult(f"not_null:{spec.name}.{c}", v == 0, f"nulls={v}"))
+    if spec.unique_key:
+        cols = ", ".join(spec.unique_key)
+        # row() keeps NULL keys in the count, so they group like GROUP BY does
+        exprs.append(f"COUNT(DISTINCT row({cols}))")
+        decoders.append(lambda v, rows: CheckResult(
+            f"unique_key:{spec.name}({cols})", v == rows, f"dup_rows={rows - v}"
+        ))
+    for c, lo, hi in spec.ranges:
+        bounds = [f"{c} < {lo}"] * (lo is not None) + [f"{c} > {hi}"] * (hi is not None)
+        exprs.append(f"COUNT(*) FILTER (WHERE {' OR '.join(bounds)})")
+        decoders.append(lambda v, rows, c=c, lo=lo, hi=hi: CheckResult(
+            f"range:{spec.name}.{c}", v == 0, f"out_of_range={v}, min={lo}, max={hi}"
+        ))
+    return f"SELECT {', '.join(exprs)} FROM {spec.name};", decoders
+
+def _run_table(spec: TableChecks, checkout=cursor) -> list[CheckResult]:
+    sql, decoders = _compile(spec)
+    with checkout() as con:
+        row = con.execute(sql).fetchone()
+    return [decode(v, row[0]) for decode, v in zip(decoders, row)]
+
+def run_suite(
+    suite: list[TableChecks] = MART_SUITE,
+    max_workers: int | None = None,
+    manager: ConnectionManager | None = None,
+) -> list[CheckResult]:
+    """
+    Run every table's checks in one scan per table, tables in parallel.
+    Results come back in suite order, each table's existence check first;
+    checks on a missing table are skipped. `manager` points the suite at
+    another database (e.g. a build's staging file) instead of the dashboards'.
+    """
+    checkout = manager.cursor if manager else cursor
+    with checkout() as con:
+        present = {
+            f"{s}.{t}" for s, t in con.execute(
+                "SELECT table_schema, table_name FROM information_schema.tables;"
+            ).fetchall()
+        }
+    existing = [spec for spec in suite if spec.name in present]
+    with ThreadPoolExecutor(max_workers=max_workers or len(existing) or 1) as pool:
+        scanned = dict(zip(
+            [spec.name for spec in existing],
+            pool.map(lambda spec: _run_table(spec, checkout), existing),
+        ))
+
+    results = []
+    for spec in suite:
+        ok = spec.name in present
+        results.append(CheckResult(f"exists:{spec.name}", ok, f"count={int(ok)}"))
+        results.extend(scanned.get(spec.name, []))
+    return results
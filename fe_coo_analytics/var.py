@@ -0,0 +1,116 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+LOOKBACK = 250
+MIN_OBS = 20
+CHUNK_DATES = 256
+LEVELS = (0.95, 0.99)
+
+def load_prices(con) -> tuple[list, list[str], np.ndarray]:
+    """Price dates, tickers and the [date, ticker] close matrix (NaN where a ticker has no print)."""
+    px = con.execute("""
+      SELECT date::DATE AS date, ticker, close FROM raw.prices ORDER BY date, ticker;
+    """).df()
+    closes = px.pivot(index="date", columns="ticker", values="close").sort_index()
+    return list(closes.index), list(closes.columns), closes.to_numpy()
+
+def to_returns(closes: np.ndarray) -> np.ndarray:
+    """Close-to-close returns; a missing print counts as no move, and the first date is all NaN."""
+    rets = np.full_like(closes, np.nan)
+    rets[1:] = np.nan_to_num(closes[1:] / closes[:-1] - 1.0, nan=0.0)
+    return rets
+
+def load_returns(con) -> tuple[list, list[str], np.ndarray]:
+    """Price dates, tickers and the [date, ticker] return matrix."""
+    dates, tickers, closes = load_prices(con)
+    return dates, tickers, to_returns(closes)
+
+def _shares(con, dates, tickers, strategies) -> np.ndarray:
+    """[strategy, date, ticker] shares held on `dates`, expanded from mart.position_intervals."""
+    df = con.execute("""
+      SELECT d.date, i.strategy, i.ticker, i.shares::DOUBLE AS shares
+      FROM (SELECT UNNEST(?::DATE[]) AS date) d
+      JOIN mart.position_intervals i ON d.date BETWEEN i.valid_from AND i.valid_to
+      WHERE i.shares <> 0;
+    """, [[pd.Timestamp(d).date() for d in dates]]).df()
+    d_idx = {pd.Timestamp(d): i for i, d in enumerate(dates)}
+    t_idx = {t: j for j, t in enumerate(tickers)}
+    s_idx = {s: k for k, s in enumerate(strategies)}
+    held = np.zeros((len(strategies), len(dates), len(tickers)))
+    np.add.at(held, (df["strategy"].map(s_idx).to_numpy(), pd.to_datetime(df["date"]).map(d_idx).to_numpy(),
+                     df["ticker"].map(t_idx).to_numpy()), df["shares"].to_numpy())
+    return held
+
+def _window_stats(pnl: np.ndarray, levels=LEVELS) -> dict[str, np.ndarray]:
+    """VaR/ES (as positive losses) per row of a [date, lookback] PnL matrix whose NaNs are missing days."""
+    n_obs = np.sum(~np.isnan(pnl), axis=1)
+    out = {"n_obs": n_obs}
+    ok = n_obs >= MIN_OBS
+    for level in levels:
+        tag = f"{round(level * 100):d}"
+        var = np.full(len(pnl), np.nan)
+        es = np.full(len(pnl), np.nan)
+        if ok.any():
+            w = pnl[ok]
+            q = np.nanquantile(w, 1.0 - level, axis=1)
+            tail = np.where(w <= q[:, None], w, np.nan)
+            var[ok] = -q
+            es[ok] = -np.nanmean(tail, axis=1)
+        out[f"var_{tag}"] = var
+        out[f"es_{tag}"] = es
+    return out
+
+def compute_var(con, lookback: int = LOOKBACK, chunk: int = CHUNK_DATES) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Historical-simulation VaR and ES for every price date, per strategy and
+    firm-wide: each date's book revalued under the `lookback` most recent
+    daily returns up to and including that date.
+
+    Prices are loaded once; the return matrix is padded with `lookback - 1` NaN days.
+    Dates are processed `chunk` at a time: one matrix product of the chunk's
+    market values against the returns spanning its windows gives every date's
+    PnL under every nearby return day, and each date's window is a diagonal
+    slice of that block. Work is O(dates * (chunk + lookback) * tickers)
+    rather than a query and revaluation per date.
+    """
+    dates, tickers, closes = load_prices(con)
+    returns = to_returns(closes)
+    strategies = [r[0] for r in con.execute(
+        "SELECT DISTINCT strategy FROM mart.position_intervals ORDER BY 1;"
+    ).fetchall()]
+    padded = np.vstack([np.full((lookback - 1, len(tickers)), np.nan), returns])
+
+    per_strategy, firm = [], []
+    for a in range(0, len(dates), chunk):
+        b = min(a + chunk, len(dates))
+        mv = _shares(con, dates[a:b], tickers, strategies) * np.nan_to_num(closes[a:b])
+        block = padded[a:b + lookback - 1]  # date a + i's window is rows i .. i + lookback - 1
+        rows = np.arange(b - a)
+        books = [(s, mv[k]) for k, s in enumerate(strategies)] + [(None, mv.sum(axis=0))]
+        for strategy, book in books:
+            pnl = book @ block.T
+            windows = sliding_window_view(pnl, lookback, axis=1)[rows, rows]
+            stats = pd.DataFrame({"date": dates[a:b], **_window_stats(windows)})
+            if strategy is None:
+                firm.append(stats)
+            else:
+                per_strategy.append(stats.assign(strategy=strategy))
+    cols = ["date", "n_obs"] + [f"{m}_{round(l * 100):d}" for l in LEVELS for m in ("var", "es")]
+    daily = pd.concat(per_strategy, ignore_index=True)[cols[:1] + ["strategy"] + cols[1:]]
+    return daily.sort_values(["date", "strategy"], ignore_index=True), pd.concat(firm, ignore_index=True)[cols]
+
+def build_daily_var(con, lookback: int = LOOKBACK) -> int:
+    """Build step: rewrite mart.daily_var (per strategy) and mart.firm_var (`con` must be read-write)."""
+    daily, firm = compute_var(con, lookback)
+    con.register("daily_var_tmp", daily)
+    con.register("firm_var_tmp", firm)
+    try:
+        con.execute("CREATE SCHEMA IF NOT EXISTS mart;")
+        con.execute("CREATE OR REPLACE TABLE mart.daily_var AS SELECT * FROM daily_var_tmp ORDER BY date, strategy;")
+        con.execute("CREATE OR REPLACE TABLE mart.firm_var AS SELECT * FROM firm_var_tmp ORDER BY date;")
+    finally:
+        con.unregister("daily_var_tmp")
+        con.unregister("firm_var_tmp")
+    return len(daily)
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+import re
+import time
+
+from models.incremental import run_model
+
+SQL_DIR = Path("sql")
+
+_COMMENT = re.compile(r"--[^\n]*")
+_PRODUCES = re.compile(
+    r"\b(?:TABLE|VIEW|INTO|UPDATE)\s+(?:IF\s+NOT\s+EXISTS\s+)?([a-z_][a-z0-9_]*\.[a-z_][a-z0-9_]*)",
+    re.IGNORECASE,
+)
+_CONSUMES = re.compile(r"\b(?:FROM|JOIN)\s+([a-z_][a-z0-9_]*\.[a-z_][a-z0-9_]*)", re.IGNORECASE)
+
+
+def discover_models(sql_dir: Path = SQL_DIR) -> list[str]:
+    """Numbered model files, in file-name order (which is also a valid build order)."""
+    return sorted(p.as_posix() for p in sql_dir.glob("[0-9]*.sql"))
+
+
+def parse_tables(sql: str) -> tuple[set[str], set[str]]:
+    """Schema-qualified tables a SQL script writes and reads."""
+    sql = _COMMENT.sub("", sql)
+    produces = {t.lower() for t in _PRODUCES.findall(sql)}
+    consumes = {t.lower() for t in _CONSUMES.findall(sql)} - produces
+    return produces, consumes
+
+
+def build_dag(sql_files: list[str]) -> dict[str, set[str]]:
+    """
+    Map each model to the models it depends on: a model depends on every other
+    model that produces a table it reads. Tables nobody produces (raw.*, ops.*)
+    are treated as sources.
+    """
+    tables = {}
+    for f in sql_files:
+        path = Path(f)
+        if not path.exists():
+            raise FileNotFoundError(f"Missing SQL file: {path.resolve()}")
+        tables[f] = parse_tables(path.read_text())
+
+    producer = {}
+    for f, (produces, _) in tables.items():
+        for t in produces:
+            producer[t] = f
+
+    return {
+        f: {producer[t] for t in consumes if t in producer and producer[t] != f}
+        for f, (_, consumes) in tables.items()
+    }
+
+
+def critical_path(deps: dict[str, set[str]], durations: dict[str, float]) -> tuple[list[str], float]:
+    """Longest chain of dependent models by elapsed time; it bounds wall-clock build time."""
+    finish: dict[str, float] = {}
+    via: dict[str, str | None] = {}
+
+    def visit(f: str) -> float:
+        if f not in finish:
+            upstream = [d for d in deps.get(f, ()) if d in durations]
+            prev = max(upstream, key=visit, default=None)
+            via[f] = prev
+            finish[f] = (visit(prev) if prev else 0.0) + durations[f]
+        return finish[f]
+
+    if not durations:
+        return [], 0.0
+    end = max(durations, key=visit)
+    path = [end]
+    while via[path[-1]]:
+        path.append(via[path[-1]])
+    return path[::-1], finish[end]
+
+
+def run_dag(
+    con,
+    plan: list[tuple[str, Path, bool]],
+    deps: dict[str, set[str]],
+    max_workers: int | None = None,
+    on_done=None,
+    profiles: dict[str, list] | None = None,
+) -> dict[str, float]:
+    """
+    Run planned models as soon as their upstream models finish, each on its own
+    cursor of `con` so independent models build concurrently. Calls
+    on_done(sql_file, incremental, seconds) from the calling thread as models
+    complete and returns elapsed seconds per model. The first failure stops
+    scheduling, lets running models finish and is re-raised. When a
+    `profiles` dict is given, each model runs under the profiler and its
+    operator rows are stored under its file name, tagged with the mode
+    ("incremental" or "full") whose SQL produced them.
+    """
+    todo = {f: (path, incremental) for f, path, incremental in plan}
+    waiting_on = {f: deps.get(f, set()) & set(todo) for f in todo}
+    durations: dict[str, float] = {}
+
+    def run_one(f: str, path: Path, incremental: bool) -> float:
+        cur = con.cursor()
+        try:
+            t0 = time.time()
+            run_model(cur, f, path, profiles[f] if profiles is not None else None)
+            seconds = time.time() - t0
+            if profiles is not None:
+                mode = "incremental" if incremental else "full"
+                for row in profiles[f]:
+                    row["mode"] = mode
+            return seconds
+        finally:
+            cur.close()
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(todo) or 1) as pool:
+        running = {}
+        error = None
+        while todo or running:
+            if error is None:
+                for f in [f for f in todo if not waiting_on[f]]:
+                    path, incremental = todo.pop(f)
+                    if profiles is not None:
+                        profiles[f] = []
+                    running[pool.submit(run_one, f, path, incremental)] = (f, incremental)
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                f, incremental = running.pop(fut)
+                try:
+                    durations[f] = fut.result()
+                except Exception as e:
+                    error = error or e
+                    continue
+                for other in waiting_on.values():
+                    other.discard(f)
+                if on_done:
+                    on_done(f, incremental, durations[f])
+        if error is not None:
+            raise error
+
+    return durations
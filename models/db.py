@@ -1,7 +1,10 @@
+import os
 import duckdb
 from pathlib import Path
 
-DB_PATH = Path("data/fe_coo.duckdb")
+DB_PATH = Path(os.getenv("FE_COO_DB_PATH", "data/fe_coo.duckdb"))
+# Builds write DB_PATH (staging); dashboards read the snapshot this links to.
+PUBLISHED_PATH = Path(os.getenv("FE_COO_PUBLISHED_PATH", "data/published/current.duckdb"))
 
 def get_conn(read_only: bool = False):
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
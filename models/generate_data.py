@@ -2,12 +2,17 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterable, Iterator, Sequence
 import random
+import shutil
 import string
+import tempfile
+import duckdb
 import numpy as np
 import pandas as pd
 
 from models.db import get_conn
+from models.incremental import reset_watermarks
 
 
 @dataclass(frozen=True)
@@ -21,6 +26,10 @@ class Config:
     max_shares_per_trade: int = 800
     adv_min: int = 200_000
     adv_max: int = 5_000_000
+    trade_chunk_size: int = 1_000_000
+    price_block_size: int = 2_000   # tickers per simulated price block
+    sector_corr: float = 0.0        # within-sector return correlation (0 = independent)
+    raw_as_views: bool = False      # expose raw.* as views over the Parquet files
 
 
 SECTORS = [
@@ -33,9 +42,10 @@ COUNTRIES = ["US", "UK", "DE", "FR", "JP", "CA"]
 
 def make_tickers(n: int, seed: int) -> list[str]:
     random.seed(seed)
+    k = 3 if n <= 5_000 else 4  # 26**3 symbols get crowded past a few thousand
     tickers = set()
     while len(tickers) < n:
-        t = "".join(random.choices(string.ascii_uppercase, k=3))
+        t = "".join(random.choices(string.ascii_uppercase, k=k))
         tickers.add(t)
     return sorted(tickers)
 
@@ -45,16 +55,61 @@ def trading_days(start_date: str, n_days: int) -> pd.DatetimeIndex:
     return pd.bdate_range(start=start, periods=n_days)
 
 
-def simulate_prices(days: pd.DatetimeIndex, tickers: list[str], seed: int) -> pd.DataFrame:
+def iter_price_blocks(
+    days: pd.DatetimeIndex,
+    tickers: list[str],
+    seed: int,
+    sectors: Sequence[str] | None = None,
+    sector_corr: float = 0.0,
+    block_size: int = 2_000,
+) -> Iterator[tuple[int, np.ndarray]]:
+    """
+    Yield (first_ticker_index, closes) for blocks of up to `block_size` tickers,
+    where closes is a (days x block) GBM close matrix drawn in one call.
+
+    With `sectors` (one label per ticker, e.g. security_master.sector) and a
+    `sector_corr` in (0, 1], each ticker's shocks load on a shared per-sector
+    factor, so tickers in the same sector have return correlation sector_corr.
+    Factor returns are drawn once up front, keeping them consistent across
+    blocks. Output depends on (seed, block_size).
+    """
     rng = np.random.default_rng(seed)
-    out = []
-    for t in tickers:
-        p0 = rng.uniform(20, 250)
-        vol = rng.uniform(0.008, 0.03)
-        rets = rng.normal(loc=0.0002, scale=vol, size=len(days))
-        prices = p0 * np.exp(np.cumsum(rets))
-        out.append(pd.DataFrame({"date": days, "ticker": t, "close": prices.round(2)}))
-    return pd.concat(out, ignore_index=True)
+    n_days, n_tickers = len(days), len(tickers)
+
+    factor = None
+    if sectors is not None and sector_corr > 0:
+        sector_codes, sector_names = pd.factorize(pd.Series(sectors))
+        factor = rng.standard_normal(size=(n_days, len(sector_names)))
+
+    for lo in range(0, n_tickers, block_size):
+        hi = min(lo + block_size, n_tickers)
+        p0 = rng.uniform(20, 250, size=hi - lo)
+        vol = rng.uniform(0.008, 0.03, size=hi - lo)
+        shocks = rng.standard_normal(size=(n_days, hi - lo))
+        if factor is not None:
+            shocks = np.sqrt(sector_corr) * factor[:, sector_codes[lo:hi]] + np.sqrt(1 - sector_corr) * shocks
+        rets = 0.0002 + vol * shocks
+        yield lo, (p0 * np.exp(np.cumsum(rets, axis=0))).round(2)
+
+
+def price_block_frame(days: pd.DatetimeIndex, tickers: Sequence[str], closes: np.ndarray) -> pd.DataFrame:
+    """Long (date, ticker, close) frame for a (days x tickers) close matrix, ticker-major."""
+    return pd.DataFrame({
+        "date": np.tile(days.values, len(tickers)),
+        "ticker": np.repeat(np.asarray(tickers, dtype=object), len(days)),
+        "close": closes.T.ravel(),
+    })
+
+
+def simulate_prices(
+    days: pd.DatetimeIndex,
+    tickers: list[str],
+    seed: int,
+    sectors: Sequence[str] | None = None,
+    sector_corr: float = 0.0,
+) -> pd.DataFrame:
+    _, closes = next(iter_price_blocks(days, tickers, seed, sectors, sector_corr, block_size=max(1, len(tickers))))
+    return price_block_frame(days, tickers, closes)
 
 
 def security_master(tickers: list[str], seed: int) -> pd.DataFrame:
@@ -95,109 +150,205 @@ def earnings_calendar(days: pd.DatetimeIndex, tickers: list[str], seed: int) ->
     earnings_dates = [days[i] for i in earnings_idx]
     return pd.DataFrame({"ticker": tickers, "earnings_date": pd.to_datetime(earnings_dates)})
 
-def generate_trades(
+def close_matrix(prices: pd.DataFrame, days: pd.DatetimeIndex, tickers: list[str]) -> np.ndarray:
+    """(days x tickers) close matrix from a long (date, ticker, close) frame."""
+    return (
+        prices.pivot(index="date", columns="ticker", values="close")
+        .reindex(index=days, columns=tickers)
+        .to_numpy()
+    )
+
+
+def iter_trade_chunks(
     days: pd.DatetimeIndex,
-    prices: pd.DataFrame,
+    prices: pd.DataFrame | np.ndarray,
     tickers: list[str],
     strategies: tuple[str, ...],
     n_trades: int,
     max_shares: int,
     seed: int,
-) -> pd.DataFrame:
+    chunk_size: int = 1_000_000,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield synthetic trades in chunks of at most `chunk_size` rows, so peak memory
+    is bounded by the chunk size rather than by `n_trades`. Everything is drawn
+    as integer indices and resolved with array lookups: timestamps are
+    datetime64 arithmetic on the trading-day array and trade prices come from a
+    (day x ticker) close matrix, which `prices` may already be. Big trades are
+    drawn once over the whole series, so their count and trade_ids do not
+    depend on `chunk_size`.
+    """
     rng = np.random.default_rng(seed + 4)
+    # a few big trades (realistic spikes), as sorted global row indices
+    big = np.sort(np.random.default_rng(seed + 5).choice(
+        n_trades, size=min(n_trades, max(8, n_trades // 300)), replace=False))
+
+    day_values = days.values.astype("datetime64[ns]")
+    ticker_arr = np.asarray(tickers, dtype=object)
+    strat_arr = np.asarray(strategies, dtype=object)
+    side_arr = np.asarray(["BUY", "SELL"], dtype=object)
+    close = close_matrix(prices, days, tickers) if isinstance(prices, pd.DataFrame) else prices
+
+    for start in range(0, n_trades, chunk_size):
+        n = min(chunk_size, n_trades - start)
+
+        # random business day, and minute during market-ish hours (09:35 to 15:55)
+        day_idx = rng.integers(low=0, high=len(days), size=n)
+        minute_of_day = rng.integers(low=9 * 60 + 35, high=15 * 60 + 55, size=n)
+        trade_date = day_values[day_idx]
+        timestamps = trade_date + minute_of_day.astype("timedelta64[m]")
+
+        tick_idx = rng.integers(low=0, high=len(tickers), size=n)
+        strat_idx = rng.integers(low=0, high=len(strategies), size=n)
+        side_idx = (rng.random(size=n) >= 0.52).astype(np.int8)  # 52% BUY
+        qty = rng.integers(low=10, high=max_shares, size=n)
+
+        # anchor trade price on that day's close, with small noise (~0.25%)
+        noise = rng.normal(loc=0.0, scale=0.0025, size=n)
+        trade_px = (close[day_idx, tick_idx] * (1 + noise)).round(2)
+
+        lo, hi = np.searchsorted(big, [start, start + n])
+        qty[big[lo:hi] - start] *= 6
+
+        yield pd.DataFrame(
+            {
+                "trade_id": np.arange(start + 1, start + n + 1),
+                "timestamp": timestamps,
+                "trade_date": trade_date,
+                "strategy": strat_arr[strat_idx],
+                "ticker": ticker_arr[tick_idx],
+                "side": side_arr[side_idx],
+                "quantity": qty,
+                "price": trade_px,
+            }
+        )
 
-    # pick random business days
-    day_choices = rng.choice(days.values, size=n_trades, replace=True)
-
-    # random minute during market-ish hours (09:35 to 15:55)
-    minute_of_day = rng.integers(low=9 * 60 + 35, high=15 * 60 + 55, size=n_trades)
-
-    # IMPORTANT: convert numpy datetime64 safely -> pandas Timestamp, normalize to midnight
-    timestamps = [
-        pd.Timestamp(d).normalize() + pd.Timedelta(minutes=int(m))
-        for d, m in zip(day_choices, minute_of_day)
-    ]
-
-    tick = rng.choice(tickers, size=n_trades, replace=True)
-    strat = rng.choice(list(strategies), size=n_trades, replace=True)
-
-    side = rng.choice(["BUY", "SELL"], size=n_trades, replace=True, p=[0.52, 0.48])
-    qty = rng.integers(low=10, high=max_shares, size=n_trades)
-
-    trade_date = pd.to_datetime([ts.date() for ts in timestamps])
-
-    # join to the close price for that day to anchor trade price
-    prices_key = prices.rename(columns={"date": "trade_date"})[["trade_date", "ticker", "close"]]
-    base = pd.DataFrame({"trade_date": trade_date, "ticker": tick}).merge(
-        prices_key, on=["trade_date", "ticker"], how="left"
-    )
 
-    # small noise around close
-    noise = rng.normal(loc=0.0, scale=0.0025, size=n_trades)  # ~0.25%
-    trade_px = (base["close"].values * (1 + noise)).round(2)
-
-    df = pd.DataFrame(
-        {
-            "trade_id": np.arange(1, n_trades + 1),
-            "timestamp": pd.to_datetime(timestamps),
-            "trade_date": trade_date,
-            "strategy": strat,
-            "ticker": tick,
-            "side": side,
-            "quantity": qty,
-            "price": trade_px,
-        }
+def generate_trades(
+    days: pd.DatetimeIndex,
+    prices: pd.DataFrame | np.ndarray,
+    tickers: list[str],
+    strategies: tuple[str, ...],
+    n_trades: int,
+    max_shares: int,
+    seed: int,
+) -> pd.DataFrame:
+    return pd.concat(
+        iter_trade_chunks(days, prices, tickers, strategies, n_trades, max_shares, seed),
+        ignore_index=True,
     )
 
-    # add a few big trades (realistic spikes)
-    big_idx = rng.choice(df.index, size=max(8, n_trades // 300), replace=False)
-    df.loc[big_idx, "quantity"] = df.loc[big_idx, "quantity"] * 6
-
-    return df
-
 
-
-
-def write_csvs(out_dir: Path, **tables: pd.DataFrame) -> None:
-    out_dir.mkdir(parents=True, exist_ok=True)
-    for name, df in tables.items():
-        df.to_csv(out_dir / f"{name}.csv", index=False)
-
-
-def load_to_duckdb(**tables: pd.DataFrame) -> None:
+RAW_DIR = Path("data/raw")
+
+# Hive partition column of each partitioned raw table, and the column order
+# to restore on load (read_parquet appends partition columns at the end).
+RAW_PARTITIONS = {"trades": "trade_date", "prices": "date"}
+RAW_COLUMNS = {
+    "trades": ["trade_id", "timestamp", "trade_date", "strategy", "ticker", "side", "quantity", "price"],
+    "prices": ["date", "ticker", "close"],
+}
+
+
+def write_parquet(out_dir: Path, name: str, chunks: Iterable[pd.DataFrame]) -> int:
+    """
+    Write chunks as Parquet under out_dir/<name>/, hive-partitioned by
+    RAW_PARTITIONS[name] when set. Chunks are appended to a scratch DuckDB
+    file first (which spills to disk, so memory stays bounded by the chunk
+    size) and copied out in one pass: one file per partition, however many
+    chunks there were.
+    """
+    target = out_dir / name
+    if target.exists():
+        shutil.rmtree(target)
+    target.mkdir(parents=True)
+    part = RAW_PARTITIONS.get(name)
+
+    with tempfile.TemporaryDirectory(dir=out_dir) as scratch:
+        con = duckdb.connect(str(Path(scratch) / "stage.duckdb"))
+        n = 0
+        for chunk in chunks:
+            con.register("df_tmp", chunk)
+            if n:
+                con.execute("INSERT INTO stage SELECT * FROM df_tmp;")
+            else:
+                con.execute("CREATE TABLE stage AS SELECT * FROM df_tmp;")
+            con.unregister("df_tmp")
+            n += len(chunk)
+        if n and part:
+            con.execute(f"""
+                COPY (SELECT * REPLACE ({part}::DATE AS {part}) FROM stage) TO '{target.as_posix()}'
+                (FORMAT PARQUET, PARTITION_BY ({part}), OVERWRITE_OR_IGNORE);
+            """)
+        elif n:
+            con.execute(f"COPY stage TO '{(target / 'data_0.parquet').as_posix()}' (FORMAT PARQUET);")
+        con.close()
+    return n
+
+
+def load_raw_parquet(raw_dir: Path = RAW_DIR, as_views: bool = False) -> None:
+    """
+    (Re)create raw.* from the Parquet landing zone with read_parquet, so data
+    goes file -> DuckDB without a pandas copy. With as_views, raw.* become
+    views over the (absolute) file paths instead of materialized tables.
+    """
     con = get_conn()
     con.execute("CREATE SCHEMA IF NOT EXISTS raw;")
-    for name, df in tables.items():
-        con.execute(f"DROP TABLE IF EXISTS raw.{name};")
-        con.register("df_tmp", df)
-        con.execute(f"CREATE TABLE raw.{name} AS SELECT * FROM df_tmp;")
-        con.unregister("df_tmp")
+    for table_dir in sorted(p for p in raw_dir.iterdir() if p.is_dir()):
+        name = table_dir.name
+        existing = con.execute(
+            "SELECT table_type FROM information_schema.tables WHERE table_schema = 'raw' AND table_name = ?;",
+            [name],
+        ).fetchone()
+        if existing:
+            con.execute(f"DROP {'VIEW' if existing[0] == 'VIEW' else 'TABLE'} raw.{name};")
+
+        files = (table_dir.resolve() / "**" / "*.parquet").as_posix()
+        hive = "true" if name in RAW_PARTITIONS else "false"
+        cols = ", ".join(RAW_COLUMNS.get(name, ["*"]))
+        kind = "VIEW" if as_views else "TABLE"
+        con.execute(f"CREATE {kind} raw.{name} AS SELECT {cols} FROM read_parquet('{files}', hive_partitioning = {hive});")
+    # raw was replaced wholesale, so stored high-water marks no longer apply
+    reset_watermarks(con)
     con.close()
 
 
-def main() -> None:
-    cfg = Config()
+def write_raw(cfg: Config, raw_dir: Path = RAW_DIR) -> dict[str, int]:
+    """Simulate every raw table for `cfg` into the Parquet landing zone; returns rows per table."""
     days = trading_days(cfg.start_date, cfg.n_days)
     tickers = make_tickers(cfg.n_tickers, cfg.seed)
 
-    prices = simulate_prices(days, tickers, cfg.seed)
     sec = security_master(tickers, cfg.seed)
     liq = liquidity_table(tickers, cfg.seed, cfg.adv_min, cfg.adv_max)
     earn = earnings_calendar(days, tickers, cfg.seed)
-    trades = generate_trades(days, prices, tickers, cfg.strategies, cfg.n_trades, cfg.max_shares_per_trade, cfg.seed)
-
-    write_csvs(Path("data/raw"),
-               prices=prices,
-               security_master=sec,
-               liquidity=liq,
-               earnings_calendar=earn,
-               trades=trades)
-
-    load_to_duckdb(prices=prices,
-                   security_master=sec,
-                   liquidity=liq,
-                   earnings_calendar=earn,
-                   trades=trades)
+
+    rows = {
+        "security_master": write_parquet(raw_dir, "security_master", [sec]),
+        "liquidity": write_parquet(raw_dir, "liquidity", [liq]),
+        "earnings_calendar": write_parquet(raw_dir, "earnings_calendar", [earn]),
+    }
+
+    # prices stream in ticker blocks; keep only the compact close matrix for trades
+    close = np.empty((len(days), len(tickers)))
+
+    def price_frames() -> Iterator[pd.DataFrame]:
+        for lo, block in iter_price_blocks(days, tickers, cfg.seed, sec["sector"], cfg.sector_corr,
+                                           cfg.price_block_size):
+            close[:, lo:lo + block.shape[1]] = block
+            yield price_block_frame(days, tickers[lo:lo + block.shape[1]], block)
+
+    rows["prices"] = write_parquet(raw_dir, "prices", price_frames())
+
+    trades = iter_trade_chunks(days, close, tickers, cfg.strategies, cfg.n_trades,
+                               cfg.max_shares_per_trade, cfg.seed, cfg.trade_chunk_size)
+    rows["trades"] = write_parquet(raw_dir, "trades", trades)
+    return rows
+
+
+def main(cfg: Config | None = None, raw_dir: Path = RAW_DIR) -> None:
+    cfg = cfg or Config()
+    write_raw(cfg, raw_dir)
+    load_raw_parquet(raw_dir, as_views=cfg.raw_as_views)
 
     con = get_conn(read_only=True)
     print("Loaded raw tables (schema raw):")
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+from models.profiling import execute_profiled
+
+INCREMENTAL_DIR = Path("sql/incremental")
+
+# Date-grained table each watermarked model materializes. These models have a
+# file of the same name in sql/incremental/ that appends from the stored
+# high-water mark; every other model is always rebuilt in full.
+MODEL_TABLES = {
+    "sql/01_daily_positions.sql": "mart.position_intervals",
+    "sql/02_daily_pnl.sql": "mart.daily_pnl",
+    "sql/03_exposures.sql": "mart.daily_exposures",
+    "sql/04_liquidity.sql": "mart.daily_liquidity",
+    "sql/06_rollups.sql": "mart.strategy_daily",
+}
+
+# Column holding the last date a watermarked table covers, where it isn't `date`.
+WATERMARK_COLUMNS = {
+    "mart.position_intervals": "valid_to",
+}
+
+# Objects that changed type between releases: (name, old table_type). They are
+# dropped once so the model that now owns the name can recreate it.
+LEGACY_OBJECTS = [
+    ("mart.daily_positions", "BASE TABLE"),  # dense grid, now a view over position_intervals
+]
+
+
+def ensure_watermark_table(con) -> None:
+    con.execute("CREATE SCHEMA IF NOT EXISTS ops;")
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ops.model_watermarks (
+            model VARCHAR,
+            high_water_date DATE,
+            updated_ts TIMESTAMP
+        );
+        """
+    )
+
+
+def reset_watermarks(con) -> None:
+    """
+    Forget all high-water marks so the next build is a full rebuild.
+    Called whenever raw.* is replaced wholesale.
+    """
+    ensure_watermark_table(con)
+    con.execute("DELETE FROM ops.model_watermarks;")
+
+
+def get_watermark(con, table: str):
+    row = con.execute(
+        "SELECT high_water_date FROM ops.model_watermarks WHERE model = ?;", [table]
+    ).fetchone()
+    return row[0] if row else None
+
+
+def set_watermark(con, table: str) -> None:
+    col = WATERMARK_COLUMNS.get(table, "date")
+    con.execute("DELETE FROM ops.model_watermarks WHERE model = ?;", [table])
+    con.execute(
+        f"""
+        INSERT INTO ops.model_watermarks (model, high_water_date, updated_ts)
+        SELECT ?, MAX({col})::DATE, ? FROM {table};
+        """,
+        [table, datetime.now(timezone.utc)],
+    )
+
+
+def table_exists(con, table: str) -> bool:
+    schema, name = table.split(".")
+    n = con.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = ? AND table_name = ?;",
+        [schema, name],
+    ).fetchone()[0]
+    return n > 0
+
+
+def drop_legacy_objects(con) -> None:
+    for name, table_type in LEGACY_OBJECTS:
+        schema, table = name.split(".")
+        row = con.execute(
+            "SELECT table_type FROM information_schema.tables WHERE table_schema = ? AND table_name = ?;",
+            [schema, table],
+        ).fetchone()
+        if row and row[0] == table_type:
+            con.execute(f"DROP {'VIEW' if table_type == 'VIEW' else 'TABLE'} {name};")
+            con.execute("DELETE FROM ops.model_watermarks WHERE model = ?;", [name])
+
+
+def plan_models(
+    con,
+    sql_files: list[str],
+    full_refresh: bool = False,
+    deps: dict[str, set[str]] | None = None,
+) -> list[tuple[str, Path, bool]]:
+    """
+    Decide per model whether to run its incremental SQL or a full rebuild.
+
+    Returns (sql_file, path_to_run, incremental) tuples in input order. A model
+    falls back to a full rebuild when it has no incremental SQL, no stored
+    watermark or no existing table. A fully rebuilt model forces a full rebuild
+    of everything downstream of it (per `deps`, or everything after it in list
+    order without one), so marts never mix old and new upstream state.
+    """
+    plan = []
+    full = set()
+    for i, f in enumerate(sql_files):
+        upstream = deps.get(f, set()) if deps is not None else set(sql_files[:i])
+        table = MODEL_TABLES.get(f)
+        inc_path = INCREMENTAL_DIR / Path(f).name
+        incremental = (
+            not full_refresh
+            and not (upstream & full)
+            and table is not None
+            and inc_path.exists()
+            and table_exists(con, table)
+            and get_watermark(con, table) is not None
+        )
+        if not incremental:
+            full.add(f)
+        plan.append((f, inc_path if incremental else Path(f), incremental))
+    return plan
+
+
+def run_model(con, sql_file: str, path: Path, profile: list | None = None) -> None:
+    """
+    Run one model and advance its watermark in a single transaction. When a
+    `profile` list is given, statements run one at a time under DuckDB's
+    profiler and their operator rows are appended to it.
+    """
+    if not path.exists():
+        raise FileNotFoundError(f"Missing SQL file: {path.resolve()}")
+    sql = path.read_text()
+    table = MODEL_TABLES.get(sql_file)
+    con.execute("BEGIN TRANSACTION;")
+    try:
+        if profile is None:
+            con.execute(sql)
+        else:
+            profile.extend(execute_profiled(con, sql))
+        if table is not None:
+            set_watermark(con, table)
+        con.execute("COMMIT;")
+    except Exception:
+        con.execute("ROLLBACK;")
+        raise
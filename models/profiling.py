@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+import json
+
+import pandas as pd
+
+PROFILE_COLUMNS = [
+    "run_id", "run_ts", "model", "mode", "statement", "statement_sql",
+    "query_seconds", "query_peak_memory_bytes",
+    "operator_id", "parent_id", "depth", "operator_name",
+    "operator_seconds", "cardinality", "rows_scanned", "extra_info",
+]
+
+
+def ensure_profile_table(con) -> None:
+    con.execute("CREATE SCHEMA IF NOT EXISTS ops;")
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ops.model_profiles (
+            run_id VARCHAR,
+            run_ts TIMESTAMP,
+            model VARCHAR,
+            mode VARCHAR,
+            statement INTEGER,
+            statement_sql VARCHAR,
+            query_seconds DOUBLE,
+            query_peak_memory_bytes BIGINT,
+            operator_id INTEGER,
+            parent_id INTEGER,
+            depth INTEGER,
+            operator_name VARCHAR,
+            operator_seconds DOUBLE,
+            cardinality BIGINT,
+            rows_scanned BIGINT,
+            extra_info VARCHAR
+        );
+        """
+    )
+    # incremental and full runs of a model execute different SQL, so their plans aren't comparable
+    con.execute("ALTER TABLE ops.model_profiles ADD COLUMN IF NOT EXISTS mode VARCHAR;")
+
+
+def flatten_profile(profile: dict, statement: int) -> list[dict]:
+    """
+    One row per operator of a DuckDB JSON profile, pre-order, with parent
+    links so the plan tree can be rebuilt. Statements without a plan (DROP,
+    SET, ...) produce no rows.
+    """
+    sql = (profile.get("query_name") or "").strip()
+    query = {
+        "statement": statement,
+        "statement_sql": sql,
+        "query_seconds": profile.get("latency"),
+        "query_peak_memory_bytes": profile.get("system_peak_buffer_memory"),
+    }
+    rows: list[dict] = []
+
+    def walk(node: dict, parent: int | None, depth: int) -> None:
+        op_id = len(rows)
+        rows.append({
+            **query,
+            "operator_id": op_id,
+            "parent_id": parent,
+            "depth": depth,
+            "operator_name": node.get("operator_name") or node.get("operator_type"),
+            "operator_seconds": node.get("operator_timing", 0.0),
+            "cardinality": node.get("operator_cardinality", 0),
+            "rows_scanned": node.get("operator_rows_scanned", 0),
+            "extra_info": json.dumps(node.get("extra_info") or {}),
+        })
+        for child in node.get("children", []):
+            walk(child, op_id, depth + 1)
+
+    for root in profile.get("children", []):
+        walk(root, None, 0)
+    return rows
+
+
+def execute_profiled(con, sql: str) -> list[dict]:
+    """
+    Run a SQL script statement by statement with profiling on for `con`
+    (a cursor, so concurrent models don't share profiler state) and return
+    the flattened operator rows of every statement.
+    """
+    rows: list[dict] = []
+    con.execute("SET enable_profiling = 'no_output';")
+    try:
+        for i, stmt in enumerate(con.extract_statements(sql)):
+            con.execute(stmt)
+            rows.extend(flatten_profile(json.loads(con.get_profiling_information(format="json")), i))
+    finally:
+        con.execute("RESET enable_profiling;")
+    return rows
+
+
+def save_profiles(con, run_id: str, profiles: dict[str, list[dict]]) -> int:
+    """
+    Append every model's operator rows to ops.model_profiles under `run_id`.
+    Rows carry the `mode` ("incremental" or "full") run_dag tagged them with.
+    """
+    ensure_profile_table(con)
+    run_ts = datetime.now(timezone.utc)
+    records = [
+        {"run_id": run_id, "run_ts": run_ts, "model": model, "mode": None, **row}
+        for model, rows in profiles.items()
+        for row in rows
+    ]
+    if not records:
+        return 0
+    df = pd.DataFrame(records, columns=PROFILE_COLUMNS)
+    con.register("profiles_tmp", df)
+    try:
+        con.execute("INSERT INTO ops.model_profiles BY NAME SELECT * FROM profiles_tmp;")
+    finally:
+        con.unregister("profiles_tmp")
+    return len(df)
@@ -0,0 +1,116 @@
+"""
+Publish the staging database as the dashboards' read snapshot.
+
+Every publish copies the whole staging file (shutil.copyfile), so its cost
+grows with the database, not with what the build changed: about 0.03s for the
+64 MB medium benchmark build with the file in page cache, and roughly disk
+bandwidth beyond that. The benchmark times it as the "publish" stage.
+
+Every run also records its outcome in last_run.json beside the snapshots
+(write_run_status), because a failed build never publishes and its
+ops.pipeline_runs row stays in staging.
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timezone
+import json
+import os
+from pathlib import Path
+import shutil
+import uuid
+
+import duckdb
+
+from fe_coo_analytics.db import RUN_STATUS_PATH
+import models.db as db
+
+KEEP_SNAPSHOTS = 3
+
+
+def snapshot_path(published: Path, run_id: str) -> Path:
+    return published.parent / f"fe_coo-{run_id}.duckdb"
+
+
+def snapshots(published: Path) -> list[Path]:
+    """Published snapshot files, oldest first."""
+    return sorted(published.parent.glob("fe_coo-*.duckdb"), key=lambda p: p.stat().st_mtime_ns)
+
+
+def run_status_path(published: Path) -> Path:
+    return published.parent / RUN_STATUS_PATH.name
+
+
+def write_run_status(record: dict, published: Path | None = None) -> Path:
+    """Atomically replace the latest-run status file beside the published snapshots."""
+    published = Path(published or db.PUBLISHED_PATH)
+    published.parent.mkdir(parents=True, exist_ok=True)
+    path = run_status_path(published)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp.write_text(json.dumps(record, default=str))
+    os.replace(tmp, path)
+    return path
+
+
+def publish(
+    run_id: str,
+    staging: Path | None = None,
+    published: Path | None = None,
+    keep: int = KEEP_SNAPSHOTS,
+) -> Path:
+    """
+    Copy the staging database to a versioned snapshot and atomically re-point
+    the `published` symlink at it; readers switch on their next checkout.
+    Keeps the `keep` newest snapshots. The staging database must not be open
+    read-write anywhere else while this runs.
+    """
+    staging = Path(staging or db.DB_PATH)
+    published = Path(published or db.PUBLISHED_PATH)
+    published.parent.mkdir(parents=True, exist_ok=True)
+
+    # fold the WAL into the main file so the copy is the complete database
+    con = duckdb.connect(str(staging))
+    try:
+        con.execute("CHECKPOINT;")
+    finally:
+        con.close()
+
+    target = snapshot_path(published, run_id)
+    tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+    shutil.copyfile(staging, tmp)
+    os.replace(tmp, target)
+
+    # rename over the old link: readers see either the old or the new snapshot
+    link = published.with_name(f".{published.name}.{uuid.uuid4().hex}")
+    os.symlink(target.name, link)
+    os.replace(link, published)
+
+    # open connections keep reading unlinked snapshots until they reopen
+    for old in snapshots(published)[:-keep or None]:
+        if old != target:
+            old.unlink(missing_ok=True)
+    return target
+
+
+def main(run_id: str | None = None, check: bool = True) -> None:
+    from fe_coo_analytics.db import ConnectionManager
+    from fe_coo_analytics.validate import MART_SUITE, run_suite
+
+    run_id = run_id or f"manual-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}"
+    if check:
+        staging = ConnectionManager(db.DB_PATH, idle_seconds=0)
+        try:
+            failed = [c for c in run_suite(MART_SUITE, manager=staging) if not c.passed]
+        finally:
+            staging.close()
+        if failed:
+            raise SystemExit(f"DQ checks failed, not publishing: {failed}")
+    print(f"Published {publish(run_id)} as {db.PUBLISHED_PATH}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish the staging database as the dashboards' read snapshot.")
+    parser.add_argument("--run-id", default=None)
+    parser.add_argument("--skip-checks", action="store_true", help="publish without running the DQ suite")
+    args = parser.parse_args()
+    main(run_id=args.run_id, check=not args.skip_checks)
@@ -1,25 +1,98 @@
-from pathlib import Path
+import argparse
+from datetime import datetime, timezone
+import time
+
+from models.dag import build_dag, critical_path, discover_models, run_dag
 from models.db import get_conn
+from models.incremental import drop_legacy_objects, ensure_watermark_table, plan_models
+from models.profiling import save_profiles
+from models.publish import main as publish_main
+from fe_coo_analytics.lots import build_lot_pnl
+from fe_coo_analytics.scenarios import build_scenario_pnl
+from fe_coo_analytics.var import build_daily_var
+from models.shard import run_sharded
+
+SQL_FILES = discover_models()
 
-SQL_FILES = [
-    "sql/01_daily_positions.sql",
-    "sql/02_daily_pnl.sql",
-    "sql/03_exposures.sql",
-    "sql/04_liquidity.sql",
-    "sql/05_earnings_window.sql",
-]
+# Marts computed in Python on top of the SQL models, in build order. Each
+# builder takes (con, full_refresh) and returns the rows it wrote.
+PYTHON_MODELS = {
+    "scenario_pnl": lambda con, full_refresh: build_scenario_pnl(con, full_refresh=full_refresh),
+    "daily_var": lambda con, full_refresh: build_daily_var(con),
+    "lot_pnl": lambda con, full_refresh: build_lot_pnl(con),
+}
 
-def main() -> None:
+def run_python_models(con, full_refresh: bool = False) -> dict[str, float]:
+    """Build PYTHON_MODELS on `con`; returns elapsed seconds per model."""
+    durations = {}
+    for name, build in PYTHON_MODELS.items():
+        t0 = time.time()
+        rows = build(con, full_refresh)
+        durations[name] = time.time() - t0
+        print(f"Ran: {name} ({rows} rows, {durations[name]:.3f}s)")
+    return durations
+
+def main(
+    full_refresh: bool = False,
+    max_workers: int | None = None,
+    profile: bool = False,
+    shards: int | None = None,
+    publish: bool = False,
+) -> None:
     con = get_conn()
-    for f in SQL_FILES:
-        path = Path(f)
-        if not path.exists():
-            raise FileNotFoundError(f"Missing SQL file: {path.resolve()}")
-        sql = path.read_text()
-        con.execute(sql)
-        print(f"Ran: {f}")
-    con.close()
+    ensure_watermark_table(con)
+    drop_legacy_objects(con)
+    deps = build_dag(SQL_FILES)
+
+    def report(f, incremental, seconds):
+        print(f"Ran: {f} ({'incremental' if incremental else 'full'}, {seconds:.3f}s)")
+
+    if shards:
+        # always a full build; shard workers attach the database read-only
+        con.close()
+        durations = run_sharded(SQL_FILES, shards, max_workers=max_workers, on_done=report)
+        print(f"Merged {shards} shards in {durations.pop('merge'):.3f}s")
+        path, total = critical_path(deps, durations)
+        print(f"Critical path ({total:.3f}s): {' -> '.join(path)}")
+        con = get_conn()
+        try:
+            run_python_models(con, full_refresh=True)
+        finally:
+            con.close()
+        print("Done. Models built in schema: mart")
+        if publish:
+            publish_main()
+        return
+
+    plan = plan_models(con, SQL_FILES, full_refresh, deps)
+
+    profiles = {} if profile else None
+    try:
+        durations = run_dag(con, plan, deps, max_workers, on_done=report, profiles=profiles)
+        if profiles:
+            run_id = f"manual-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}"
+            print(f"Saved {save_profiles(con, run_id, profiles)} operator profiles as {run_id}")
+        run_python_models(con, full_refresh=full_refresh)
+    finally:
+        con.close()
+    path, total = critical_path(deps, durations)
+    print(f"Critical path ({total:.3f}s): {' -> '.join(path)}")
     print("Done. Models built in schema: mart")
+    if publish:
+        publish_main()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--full-refresh", action="store_true", help="rebuild every model from scratch")
+    parser.add_argument("--max-workers", type=int, default=None, help="models to build concurrently")
+    parser.add_argument("--profile", action="store_true", help="record per-operator timings in ops.model_profiles")
+    parser.add_argument("--shards", type=int, default=None, help="full build with ticker shards in N processes")
+    parser.add_argument("--publish", action="store_true", help="run DQ checks and publish a dashboard snapshot")
+    args = parser.parse_args()
+    main(
+        full_refresh=args.full_refresh,
+        max_workers=args.max_workers,
+        profile=args.profile,
+        shards=args.shards,
+        publish=args.publish,
+    )
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+from pathlib import Path
+import shutil
+import time
+
+import duckdb
+
+import models.db as db
+from models.dag import build_dag, run_dag
+from models.incremental import MODEL_TABLES, plan_models, set_watermark
+
+SHARD_DIR = Path("data/shards")
+
+# Models whose output is partitioned by ticker (exposures by summing over it),
+# so each shard can build them from its own slice of raw.*.
+SHARD_MODELS = [
+    "sql/01_daily_positions.sql",
+    "sql/02_daily_pnl.sql",
+    "sql/03_exposures.sql",
+    "sql/04_liquidity.sql",
+]
+
+# A shard's raw.trades holds only its tickers, but the per-strategy grids of
+# 02/03/04 must still cover every strategy (shard-local strategy sets would
+# leave gaps after the merge), so mart.strategies reads the full table.
+SHARD_STRATEGIES_SQL = "CREATE OR REPLACE VIEW mart.strategies AS SELECT DISTINCT strategy FROM src.raw.trades;"
+
+# Raw tables a shard sees, filtered to its tickers. earnings_calendar is only
+# read by later, unsharded models.
+SHARD_RAW_TABLES = ["trades", "prices", "security_master", "liquidity"]
+
+# How each shard table is combined into mart; {shards} is the UNION ALL of
+# every shard's copy. Exposures are per (date, strategy), so shards hold
+# partial sums that are re-aggregated here.
+MERGE_SQL = {
+    "mart.position_intervals": "SELECT * FROM {shards} ORDER BY valid_from, strategy, ticker",
+    "mart.daily_pnl": "SELECT * FROM {shards} ORDER BY date, strategy, ticker",
+    "mart.daily_exposures": """
+        SELECT date, strategy, SUM(gross_exposure) AS gross_exposure, SUM(net_exposure) AS net_exposure
+        FROM {shards}
+        GROUP BY date, strategy
+        ORDER BY date, strategy
+    """,
+    "mart.daily_liquidity": "SELECT * FROM {shards} ORDER BY date, strategy, ticker",
+}
+
+
+def shard_path(shard_dir: Path, shard: int) -> Path:
+    return shard_dir / f"shard_{shard:03d}.duckdb"
+
+
+def build_shard(shard: int, n_shards: int, main_db: str, shard_dir: str, threads: int) -> tuple[str, dict]:
+    """
+    Worker: build SHARD_MODELS for tickers with hash(ticker) % n_shards = shard
+    into a DuckDB file of its own, reading raw.* from the main database
+    attached read-only. Returns the shard file path and seconds per model.
+    """
+    path = shard_path(Path(shard_dir), shard)
+    durations = {}
+    con = duckdb.connect(str(path))
+    try:
+        con.execute(f"SET threads = {threads};")
+        con.execute(f"ATTACH '{Path(main_db).resolve().as_posix()}' AS src (READ_ONLY);")
+        con.execute("CREATE SCHEMA IF NOT EXISTS raw;")
+        for t in SHARD_RAW_TABLES:
+            con.execute(f"""
+                CREATE OR REPLACE VIEW raw.{t} AS
+                SELECT * FROM src.raw.{t} WHERE hash(ticker) % {n_shards} = {shard};
+            """)
+        for f in SHARD_MODELS:
+            t0 = time.time()
+            con.execute(Path(f).read_text())
+            if f == SHARD_MODELS[0]:
+                con.execute(SHARD_STRATEGIES_SQL)
+            durations[f] = time.time() - t0
+        con.execute("DETACH src;")
+    finally:
+        con.close()
+    return str(path), durations
+
+
+def merge_shards(con, shard_files: list[str]) -> None:
+    """
+    Replace the SHARD_MODELS tables in `con` with the combined shards, recreate
+    their views against the merged tables and advance their watermarks.
+    """
+    aliases = []
+    for i, f in enumerate(shard_files):
+        alias = f"shard_{i}"
+        con.execute(f"ATTACH '{Path(f).as_posix()}' AS {alias} (READ_ONLY);")
+        aliases.append(alias)
+    try:
+        con.execute("BEGIN TRANSACTION;")
+        try:
+            con.execute("CREATE SCHEMA IF NOT EXISTS mart;")
+            for table, select in MERGE_SQL.items():
+                union = " UNION ALL ".join(f"SELECT * FROM {a}.{table}" for a in aliases)
+                con.execute(f"CREATE OR REPLACE TABLE {table} AS {select.format(shards=f'({union})')};")
+            for f in SHARD_MODELS:
+                for stmt in con.extract_statements(Path(f).read_text()):
+                    if stmt.type == duckdb.StatementType.CREATE and " VIEW " in stmt.query.upper():
+                        con.execute(stmt)
+                if f in MODEL_TABLES:
+                    set_watermark(con, MODEL_TABLES[f])
+            con.execute("COMMIT;")
+        except Exception:
+            con.execute("ROLLBACK;")
+            raise
+    finally:
+        for a in aliases:
+            con.execute(f"DETACH {a};")
+
+
+def build_shards(main_db: Path, n_shards: int, shard_dir: Path = SHARD_DIR) -> list[tuple[str, dict]]:
+    """
+    Build every shard in its own process; returns build_shard's result per
+    shard. The caller must not hold a read-write connection to main_db, since
+    workers attach it read-only.
+    """
+    if shard_dir.exists():
+        shutil.rmtree(shard_dir)
+    shard_dir.mkdir(parents=True)
+    threads = max(1, (os.cpu_count() or 1) // n_shards)
+    with ProcessPoolExecutor(max_workers=n_shards) as pool:
+        futures = [
+            pool.submit(build_shard, i, n_shards, str(main_db), str(shard_dir), threads)
+            for i in range(n_shards)
+        ]
+        return [fut.result() for fut in futures]
+
+
+def run_sharded(
+    sql_files: list[str],
+    n_shards: int,
+    shard_dir: Path = SHARD_DIR,
+    max_workers: int | None = None,
+    on_done=None,
+) -> dict[str, float]:
+    """
+    Full build with SHARD_MODELS built across `n_shards` worker processes and
+    merged into the main database; the remaining models then run as a normal
+    DAG on the merged tables. Returns elapsed seconds per model; a sharded
+    model's time is its slowest shard's, and the merge is reported as "merge".
+    """
+    built = build_shards(db.DB_PATH, n_shards, shard_dir)
+    durations = {f: max(d[f] for _, d in built) for f in SHARD_MODELS}
+    if on_done:
+        for f in SHARD_MODELS:
+            on_done(f, False, durations[f])
+
+    con = db.get_conn()
+    try:
+        t0 = time.time()
+        merge_shards(con, [path for path, _ in built])
+        durations["merge"] = time.time() - t0
+
+        rest = [f for f in sql_files if f not in SHARD_MODELS]
+        deps = build_dag(sql_files)
+        plan = plan_models(con, rest, full_refresh=True, deps=deps)
+        durations.update(run_dag(con, plan, deps, max_workers, on_done=on_done))
+    finally:
+        con.close()
+    return durations
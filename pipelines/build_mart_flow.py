@@ -3,23 +3,22 @@ from __future__ import annotations
 
 from dataclasses import asdict
 from datetime import datetime, timezone
-from pathlib import Path
 import time
 import traceback
 
 from prefect import flow, task
 from prefect.logging import get_run_logger
 
+import models.db as db
 from models.db import get_conn  # canonical DB connector you already use
+from models.dag import build_dag, critical_path, discover_models, run_dag
+from models.incremental import drop_legacy_objects, ensure_watermark_table, plan_models
+from models.profiling import ensure_profile_table, save_profiles
+from models.publish import publish, write_run_status
+from models.shard import run_sharded
 
 
-SQL_FILES = [
-    "sql/01_daily_positions.sql",
-    "sql/02_daily_pnl.sql",
-    "sql/03_exposures.sql",
-    "sql/04_liquidity.sql",
-    "sql/05_earnings_window.sql",
-]
+SQL_FILES = discover_models()
 
 
 @task(retries=0)
@@ -39,6 +38,9 @@ def ensure_ops_schema_and_table() -> None:
         );
         """
     )
+    ensure_watermark_table(con)
+    ensure_profile_table(con)
+    drop_legacy_objects(con)
     con.close()
 
 
@@ -54,49 +56,110 @@ def regenerate_raw_data() -> None:
 
 
 @task(retries=0)
-def run_sql_models(sql_files: list[str] = SQL_FILES) -> list[str]:
+def run_sql_models(
+    sql_files: list[str] = SQL_FILES,
+    full_refresh: bool = False,
+    max_workers: int | None = None,
+    run_id: str | None = None,
+    shards: int | None = None,
+) -> list[str]:
+    """
+    Runs the models as a dependency DAG parsed from their SQL, building
+    independent models concurrently on separate cursors. Each model runs
+    incrementally from its ops.model_watermarks high-water mark where possible,
+    or as a full CREATE OR REPLACE when full_refresh is set. With a run_id,
+    models run under DuckDB's profiler and per-operator timings land in
+    ops.model_profiles. With shards, the ticker-partitioned models are instead
+    built in that many worker processes and merged (always a full build,
+    without profiles).
+    """
     logger = get_run_logger()
-    con = get_conn()
 
+    deps = build_dag(sql_files)
     ran = []
-    for f in sql_files:
-        path = Path(f)
-        if not path.exists():
-            con.close()
-            raise FileNotFoundError(f"Missing SQL file: {path.resolve()}")
-        sql = path.read_text()
-        t0 = time.time()
-        con.execute(sql)
-        dt = time.time() - t0
-        logger.info(f"Ran: {f} ({dt:.3f}s)")
+    profiles = {} if run_id else None
+
+    def report(f: str, incremental: bool, seconds: float) -> None:
+        logger.info(f"Ran: {f} ({'incremental' if incremental else 'full'}, {seconds:.3f}s)")
         ran.append(f)
 
-    con.close()
+    if shards:
+        durations = run_sharded(sql_files, shards, max_workers=max_workers, on_done=report)
+        logger.info(f"Merged {shards} shards in {durations.pop('merge'):.3f}s")
+        path, total = critical_path(deps, durations)
+        logger.info(f"Critical path ({total:.3f}s of {sum(durations.values()):.3f}s model time): {' -> '.join(path)}")
+        return ran
+
+    con = get_conn()
+
+    try:
+        plan = plan_models(con, sql_files, full_refresh, deps)
+        durations = run_dag(con, plan, deps, max_workers, on_done=report, profiles=profiles)
+        if profiles:
+            n = save_profiles(con, run_id, profiles)
+            logger.info(f"Saved {n} operator profiles for {run_id}")
+    finally:
+        con.close()
+
+    path, total = critical_path(deps, durations)
+    logger.info(f"Critical path ({total:.3f}s of {sum(durations.values()):.3f}s model time): {' -> '.join(path)}")
     return ran
 
 
 @task(retries=0)
-def run_dq_checks() -> dict:
+def run_scenarios(full_refresh: bool = False) -> int:
     """
-    Runs a few core data-quality checks. Return structured results.
+    Revalues the latest book under the standard shock set into
+    mart.scenario_pnl; a full refresh drops earlier dates' rows.
     """
-    from fe_coo_analytics.validate import check_table_exists, check_row_count, check_unique_key
+    from fe_coo_analytics.scenarios import build_scenario_pnl
+
+    con = get_conn()
+    try:
+        return build_scenario_pnl(con, full_refresh=full_refresh)
+    finally:
+        con.close()
+
+
+@task(retries=0)
+def run_var() -> int:
+    """Rebuilds historical VaR/ES for every date into mart.daily_var and mart.firm_var."""
+    from fe_coo_analytics.var import build_daily_var
+
+    con = get_conn()
+    try:
+        return build_daily_var(con)
+    finally:
+        con.close()
+
+
+@task(retries=0)
+def run_lots() -> int:
+    """Replays trades through FIFO and average-cost lots into mart.realized_pnl and mart.unrealized_pnl."""
+    from fe_coo_analytics.lots import build_lot_pnl
+
+    con = get_conn()
+    try:
+        return build_lot_pnl(con)
+    finally:
+        con.close()
 
-    checks = []
 
-    # existence + min rows
-    for t in [
-        "daily_positions",
-        "daily_pnl",
-        "daily_exposures",
-        "daily_liquidity",
-        "earnings_window_pnl",
-    ]:
-        checks.append(check_table_exists("mart", t))
-        checks.append(check_row_count("mart", t, min_rows=1))
+@task(retries=0)
+def run_dq_checks() -> dict:
+    """
+    Runs the declarative mart DQ suite against the staging database. Return structured results.
+    """
+    from fe_coo_analytics.db import ConnectionManager
+    from fe_coo_analytics.validate import MART_SUITE, run_suite
 
-    # uniqueness invariants
-    checks.append(check_unique_key("mart", "daily_positions", ["date", "strategy", "ticker"]))
+    staging = ConnectionManager(db.DB_PATH, idle_seconds=0)
+    try:
+        # one scan per table covering row counts, nulls, keys and value ranges
+        checks = run_suite(MART_SUITE, manager=staging)
+    finally:
+        # release the read-only connection before log_run writes
+        staging.close()
 
     passed = all(c.passed for c in checks)
 
@@ -106,6 +169,12 @@ def run_dq_checks() -> dict:
     }
 
 
+@task(retries=0)
+def publish_snapshot(run_id: str) -> str:
+    """Copy staging to a versioned read-only snapshot and swap the published symlink to it."""
+    return str(publish(run_id))
+
+
 @task(retries=0)
 def log_run(
     run_id: str,
@@ -115,6 +184,20 @@ def log_run(
     duration_seconds: float,
     error_message: str | None,
 ) -> None:
+    """
+    Appends the run to ops.pipeline_runs in staging and mirrors it into the
+    status file beside the snapshots, which is where dashboards see failed
+    runs (a failed build is never published).
+    """
+    record = {
+        "run_id": run_id,
+        "run_ts": datetime.now(timezone.utc),
+        "status": status,
+        "regenerated_raw": regenerated_raw,
+        "models_ran": ",".join(models_ran),
+        "duration_seconds": duration_seconds,
+        "error_message": error_message,
+    }
     con = get_conn()
     con.execute(
         """
@@ -122,23 +205,25 @@ def log_run(
         (run_id, run_ts, status, regenerated_raw, models_ran, duration_seconds, error_message)
         VALUES (?, ?, ?, ?, ?, ?, ?);
         """,
-        [
-            run_id,
-            datetime.now(timezone.utc),
-            status,
-            regenerated_raw,
-            ",".join(models_ran),
-            duration_seconds,
-            error_message,
-        ],
+        list(record.values()),
     )
     con.close()
+    write_run_status(record)
 
 
 @flow(name="build-mart")
-def build_mart(regenerate_raw: bool = False) -> dict:
+def build_mart(regenerate_raw: bool = False, full_refresh: bool = False, shards: int | None = None) -> dict:
     """
-    Orchestrates: (optional) regenerate raw -> run SQL models -> run dq checks -> log run.
+    Orchestrates: (optional) regenerate raw -> run SQL models -> scenarios ->
+    VaR -> lots -> run dq checks -> log run -> publish.
+
+    Everything up to publishing happens in the staging database; dashboards
+    read the published snapshot, so they never see a half-built or failed
+    build and never contend with the writer's file lock; log_run also writes
+    each run's outcome beside the snapshot so failures still show. Models build
+    incrementally unless full_refresh is set; regenerating raw always implies
+    a full rebuild. shards=N builds the ticker-partitioned models in N
+    processes (a full rebuild).
     """
     logger = get_run_logger()
     run_id = f"build-mart-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}"
@@ -153,7 +238,17 @@ def build_mart(regenerate_raw: bool = False) -> dict:
             regenerate_raw_data()
 
         logger.info("Running SQL models...")
-        models_ran = run_sql_models()
+        full = full_refresh or regenerate_raw or bool(shards)
+        models_ran = run_sql_models(full_refresh=full, run_id=run_id, shards=shards)
+
+        logger.info("Running scenarios...")
+        logger.info(f"Saved {run_scenarios(full_refresh=full)} scenario PnL rows")
+
+        logger.info("Running VaR...")
+        logger.info(f"Saved {run_var()} VaR rows")
+
+        logger.info("Running lots...")
+        logger.info(f"Saved {run_lots()} lot state rows")
 
         logger.info("Running DQ checks...")
         dq = run_dq_checks()
@@ -174,6 +269,16 @@ def build_mart(regenerate_raw: bool = False) -> dict:
     duration = time.time() - t0
     log_run(run_id, status, regenerate_raw, models_ran, duration, err)
 
+    if status == "success":
+        # published after logging, so the snapshot carries this run's row
+        try:
+            result["snapshot"] = publish_snapshot(run_id)
+        except Exception as e:
+            err = f"{type(e).__name__}: {e}\n{traceback.format_exc()}"
+            logger.error(err)
+            log_run(run_id, "publish_failed", regenerate_raw, models_ran, time.time() - t0, err)
+            result = {"run_id": run_id, "status": "publish_failed", "error": str(e), "models_ran": models_ran}
+
     return result
 
 
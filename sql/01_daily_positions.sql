@@ -1,6 +1,9 @@
 CREATE SCHEMA IF NOT EXISTS mart;
 
-CREATE OR REPLACE TABLE mart.daily_positions AS
+-- Positions are stored sparsely: one row per (strategy, ticker) change point,
+-- valid from the trade date up to the day before the next change (or the last
+-- price date for the open interval). mart.daily_positions densifies on read.
+CREATE OR REPLACE TABLE mart.position_intervals AS
     WITH signed_trades AS (
         SELECT trade_date::DATE AS date, strategy, ticker,
         CASE WHEN side = 'BUY'
@@ -8,28 +11,45 @@ CREATE OR REPLACE TABLE mart.daily_positions AS
             ELSE -quantity
         END AS signed_quantity
         FROM raw.trades
+        WHERE ticker IN (SELECT ticker FROM raw.security_master)
+          AND trade_date::DATE IN (SELECT DISTINCT date::DATE FROM raw.prices)
         ),
         daily_net_trades AS (
             SELECT date, strategy, ticker, SUM(signed_quantity) AS net_shares_change
             FROM signed_trades
             GROUP BY date, strategy, ticker
+            HAVING SUM(signed_quantity) <> 0
         ),
-        grid AS (
-            SELECT p.date::DATE AS date, s.strategy, sm.ticker
-            FROM (SELECT DISTINCT date FROM raw.prices) AS p
-            CROSS JOIN (SELECT DISTINCT strategy FROM raw.trades) AS s
-            CROSS JOIN raw.security_master AS sm
-        ), 
-        grid_with_trades AS (
-            SELECT g.date, g.strategy, g.ticker, COALESCE (dnt.net_shares_change, 0) AS net_shares_change
-            FROM grid AS g 
-            LEFT JOIN daily_net_trades dnt ON g.date = dnt.date AND  g.strategy = dnt.strategy AND g.ticker = dnt.ticker
-        ),
-        positions AS (
+        change_points AS (
             SELECT date, strategy, ticker, SUM(net_shares_change) OVER (
                 PARTITION BY strategy, ticker ORDER BY date
                 ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
-            ) AS shares
-            FROM grid_with_trades
+            ) AS shares,
+            LEAD(date) OVER (PARTITION BY strategy, ticker ORDER BY date) AS next_change
+            FROM daily_net_trades
         )
-        SELECT * FROM positions;
\ No newline at end of file
+        SELECT strategy, ticker, date AS valid_from,
+        COALESCE(next_change - 1, (SELECT MAX(date)::DATE FROM raw.prices)) AS valid_to,
+        shares
+        FROM change_points
+        ORDER BY valid_from, strategy, ticker;
+
+-- Every strategy that trades: the strategy axis of the per-strategy grids here
+-- and in 02-04. Sharded builds re-point it at the unfiltered trades, so each
+-- shard's grids cover strategies it holds no positions in.
+CREATE OR REPLACE VIEW mart.strategies AS
+    SELECT DISTINCT strategy FROM raw.trades;
+
+-- Dense date x strategy x ticker view, rebuilt on demand with an as-of join.
+CREATE OR REPLACE VIEW mart.daily_positions AS
+    WITH grid AS (
+        SELECT p.date::DATE AS date, s.strategy, sm.ticker
+        FROM (SELECT DISTINCT date FROM raw.prices) AS p
+        CROSS JOIN mart.strategies AS s
+        CROSS JOIN raw.security_master AS sm
+        WHERE p.date::DATE <= (SELECT MAX(valid_to) FROM mart.position_intervals)
+    )
+    SELECT g.date, g.strategy, g.ticker, COALESCE(i.shares, 0) AS shares
+    FROM grid AS g
+    ASOF LEFT JOIN mart.position_intervals AS i
+      ON g.strategy = i.strategy AND g.ticker = i.ticker AND g.date >= i.valid_from;
@@ -1,21 +1,28 @@
 CREATE OR REPLACE TABLE mart.daily_pnl AS
 WITH px AS (
     SELECT date::DATE AS date, ticker, close,
-    LAG(close, 1) OVER (PARTITION BY ticker ORDER BY date) AS prev_close
+    LAG(close, 1) OVER (PARTITION BY ticker ORDER BY date) AS prev_close,
+    LAG(date::DATE, 1) OVER (PARTITION BY ticker ORDER BY date) AS prev_date
     FROM raw.prices
 ),
-pos AS (
-    SELECT date, strategy, ticker, shares, 
-    LAG(shares) OVER (PARTITION BY strategy, ticker ORDER BY date) AS prev_shares
-    FROM mart.daily_positions
+grid AS (
+    SELECT x.date, s.strategy, x.ticker, x.close, x.prev_close, x.prev_date
+    FROM px x
+    JOIN raw.security_master sm ON x.ticker = sm.ticker
+    CROSS JOIN mart.strategies AS s
+    WHERE x.prev_close IS NOT NULL
+      AND x.date <= (SELECT MAX(valid_to) FROM mart.position_intervals)
 ),
 joined AS (
-    SELECT p.date, p.strategy, p.ticker, p.prev_shares AS shares_held,
-    x.close, x.prev_close, (x.close - x.prev_close) AS price_change
-    FROM pos p
-    JOIN px x ON p.date = x.date AND p.ticker = x.ticker
+    -- shares held into the day = position as of the previous price date
+    SELECT g.date, g.strategy, g.ticker, COALESCE(i.shares, 0) AS shares_held,
+    g.close, g.prev_close, (g.close - g.prev_close) AS price_change
+    FROM grid g
+    ASOF LEFT JOIN mart.position_intervals i
+      ON g.strategy = i.strategy AND g.ticker = i.ticker AND g.prev_date >= i.valid_from
 )
 SELECT date, strategy, ticker, shares_held, close, prev_close, price_change,
 COALESCE(shares_held, 0) * COALESCE(price_change, 0) AS pnl
 FROM joined
-WHERE prev_close IS NOT NULL;
\ No newline at end of file
+-- stored date-clustered so date-range filters skip row groups via min/max stats
+ORDER BY date, strategy, ticker;
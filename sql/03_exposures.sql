@@ -3,17 +3,23 @@ WITH px AS (
     SELECT date::DATE AS date, ticker, close
     FROM raw.prices
 ),
-pos AS (
-    SELECT date, strategy, ticker, shares
-    FROM mart.daily_positions
+grid AS (
+    SELECT d.date, s.strategy
+    FROM (SELECT DISTINCT date FROM px) AS d
+    CROSS JOIN mart.strategies AS s
+    WHERE d.date <= (SELECT MAX(valid_to) FROM mart.position_intervals)
 ),
  mv AS(
-    SELECT p.date, p.strategy, p.ticker, p.shares, x.close,
-    (p.shares * x.close) AS market_value
-    FROM pos p
-    JOIN px x ON p.date = x.date AND p.ticker = x.ticker
+    -- only non-flat intervals contribute, so this scales with held positions
+    SELECT x.date, i.strategy, i.ticker, i.shares, x.close,
+    (i.shares * x.close) AS market_value
+    FROM mart.position_intervals i
+    JOIN px x ON x.ticker = i.ticker AND x.date BETWEEN i.valid_from AND i.valid_to
+    WHERE i.shares <> 0
  )
- SELECT date, strategy, SUM(ABS(market_value)) AS gross_exposure,
- SUM(market_value) AS net_exposure
- FROM mv 
- GROUP BY date, strategy;
\ No newline at end of file
+ SELECT g.date, g.strategy, COALESCE(SUM(ABS(mv.market_value)), 0) AS gross_exposure,
+ COALESCE(SUM(mv.market_value), 0) AS net_exposure
+ FROM grid g
+ LEFT JOIN mv ON g.date = mv.date AND g.strategy = mv.strategy
+ GROUP BY g.date, g.strategy
+ ORDER BY g.date, g.strategy;
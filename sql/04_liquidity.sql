@@ -3,22 +3,32 @@ WITH px AS (
     SELECT date::DATE AS date, ticker, close
     FROM raw.prices
 ),
+grid AS (
+    SELECT x.date, s.strategy, x.ticker, x.close
+    FROM px x
+    JOIN raw.security_master sm ON x.ticker = sm.ticker
+    CROSS JOIN mart.strategies AS s
+    WHERE x.date <= (SELECT MAX(valid_to) FROM mart.position_intervals)
+),
 pos AS (
-    SELECT date::DATE AS date, strategy, ticker, shares
-    FROM mart.daily_positions
+    SELECT g.date, g.strategy, g.ticker, COALESCE(i.shares, 0) AS shares, g.close
+    FROM grid g
+    ASOF LEFT JOIN mart.position_intervals i
+      ON g.strategy = i.strategy AND g.ticker = i.ticker AND g.date >= i.valid_from
 ),
 liq AS (
     SELECT ticker, adv_shares
     FROM raw.liquidity
 ), joined AS (
-    SELECT p.date, p.strategy, p.ticker, p.shares, l.adv_shares, x.close,
+    SELECT p.date, p.strategy, p.ticker, p.shares, l.adv_shares, p.close,
     ABS(p.shares) / NULLIF(l.adv_shares, 0) AS days_to_liquidate
     FROM pos p
     JOIN liq l ON p.ticker = l.ticker
-    JOIN px x ON p.date = x.date AND p.ticker = x.ticker
 )
 SELECT *,
     CASE WHEN days_to_liquidate > 3 THEN 1
      ELSE 0
     END AS illiquid_flag
-FROM joined;
+FROM joined
+-- stored date-clustered so date-range filters skip row groups via min/max stats
+ORDER BY date, strategy, ticker;
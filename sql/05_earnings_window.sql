@@ -1,20 +1,45 @@
-CREATE OR REPLACE TABLE mart.earnings_window_pnl AS
+-- Earnings-window PnL with windows counted in business days (price dates),
+-- so weekends and holidays don't shrink a window.
+
+-- Business-day index: one row per price date, numbered consecutively.
+CREATE OR REPLACE TABLE mart.business_days AS
+SELECT date, (ROW_NUMBER() OVER (ORDER BY date))::INTEGER AS bday
+FROM (SELECT DISTINCT date::DATE AS date FROM raw.prices)
+ORDER BY date;
+
+-- PnL per business-day offset from each earnings date, out to the widest
+-- window (10). One range join over mart.daily_pnl serves every window.
+-- Earnings dates that are not business days anchor on the next one.
+CREATE OR REPLACE TABLE mart.earnings_offset_pnl AS
 WITH e AS (
-    SELECT ticker, earnings_date::DATE AS earnings_date
-    FROM raw.earnings_calendar
+    SELECT e.ticker, e.earnings_date, b.bday
+    FROM (SELECT ticker, earnings_date::DATE AS earnings_date FROM raw.earnings_calendar) e
+    ASOF JOIN mart.business_days b ON e.earnings_date <= b.date
 ),
 p AS (
-    SELECT date::DATE AS date, strategy, ticker, pnl
-    FROM mart.daily_pnl
-),
-joined AS (
-    SELECT p.strategy, p.ticker, e.earnings_date, p.date,
-    DATE_DIFF('day', e.earnings_date, p.date) AS day_offset,
-    p.pnl
-    FROM p
-    JOIN e ON p.ticker = e.ticker
-    WHERE p.date BETWEEN e.earnings_date - INTERVAL 2 DAY AND e.earnings_date + INTERVAL 2 DAY
+    SELECT p.strategy, p.ticker, p.pnl, b.bday
+    FROM mart.daily_pnl p
+    JOIN mart.business_days b ON p.date::DATE = b.date
 )
+SELECT p.strategy, p.ticker, e.earnings_date,
+(p.bday - e.bday)::INTEGER AS day_offset,
+SUM(p.pnl) AS pnl
+FROM p
+JOIN e ON p.ticker = e.ticker AND p.bday BETWEEN e.bday - 10 AND e.bday + 10
+GROUP BY 1,2,3,4
+ORDER BY 1,2,3,4;
+
+-- Long format: one row per event and window (±window_days business days).
+-- Keep the window list in sync with EARNINGS_WINDOWS in metrics_earnings.
+CREATE OR REPLACE TABLE mart.earnings_windows AS
+SELECT o.strategy, o.ticker, o.earnings_date, w.window_days, SUM(o.pnl) AS pnl
+FROM mart.earnings_offset_pnl o
+JOIN (VALUES (1), (2), (5), (10)) w(window_days) ON ABS(o.day_offset) <= w.window_days
+GROUP BY 1,2,3,4
+ORDER BY 1,2,3,4;
+
+-- Wide ±2 view of the same offsets, kept for existing consumers.
+CREATE OR REPLACE TABLE mart.earnings_window_pnl AS
 SELECT
   strategy,
   ticker,
@@ -25,5 +50,6 @@ SELECT
   SUM(CASE WHEN day_offset =  1 THEN pnl ELSE 0 END) AS pnl_p1,
   SUM(CASE WHEN day_offset =  2 THEN pnl ELSE 0 END) AS pnl_p2,
   SUM(pnl) AS pnl_total_window
-FROM joined
-GROUP BY 1,2,3;
\ No newline at end of file
+FROM mart.earnings_offset_pnl
+WHERE ABS(day_offset) <= 2
+GROUP BY 1,2,3;
@@ -0,0 +1,31 @@
+-- Strategy- and firm-level daily rollups, so dashboards don't re-aggregate
+-- the ticker-grain marts on every request.
+CREATE OR REPLACE TABLE mart.strategy_daily AS
+WITH pnl AS (
+    SELECT date, strategy, SUM(pnl) AS pnl
+    FROM mart.daily_pnl
+    GROUP BY date, strategy
+),
+liq AS (
+    SELECT date, strategy, SUM(illiquid_flag) AS illiquid_positions
+    FROM mart.daily_liquidity
+    GROUP BY date, strategy
+)
+SELECT e.date, e.strategy, p.pnl,
+SUM(p.pnl) OVER (
+    PARTITION BY e.strategy ORDER BY e.date
+    ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+) AS cum_pnl,
+e.gross_exposure, e.net_exposure, l.illiquid_positions
+FROM mart.daily_exposures e
+LEFT JOIN pnl p ON e.date = p.date AND e.strategy = p.strategy
+LEFT JOIN liq l ON e.date = l.date AND e.strategy = l.strategy
+ORDER BY e.date, e.strategy;
+
+CREATE OR REPLACE TABLE mart.firm_daily AS
+SELECT date, SUM(pnl) AS pnl, SUM(cum_pnl) AS cum_pnl,
+SUM(gross_exposure) AS gross_exposure, SUM(net_exposure) AS net_exposure,
+SUM(illiquid_positions) AS illiquid_positions
+FROM mart.strategy_daily
+GROUP BY date
+ORDER BY date;
@@ -0,0 +1,56 @@
+-- Ranked top-K extracts (K = 50) so "top N" lookups read a few rows by rank
+-- instead of sorting the full marts. Ranks are 1-based ROW_NUMBERs with
+-- deterministic tie-breaks; a row is kept if it is within K on any ranking it
+-- carries, so every ranking is exact up to K.
+CREATE OR REPLACE TABLE mart.top_pnl_movers AS
+WITH ranked AS (
+    SELECT date, strategy, ticker, pnl,
+    ROW_NUMBER() OVER (PARTITION BY date ORDER BY ABS(pnl) DESC, strategy, ticker) AS day_rank,
+    ROW_NUMBER() OVER (PARTITION BY date, strategy ORDER BY ABS(pnl) DESC, ticker) AS day_strategy_rank
+    FROM mart.daily_pnl
+    WHERE pnl IS NOT NULL
+),
+kept AS (
+    SELECT * FROM ranked WHERE day_rank <= 50 OR day_strategy_rank <= 50
+)
+SELECT *,
+-- the overall top K is a subset of the per-date top K, so ranking `kept` is exact
+ROW_NUMBER() OVER (ORDER BY ABS(pnl) DESC, date, strategy, ticker) AS overall_rank
+FROM kept
+ORDER BY date, day_rank;
+
+CREATE OR REPLACE TABLE mart.top_illiquid AS
+WITH ranked AS (
+    SELECT date, strategy, ticker, shares, adv_shares, days_to_liquidate, illiquid_flag,
+    ROW_NUMBER() OVER (
+        PARTITION BY date ORDER BY days_to_liquidate DESC NULLS LAST, strategy, ticker
+    ) AS day_rank,
+    ROW_NUMBER() OVER (
+        PARTITION BY date, strategy ORDER BY days_to_liquidate DESC NULLS LAST, ticker
+    ) AS day_strategy_rank
+    FROM mart.daily_liquidity
+),
+kept AS (
+    SELECT * FROM ranked WHERE day_rank <= 50 OR day_strategy_rank <= 50
+)
+SELECT *,
+ROW_NUMBER() OVER (
+    ORDER BY days_to_liquidate DESC NULLS LAST, date, strategy, ticker
+) AS overall_rank
+FROM kept
+ORDER BY date, day_rank;
+
+CREATE OR REPLACE TABLE mart.top_earnings_windows AS
+WITH ranked AS (
+    SELECT strategy, ticker, earnings_date, pnl_total_window,
+    ROW_NUMBER() OVER (
+        ORDER BY ABS(pnl_total_window) DESC, strategy, ticker, earnings_date
+    ) AS overall_rank,
+    ROW_NUMBER() OVER (
+        PARTITION BY strategy ORDER BY ABS(pnl_total_window) DESC, ticker, earnings_date
+    ) AS strategy_rank
+    FROM mart.earnings_window_pnl
+)
+SELECT * FROM ranked
+WHERE overall_rank <= 50 OR strategy_rank <= 50
+ORDER BY overall_rank;
@@ -0,0 +1,70 @@
+-- Incremental: append change points for trade dates after the stored high-water
+-- mark, seeding the running sum from each strategy/ticker's open interval.
+DELETE FROM mart.position_intervals
+WHERE valid_from > (SELECT high_water_date FROM ops.model_watermarks WHERE model = 'mart.position_intervals');
+
+CREATE OR REPLACE TEMP TABLE position_changes AS
+    WITH wm AS (
+        SELECT high_water_date FROM ops.model_watermarks WHERE model = 'mart.position_intervals'
+        ),
+        signed_trades AS (
+        SELECT trade_date::DATE AS date, strategy, ticker,
+        CASE WHEN side = 'BUY'
+            THEN quantity
+            ELSE -quantity
+        END AS signed_quantity
+        FROM raw.trades
+        WHERE trade_date::DATE > (SELECT high_water_date FROM wm)
+          AND ticker IN (SELECT ticker FROM raw.security_master)
+          AND trade_date::DATE IN (SELECT DISTINCT date::DATE FROM raw.prices)
+        ),
+        daily_net_trades AS (
+            SELECT date, strategy, ticker, SUM(signed_quantity) AS net_shares_change
+            FROM signed_trades
+            GROUP BY date, strategy, ticker
+            HAVING SUM(signed_quantity) <> 0
+        ),
+        seed AS (
+            SELECT strategy, ticker, shares
+            FROM mart.position_intervals
+            WHERE valid_to = (SELECT high_water_date FROM wm)
+        )
+        SELECT d.date, d.strategy, d.ticker, COALESCE(s.shares, 0) + SUM(d.net_shares_change) OVER (
+            PARTITION BY d.strategy, d.ticker ORDER BY d.date
+            ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+        ) AS shares,
+        LEAD(d.date) OVER (PARTITION BY d.strategy, d.ticker ORDER BY d.date) AS next_change
+        FROM daily_net_trades AS d
+        LEFT JOIN seed AS s ON d.strategy = s.strategy AND d.ticker = s.ticker;
+
+-- Extend every open interval to the new last price date ...
+UPDATE mart.position_intervals
+SET valid_to = (SELECT MAX(date)::DATE FROM raw.prices)
+WHERE valid_to = (SELECT high_water_date FROM ops.model_watermarks WHERE model = 'mart.position_intervals');
+
+-- ... then close the ones that changed on the day before their first new change point.
+UPDATE mart.position_intervals AS i
+SET valid_to = c.first_change - 1
+FROM (
+    SELECT strategy, ticker, MIN(date) AS first_change
+    FROM position_changes
+    GROUP BY strategy, ticker
+) AS c
+WHERE i.strategy = c.strategy AND i.ticker = c.ticker
+  AND i.valid_to = (SELECT MAX(date)::DATE FROM raw.prices)
+  AND i.valid_from <= (SELECT high_water_date FROM ops.model_watermarks WHERE model = 'mart.position_intervals');
+
+INSERT INTO mart.position_intervals
+SELECT strategy, ticker, date AS valid_from,
+COALESCE(next_change - 1, (SELECT MAX(date)::DATE FROM raw.prices)) AS valid_to,
+shares
+FROM position_changes
+ORDER BY valid_from, strategy, ticker;
+
+DROP TABLE position_changes;
+
+-- Every strategy that trades: the strategy axis of the per-strategy grids here
+-- and in 02-04. Sharded builds re-point it at the unfiltered trades, so each
+-- shard's grids cover strategies it holds no positions in.
+CREATE OR REPLACE VIEW mart.strategies AS
+    SELECT DISTINCT strategy FROM raw.trades;
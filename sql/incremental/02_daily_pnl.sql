@@ -0,0 +1,36 @@
+-- Incremental: PnL for dates after the stored high-water mark. The watermark
+-- day itself is read back so LAG() sees the previous close and date.
+DELETE FROM mart.daily_pnl
+WHERE date > (SELECT high_water_date FROM ops.model_watermarks WHERE model = 'mart.daily_pnl');
+
+INSERT INTO mart.daily_pnl
+WITH wm AS (
+    SELECT high_water_date FROM ops.model_watermarks WHERE model = 'mart.daily_pnl'
+),
+px AS (
+    SELECT date::DATE AS date, ticker, close,
+    LAG(close, 1) OVER (PARTITION BY ticker ORDER BY date) AS prev_close,
+    LAG(date::DATE, 1) OVER (PARTITION BY ticker ORDER BY date) AS prev_date
+    FROM raw.prices
+    WHERE date::DATE >= (SELECT high_water_date FROM wm)
+),
+grid AS (
+    SELECT x.date, s.strategy, x.ticker, x.close, x.prev_close, x.prev_date
+    FROM px x
+    JOIN raw.security_master sm ON x.ticker = sm.ticker
+    CROSS JOIN mart.strategies AS s
+    WHERE x.prev_close IS NOT NULL
+      AND x.date > (SELECT high_water_date FROM wm)
+      AND x.date <= (SELECT MAX(valid_to) FROM mart.position_intervals)
+),
+joined AS (
+    SELECT g.date, g.strategy, g.ticker, COALESCE(i.shares, 0) AS shares_held,
+    g.close, g.prev_close, (g.close - g.prev_close) AS price_change
+    FROM grid g
+    ASOF LEFT JOIN mart.position_intervals i
+      ON g.strategy = i.strategy AND g.ticker = i.ticker AND g.prev_date >= i.valid_from
+)
+SELECT date, strategy, ticker, shares_held, close, prev_close, price_change,
+COALESCE(shares_held, 0) * COALESCE(price_change, 0) AS pnl
+FROM joined
+ORDER BY date, strategy, ticker;
@@ -0,0 +1,33 @@
+-- Incremental: exposures for price dates after the stored high-water mark.
+DELETE FROM mart.daily_exposures
+WHERE date > (SELECT high_water_date FROM ops.model_watermarks WHERE model = 'mart.daily_exposures');
+
+INSERT INTO mart.daily_exposures
+WITH wm AS (
+    SELECT high_water_date FROM ops.model_watermarks WHERE model = 'mart.daily_exposures'
+),
+px AS (
+    SELECT date::DATE AS date, ticker, close
+    FROM raw.prices
+    WHERE date::DATE > (SELECT high_water_date FROM wm)
+),
+grid AS (
+    SELECT d.date, s.strategy
+    FROM (SELECT DISTINCT date FROM px) AS d
+    CROSS JOIN mart.strategies AS s
+    WHERE d.date <= (SELECT MAX(valid_to) FROM mart.position_intervals)
+),
+ mv AS(
+    SELECT x.date, i.strategy, i.ticker, i.shares, x.close,
+    (i.shares * x.close) AS market_value
+    FROM mart.position_intervals i
+    JOIN px x ON x.ticker = i.ticker AND x.date BETWEEN i.valid_from AND i.valid_to
+    WHERE i.shares <> 0
+      AND i.valid_to > (SELECT high_water_date FROM wm)
+ )
+ SELECT g.date, g.strategy, COALESCE(SUM(ABS(mv.market_value)), 0) AS gross_exposure,
+ COALESCE(SUM(mv.market_value), 0) AS net_exposure
+ FROM grid g
+ LEFT JOIN mv ON g.date = mv.date AND g.strategy = mv.strategy
+ GROUP BY g.date, g.strategy
+ ORDER BY g.date, g.strategy;
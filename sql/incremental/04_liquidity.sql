@@ -0,0 +1,41 @@
+-- Incremental: liquidity rows for price dates after the stored high-water mark.
+DELETE FROM mart.daily_liquidity
+WHERE date > (SELECT high_water_date FROM ops.model_watermarks WHERE model = 'mart.daily_liquidity');
+
+INSERT INTO mart.daily_liquidity
+WITH wm AS (
+    SELECT high_water_date FROM ops.model_watermarks WHERE model = 'mart.daily_liquidity'
+),
+px AS (
+    SELECT date::DATE AS date, ticker, close
+    FROM raw.prices
+    WHERE date::DATE > (SELECT high_water_date FROM wm)
+),
+grid AS (
+    SELECT x.date, s.strategy, x.ticker, x.close
+    FROM px x
+    JOIN raw.security_master sm ON x.ticker = sm.ticker
+    CROSS JOIN mart.strategies AS s
+    WHERE x.date <= (SELECT MAX(valid_to) FROM mart.position_intervals)
+),
+pos AS (
+    SELECT g.date, g.strategy, g.ticker, COALESCE(i.shares, 0) AS shares, g.close
+    FROM grid g
+    ASOF LEFT JOIN mart.position_intervals i
+      ON g.strategy = i.strategy AND g.ticker = i.ticker AND g.date >= i.valid_from
+),
+liq AS (
+    SELECT ticker, adv_shares
+    FROM raw.liquidity
+), joined AS (
+    SELECT p.date, p.strategy, p.ticker, p.shares, l.adv_shares, p.close,
+    ABS(p.shares) / NULLIF(l.adv_shares, 0) AS days_to_liquidate
+    FROM pos p
+    JOIN liq l ON p.ticker = l.ticker
+)
+SELECT *,
+    CASE WHEN days_to_liquidate > 3 THEN 1
+     ELSE 0
+    END AS illiquid_flag
+FROM joined
+ORDER BY date, strategy, ticker;
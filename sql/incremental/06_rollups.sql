@@ -0,0 +1,50 @@
+-- Incremental: roll up dates after the stored high-water mark, carrying each
+-- strategy's cumulative PnL forward from the watermark day.
+DELETE FROM mart.strategy_daily
+WHERE date > (SELECT high_water_date FROM ops.model_watermarks WHERE model = 'mart.strategy_daily');
+
+INSERT INTO mart.strategy_daily
+WITH wm AS (
+    SELECT high_water_date FROM ops.model_watermarks WHERE model = 'mart.strategy_daily'
+),
+pnl AS (
+    SELECT date, strategy, SUM(pnl) AS pnl
+    FROM mart.daily_pnl
+    WHERE date > (SELECT high_water_date FROM wm)
+    GROUP BY date, strategy
+),
+liq AS (
+    SELECT date, strategy, SUM(illiquid_flag) AS illiquid_positions
+    FROM mart.daily_liquidity
+    WHERE date > (SELECT high_water_date FROM wm)
+    GROUP BY date, strategy
+),
+seed AS (
+    SELECT strategy, cum_pnl
+    FROM mart.strategy_daily
+    WHERE date = (SELECT high_water_date FROM wm)
+)
+SELECT e.date, e.strategy, p.pnl,
+COALESCE(s.cum_pnl, 0) + SUM(p.pnl) OVER (
+    PARTITION BY e.strategy ORDER BY e.date
+    ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+) AS cum_pnl,
+e.gross_exposure, e.net_exposure, l.illiquid_positions
+FROM mart.daily_exposures e
+LEFT JOIN pnl p ON e.date = p.date AND e.strategy = p.strategy
+LEFT JOIN liq l ON e.date = l.date AND e.strategy = l.strategy
+LEFT JOIN seed s ON e.strategy = s.strategy
+WHERE e.date > (SELECT high_water_date FROM wm)
+ORDER BY e.date, e.strategy;
+
+DELETE FROM mart.firm_daily
+WHERE date > (SELECT high_water_date FROM ops.model_watermarks WHERE model = 'mart.strategy_daily');
+
+INSERT INTO mart.firm_daily
+SELECT date, SUM(pnl) AS pnl, SUM(cum_pnl) AS cum_pnl,
+SUM(gross_exposure) AS gross_exposure, SUM(net_exposure) AS net_exposure,
+SUM(illiquid_positions) AS illiquid_positions
+FROM mart.strategy_daily
+WHERE date > (SELECT high_water_date FROM ops.model_watermarks WHERE model = 'mart.strategy_daily')
+GROUP BY date
+ORDER BY date;
@@ -0,0 +1,24 @@
+import pytest
+from fe_coo_analytics.batch import gather, query_batch
+from fe_coo_analytics.db import cursor
+from fe_coo_analytics.metrics_rollup import latest_kpis, strategy_daily
+
+def test_query_batch_matches_sequential_queries():
+    sqls = [
+        "SELECT COUNT(*) AS n FROM mart.daily_pnl;",
+        ("SELECT COUNT(*) AS n FROM mart.daily_exposures WHERE strategy = ?;", ["TMT"]),
+        "SELECT COUNT(DISTINCT date) AS n FROM mart.strategy_daily;",
+    ]
+    batched = query_batch(sqls)
+    with cursor() as con:
+        expected = [con.execute(*((q,) if isinstance(q, str) else q)).fetchone()[0] for q in sqls]
+        # inside a checkout the batch falls back to running in turn
+        nested = query_batch(sqls)
+    assert [df.iloc[0, 0] for df in batched] == expected
+    assert [df.iloc[0, 0] for df in nested] == expected
+
+def test_gather_keeps_order_and_raises():
+    daily, kpis = gather(strategy_daily, latest_kpis)
+    assert kpis["date"][0] == daily["date"].max()
+    with pytest.raises(ZeroDivisionError):
+        gather(lambda: 1, lambda: 1 / 0)
@@ -0,0 +1,44 @@
+import pandas as pd
+from benchmarks.run import compare_to_baseline
+
+def test_compare_to_baseline_flags_only_real_slowdowns():
+    baseline = pd.DataFrame({
+        "scale": ["small"] * 3,
+        "stage": ["generate", "dq", "metric:pnl_by_day"],
+        "seconds": [1.0, 1.0, 0.002],
+        "peak_rss_mb": [100.0] * 3,
+    })
+    current = pd.DataFrame({
+        "scale": ["small"] * 4,
+        "stage": ["generate", "dq", "metric:pnl_by_day", "model:new"],
+        "seconds": [1.1, 2.0, 0.02, 5.0],
+        "peak_rss_mb": [100.0] * 4,
+    })
+    report = compare_to_baseline(current, baseline, tolerance=0.25).set_index("stage")
+    assert not report.loc["generate", "regressed"]        # within tolerance
+    assert report.loc["dq", "regressed"]
+    assert not report.loc["metric:pnl_by_day", "regressed"]  # 10x, but under the noise floor
+    assert not report.loc["model:new", "regressed"]       # no baseline yet
+
+def test_rss_sampler_reports_each_stage_peak():
+    import time
+    import numpy as np
+    from benchmarks.run import RssSampler
+    with RssSampler() as heavy:
+        block = np.ones(64 * 1024 * 1024 // 8)  # 64 MiB, touched
+        time.sleep(0.05)
+        del block
+    with RssSampler() as light:
+        pass
+    assert heavy.peak_mb > light.peak_mb + 32
+
+def test_benchmark_runs_end_to_end_at_smallest_scale(tmp_path):
+    from benchmarks.run import SCALES, run_scale_subprocess
+    from models.run_sql_models import PYTHON_MODELS
+    smallest = min(SCALES, key=lambda s: SCALES[s]["n_trades"])
+    results = run_scale_subprocess(smallest, SCALES[smallest], work_dir=tmp_path)
+    stages = {r.stage: r for r in results}
+    assert {"generate", "load_raw", "dq", "publish"} <= set(stages)
+    for name in PYTHON_MODELS:
+        assert stages[f"python:{name}"].rows > 0
+    assert all(r.seconds >= 0 and r.peak_rss_mb > 0 for r in results)
@@ -0,0 +1,36 @@
+import pandas as pd
+from fe_coo_analytics.cache import BuildCache, build_cached, latest_build_version
+
+def test_entries_survive_until_build_version_changes():
+    version = ["run-1"]
+    cache = BuildCache(version_fn=lambda: version[0])
+    calls = []
+
+    @build_cached(cache=cache)
+    def load(n):
+        calls.append(n)
+        return pd.DataFrame({"x": range(n)})
+
+    assert len(load(3)) == 3
+    df = load(3)
+    df["y"] = 1  # callers may mutate what they get back
+    assert list(load(3).columns) == ["x"]
+    assert calls == [3]
+
+    version[0] = "run-2"
+    load(3)
+    assert calls == [3, 3]
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.invalidations) == (2, 2, 1)
+
+def test_lru_eviction_respects_byte_budget():
+    cache = BuildCache(max_bytes=3000, version_fn=lambda: "v")
+    for i in range(5):
+        cache.get_or_compute(i, lambda: pd.DataFrame({"x": range(100)}))
+    stats = cache.stats()
+    assert stats.bytes <= 3000
+    assert stats.evictions > 0
+    assert cache.get_or_compute(4, lambda: None) is not None  # most recent survives
+
+def test_latest_build_version_is_stable_for_unchanged_mart():
+    assert latest_build_version() == latest_build_version()
@@ -0,0 +1,14 @@
+from models.dag import build_dag, critical_path, discover_models
+
+def test_exposures_and_liquidity_only_depend_on_positions():
+    deps = build_dag(discover_models())
+    assert deps["sql/01_daily_positions.sql"] == set()
+    assert deps["sql/03_exposures.sql"] == {"sql/01_daily_positions.sql"}
+    assert deps["sql/04_liquidity.sql"] == {"sql/01_daily_positions.sql"}
+    assert deps["sql/05_earnings_window.sql"] == {"sql/02_daily_pnl.sql"}
+
+def test_critical_path_follows_slowest_chain():
+    deps = {"a": set(), "b": {"a"}, "c": {"a"}, "d": {"b"}}
+    path, total = critical_path(deps, {"a": 1.0, "b": 1.0, "c": 5.0, "d": 1.0})
+    assert path == ["a", "c"]
+    assert total == 6.0
@@ -0,0 +1,46 @@
+import threading
+import time
+import duckdb
+from fe_coo_analytics.db import ConnectionManager
+
+def test_shared_connection_reopens_after_rebuild(tmp_path):
+    path = tmp_path / "t.duckdb"
+    con = duckdb.connect(str(path))
+    con.execute("CREATE TABLE t AS SELECT 1 AS a;")
+    con.close()
+
+    manager = ConnectionManager(path, idle_seconds=0)
+    with manager.cursor() as cur:
+        assert cur.execute("SELECT a FROM t;").fetchone()[0] == 1
+
+    # a writer can only open the file once the shared connection is released
+    manager.close()
+    con = duckdb.connect(str(path))
+    con.execute("CREATE OR REPLACE TABLE t AS SELECT 2 AS a;")
+    con.close()
+
+    with manager.cursor() as cur:
+        assert cur.execute("SELECT a FROM t;").fetchone()[0] == 2
+    manager.close()
+
+def test_idle_connection_is_closed_by_one_reaper(tmp_path, monkeypatch):
+    path = tmp_path / "t.duckdb"
+    duckdb.connect(str(path)).close()
+
+    started = []
+    start = threading.Thread.start
+    monkeypatch.setattr(threading.Thread, "start", lambda self: (started.append(self), start(self)))
+    manager = ConnectionManager(path, idle_seconds=0.2)
+    for _ in range(50):
+        with manager.cursor() as cur:
+            cur.execute("SELECT 1;").fetchone()
+    assert len(started) == 1
+
+    # once idle, the reaper releases the file lock for writers
+    time.sleep(0.6)
+    con = duckdb.connect(str(path))
+    con.execute("CREATE TABLE t AS SELECT 1 AS a;")
+    con.close()
+    with manager.cursor() as cur:
+        assert cur.execute("SELECT a FROM t;").fetchone()[0] == 1
+    manager.close()
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+from fe_coo_analytics.downsample import lttb, lttb_indices, pick_grain
+from fe_coo_analytics.metrics_rollup import strategy_daily
+
+def test_lttb_keeps_endpoints_and_spikes():
+    x = np.arange(5000.0)
+    y = np.sin(x / 200)
+    y[2500] = 50.0
+    idx = lttb_indices(x, y, 100)
+    assert len(idx) == 100 and idx[0] == 0 and idx[-1] == 4999
+    assert 2500 in idx
+    assert (np.diff(idx) > 0).all()
+
+def test_lttb_row_bound_with_many_series():
+    df = pd.DataFrame({"x": np.arange(1000.0), **{f"y{i}": np.random.default_rng(i).normal(size=1000) for i in range(4)}})
+    assert len(lttb(df, "x", ["y0", "y1"], 100)) <= 100
+    # 4 series can't share 6 points: each keeps three (endpoints are shared)
+    assert len(lttb(df, "x", [f"y{i}" for i in range(4)], 6)) <= 12
+
+def test_strategy_daily_rolls_up_to_point_budget():
+    full = strategy_daily()
+    small = strategy_daily(max_points=10)
+    grain = pick_grain(full["date"].min(), full["date"].max(), 10)
+    assert grain != "day"
+    assert small["date"].nunique() <= 10
+    # flows are summed, levels are taken on each bucket's last date
+    assert np.allclose(small.groupby("strategy")["pnl"].sum(), full.groupby("strategy")["pnl"].sum())
+    last = full[full["date"] == full["date"].max()].set_index("strategy")["cum_pnl"]
+    end = small[small["date"] == small["date"].max()].set_index("strategy")["cum_pnl"]
+    assert np.allclose(last, end)
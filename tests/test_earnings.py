@@ -0,0 +1,31 @@
+import pytest
+from fe_coo_analytics.db import cursor
+from fe_coo_analytics.metrics_earnings import biggest_earnings_windows, earnings_window_pnl
+
+def test_windows_are_nested_business_day_sums():
+    with cursor() as con:
+        # ±w business days spans 2w+1 trading dates unless the data edge cuts it off
+        bad = con.execute("""
+          SELECT COUNT(*) FROM mart.earnings_windows w
+          JOIN mart.earnings_window_pnl p USING (strategy, ticker, earnings_date)
+          WHERE w.window_days = 2 AND ABS(w.pnl - p.pnl_total_window) > 1e-6;
+        """).fetchone()[0]
+        max_days = con.execute("""
+          SELECT MAX(cnt) FROM (
+            SELECT COUNT(DISTINCT day_offset) AS cnt FROM mart.earnings_offset_pnl
+            GROUP BY strategy, ticker, earnings_date
+          );
+        """).fetchone()[0]
+    assert bad == 0
+    assert max_days <= 21
+
+def test_any_window_matches_precomputed():
+    five = earnings_window_pnl(5)
+    three = earnings_window_pnl(3)
+    assert len(five) > 0 and len(three) == len(five)
+    assert set(five["window_days"]) == {5}
+    top = biggest_earnings_windows(5, window=10)
+    full = earnings_window_pnl(10)
+    assert list(top["pnl_total_window"].abs()) == sorted(full["pnl"].abs(), reverse=True)[:5]
+    with pytest.raises(ValueError):
+        earnings_window_pnl(30)
@@ -0,0 +1,28 @@
+import pandas as pd
+import pytest
+from fe_coo_analytics.db import cursor
+from fe_coo_analytics.explorer import count_rows, daily_trade_volume, next_cursor, page
+
+def test_keyset_pages_cover_filtered_trades_once():
+    filters = {"strategy": ["TMT"], "side": ["BUY"]}
+    pages, after = [], None
+    while True:
+        df = page("raw.trades", filters, after=after, limit=101)
+        pages.append(df)
+        after = next_cursor("raw.trades", df, 101)
+        if after is None:
+            break
+    seen = pd.concat(pages)
+    assert len(seen) == seen["trade_id"].nunique() == count_rows("raw.trades", filters) > 101
+    assert set(seen["strategy"]) == {"TMT"} and set(seen["side"]) == {"BUY"}
+    assert seen["timestamp"].is_monotonic_decreasing
+
+def test_daily_volume_and_bad_filters():
+    vol = daily_trade_volume({"strategy": ["TMT"]}, start="2025-11-01")
+    with cursor() as con:
+        expected = con.execute("""
+          SELECT SUM(quantity) FROM raw.trades WHERE strategy = 'TMT' AND trade_date >= '2025-11-01';
+        """).fetchone()[0]
+    assert vol["quantity"].sum() == expected
+    with pytest.raises(ValueError):
+        page("raw.trades", {"price": [1.0]})
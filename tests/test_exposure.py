@@ -1,6 +1,53 @@
+import pytest
 from fe_coo_analytics.metrics_exposure import exposures_over_time
 
 def test_exposures_columns_and_non_negative_gross():
     df = exposures_over_time()
     assert set(["date", "strategy", "gross_exposure", "net_exposure"]).issubset(df.columns)
     assert (df["gross_exposure"] >= 0).all()
+
+def test_positions_as_of_matches_dense_view():
+    from fe_coo_analytics.db import cursor
+    from fe_coo_analytics.metrics_exposure import positions_as_of
+    with cursor() as con:
+        latest = con.execute("SELECT MAX(date) FROM mart.daily_positions;").fetchone()[0]
+        dense = con.execute("""
+          SELECT strategy, ticker, shares FROM mart.daily_positions
+          WHERE date = ? AND shares <> 0
+          ORDER BY strategy, ticker;
+        """, [latest]).df()
+    df = positions_as_of(str(latest))
+    assert len(df) == len(dense) > 0
+    assert (df["shares"].values == dense["shares"].values).all()
+
+def test_arrow_outputs_match_pandas():
+    pa = pytest.importorskip("pyarrow")
+    df = exposures_over_time()
+    table = exposures_over_time(output="arrow")
+    assert table.num_rows == len(df)
+    assert pa.types.is_dictionary(table.schema.field("strategy").type)
+    assert table.column("gross_exposure").to_pylist() == df["gross_exposure"].tolist()
+
+    reader = exposures_over_time(output="reader")
+    assert reader.schema == table.schema
+    assert sum(b.num_rows for b in reader) == len(df)
+
+def test_polars_output_keeps_categoricals():
+    pl = pytest.importorskip("polars")
+    pytest.importorskip("pyarrow")
+    df = exposures_over_time(output="polars")
+    assert len(df) == len(exposures_over_time())
+    assert df.schema["strategy"] == pl.Categorical
+
+def test_dropped_reader_does_not_block_close_shared():
+    pytest.importorskip("pyarrow")
+    import gc
+    from fe_coo_analytics.db import checked_out, close_shared
+    from fe_coo_analytics.results import query
+    reader = query("SELECT * FROM raw.trades", output="reader", batch_rows=100)
+    reader.read_next_batch()
+    assert not checked_out()
+    del reader
+    gc.collect()
+    close_shared()  # a checkout still held by the dropped reader would block here
+    assert len(exposures_over_time()) > 0
@@ -0,0 +1,29 @@
+import duckdb
+import numpy as np
+import pandas as pd
+from models.generate_data import iter_trade_chunks, write_parquet
+
+def _big_trade_ids(chunk_size):
+    days = pd.bdate_range("2024-01-01", periods=20)
+    close = np.full((len(days), 3), 100.0)
+    # max_shares=11 pins every normal quantity at 10, so big trades are exactly 60
+    trades = pd.concat(iter_trade_chunks(days, close, ["A", "B", "C"], ("s1", "s2"), 6_000, 11, 7, chunk_size))
+    return set(trades.loc[trades["quantity"] == 60, "trade_id"])
+
+def test_big_trades_do_not_depend_on_chunk_size():
+    ids = _big_trade_ids(6_000)
+    assert len(ids) == 20
+    assert _big_trade_ids(1_000) == ids
+    assert _big_trade_ids(250) == ids
+
+def test_write_parquet_writes_one_file_per_partition(tmp_path):
+    days = pd.bdate_range("2024-01-01", periods=20)
+    close = np.full((len(days), 3), 100.0)
+    chunks = iter_trade_chunks(days, close, ["A", "B", "C"], ("s1", "s2"), 6_000, 500, 7, 1_000)
+    assert write_parquet(tmp_path, "trades", chunks) == 6_000
+
+    parts = sorted((tmp_path / "trades").iterdir())
+    assert len(parts) == len(days)
+    assert all(len(list(p.glob("*.parquet"))) == 1 for p in parts)
+    files = (tmp_path / "trades" / "**" / "*.parquet").as_posix()
+    assert duckdb.sql(f"SELECT COUNT(DISTINCT trade_id) FROM read_parquet('{files}', hive_partitioning = true)").fetchone()[0] == 6_000
@@ -9,3 +9,23 @@ def test_daily_pnl_not_empty():
     from fe_coo_analytics.validate import check_row_count
     res = check_row_count("mart", "daily_pnl", min_rows=1)
     assert res.passed, res.details
+
+def test_mart_suite_passes_in_one_scan_per_table():
+    from fe_coo_analytics.validate import MART_SUITE, run_suite
+    results = run_suite(MART_SUITE)
+    failed = [r for r in results if not r.passed]
+    assert not failed, failed
+    names = {r.name for r in results}
+    assert "not_null:mart.daily_pnl.pnl" in names
+    assert "range:mart.daily_exposures.gross_exposure" in names
+
+def test_unique_key_counts_null_keys_on_one_and_many_columns():
+    import duckdb
+    from fe_coo_analytics.validate import TableChecks, _compile
+    con = duckdb.connect()
+    con.execute("CREATE SCHEMA s; CREATE TABLE s.t AS SELECT * FROM (VALUES (1, 'a'), (NULL, 'a'), (NULL, 'a')) v(k, g);")
+    for key in (("k",), ("k", "g")):
+        sql, decoders = _compile(TableChecks("s", "t", unique_key=key))
+        row = con.execute(sql).fetchone()
+        res = decoders[-1](row[-1], row[0])
+        assert not res.passed and res.details == "dup_rows=1", key
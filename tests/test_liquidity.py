@@ -5,3 +5,17 @@ def test_most_illiquid_returns_rows():
     assert len(df) == 5
     assert "days_to_liquidate" in df.columns
     assert df["days_to_liquidate"].isna().sum() == 0
+
+def test_most_illiquid_top_k_matches_full_sort():
+    from fe_coo_analytics.db import cursor
+    with cursor() as con:
+        date, strategy = con.execute(
+            "SELECT MAX(date), MIN(strategy) FROM mart.daily_liquidity;"
+        ).fetchone()
+        full = con.execute("""
+          SELECT days_to_liquidate FROM mart.daily_liquidity
+          WHERE date = ? AND strategy = ? AND illiquid_flag = 1
+          ORDER BY days_to_liquidate DESC LIMIT 20;
+        """, [date, strategy]).df()
+    df = most_illiquid(date, 20, strategy=strategy, only_flagged=True)
+    assert list(df["days_to_liquidate"]) == list(full["days_to_liquidate"])
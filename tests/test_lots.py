@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+from fe_coo_analytics.db import cursor
+from fe_coo_analytics.lots import TradeArrays, lot_state
+from fe_coo_analytics.metrics_pnl import lot_pnl_by_day
+
+def test_lot_state_fifo_and_average_through_a_flip():
+    d1, d2 = np.datetime64("2025-10-01"), np.datetime64("2025-10-02")
+    t = TradeArrays(
+        pd.DataFrame({"strategy": ["TMT"], "ticker": ["AAA"]}),
+        part=np.zeros(4, np.int64),
+        date=np.array([d1, d1, d2, d2]),
+        qty=np.array([100, 100, -150, -100]),
+        price=np.array([10.0, 20.0, 30.0, 25.0]),
+    )
+    state = lot_state(t).set_index(["method", "date"])
+    # FIFO closes 100@10 + 50@20, then the last 50@20 before going short 50@25
+    fifo = state.loc[("fifo", d2)]
+    assert np.isclose(fifo["realized_pnl"], 100 * 20 + 50 * 10 + 50 * 5)
+    avg = state.loc[("average", d2)]
+    assert np.isclose(avg["realized_pnl"], 150 * 15 + 50 * 10)
+    for row in (fifo, avg):
+        assert row["shares"] == -50 and np.isclose(row["cost_basis"], -50 * 25.0)
+    assert np.isclose(state.loc[("fifo", d1), "cost_basis"], 3000.0)
+
+def test_lot_pnl_reconciles_to_daily_pnl():
+    with cursor() as con:
+        worst = con.execute("SELECT MAX(ABS(pnl_break)) FROM mart.lot_pnl_reconciliation;").fetchone()[0]
+        totals = con.execute("""
+          SELECT method, SUM(realized_pnl + unrealized_change) AS lot, SUM(daily_pnl + trading_pnl) AS mtm
+          FROM mart.lot_pnl_reconciliation GROUP BY 1;
+        """).df()
+        held = con.execute("""
+          SELECT COUNT(*) FROM mart.unrealized_pnl u
+          JOIN mart.daily_positions p USING (date, strategy, ticker)
+          WHERE u.shares <> p.shares;
+        """).fetchone()[0]
+    assert worst < 1e-6
+    assert set(totals["method"]) == {"fifo", "average"}
+    assert np.allclose(totals["lot"], totals["mtm"])
+    assert held == 0
+
+def test_lot_pnl_by_day_methods_agree_on_total():
+    fifo, avg = lot_pnl_by_day("fifo"), lot_pnl_by_day("average")
+    last = fifo["date"].max()
+    total = lambda df: df["realized_pnl"].sum() + df.loc[df["date"] == last, "unrealized_pnl"].sum()
+    assert not np.isclose(fifo["realized_pnl"].sum(), avg["realized_pnl"].sum())
+    assert np.isclose(total(fifo), total(avg))
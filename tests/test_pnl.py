@@ -9,3 +9,15 @@ def test_pnl_by_day_has_expected_columns():
 def test_pnl_by_day_no_null_pnl():
     df = pnl_by_day()
     assert df["pnl"].isna().sum() == 0
+
+def test_top_pnl_movers_ranked_lookup_matches_full_sort():
+    from fe_coo_analytics.db import cursor
+    from fe_coo_analytics.metrics_pnl import top_pnl_movers
+    with cursor() as con:
+        full = con.execute("SELECT ABS(pnl) AS a FROM mart.daily_pnl ORDER BY a DESC LIMIT 25;").df()
+        date = con.execute("SELECT MAX(date) FROM mart.daily_pnl;").fetchone()[0]
+        day = con.execute("""
+          SELECT ABS(pnl) AS a FROM mart.daily_pnl WHERE date = ? ORDER BY a DESC LIMIT 25;
+        """, [date]).df()
+    assert list(top_pnl_movers(25)["pnl"].abs()) == list(full["a"])
+    assert list(top_pnl_movers(25, date=date)["pnl"].abs()) == list(day["a"])
@@ -0,0 +1,38 @@
+import duckdb
+from models.profiling import execute_profiled
+
+def test_execute_profiled_returns_operator_tree_per_statement():
+    con = duckdb.connect()
+    rows = execute_profiled(con, """
+        CREATE TABLE t AS SELECT range AS x FROM range(1000);
+        DROP TABLE IF EXISTS missing;
+        SELECT x % 7 AS k, COUNT(*) FROM t GROUP BY 1;
+    """)
+    assert {r["statement"] for r in rows} == {0, 2}  # DROP has no plan
+    roots = [r for r in rows if r["parent_id"] is None]
+    assert len(roots) == 2
+    ids = {(r["statement"], r["operator_id"]) for r in rows}
+    assert all((r["statement"], r["parent_id"]) in ids for r in rows if r["parent_id"] is not None)
+    assert any(r["operator_name"] == "HASH_GROUP_BY" and r["cardinality"] == 7 for r in rows)
+    # profiling is switched back off for the connection afterwards
+    assert con.execute("SELECT current_setting('enable_profiling')").fetchone()[0] in (None, "", "none")
+    con.close()
+
+def test_run_dag_tags_profiles_with_mode(tmp_path):
+    from models.dag import run_dag
+    from models.profiling import ensure_profile_table, save_profiles
+    full, inc = tmp_path / "a.sql", tmp_path / "b.sql"
+    full.write_text("CREATE TABLE a AS SELECT range AS x FROM range(10);")
+    inc.write_text("CREATE TABLE b AS SELECT x FROM a WHERE x > 3;")
+    con = duckdb.connect()
+    profiles = {}
+    run_dag(con, [("a.sql", full, False), ("b.sql", inc, True)], {"b.sql": {"a.sql"}}, profiles=profiles)
+    # a table from before the column existed gets it added
+    ensure_profile_table(con)
+    con.execute("ALTER TABLE ops.model_profiles DROP COLUMN mode;")
+    save_profiles(con, "r1", profiles)
+    modes = dict(con.execute("""
+      SELECT model, ANY_VALUE(mode) FROM ops.model_profiles WHERE run_id = 'r1' GROUP BY 1 HAVING COUNT(DISTINCT mode) = 1;
+    """).fetchall())
+    assert modes == {"a.sql": "full", "b.sql": "incremental"}
+    con.close()
@@ -0,0 +1,47 @@
+import duckdb
+from fe_coo_analytics.db import ConnectionManager
+from models.publish import publish, snapshots
+
+def _write(path, value):
+    con = duckdb.connect(str(path))
+    con.execute(f"CREATE OR REPLACE TABLE t AS SELECT {value} AS a;")
+    con.close()
+
+def test_readers_follow_published_snapshots(tmp_path):
+    staging = tmp_path / "staging.duckdb"
+    published = tmp_path / "published" / "current.duckdb"
+    _write(staging, 1)
+    manager = ConnectionManager(published, idle_seconds=0, fallback_path=staging)
+    with manager.cursor() as cur:
+        assert cur.execute("SELECT a FROM t;").fetchone()[0] == 1
+    manager.close()
+
+    publish("r1", staging, published)
+    _write(staging, 2)  # a later build in progress is invisible to readers
+    with manager.cursor() as cur:
+        assert cur.execute("SELECT a FROM t;").fetchone()[0] == 1
+        # a swap mid-checkout doesn't move a reader off its snapshot
+        publish("r2", staging, published)
+        assert cur.execute("SELECT a FROM t;").fetchone()[0] == 1
+    with manager.cursor() as cur:
+        assert cur.execute("SELECT a FROM t;").fetchone()[0] == 2
+    manager.close()
+
+    for i in range(3, 6):
+        publish(f"r{i}", staging, published, keep=2)
+    assert [p.name for p in snapshots(published)] == ["fe_coo-r4.duckdb", "fe_coo-r5.duckdb"]
+    assert published.resolve().name == "fe_coo-r5.duckdb"
+
+def test_run_status_file_records_unpublished_failures(tmp_path):
+    from datetime import datetime, timezone
+    from fe_coo_analytics.db import last_run_status
+    from models.publish import write_run_status
+    published = tmp_path / "published" / "current.duckdb"
+    assert last_run_status(published.parent / "last_run.json") is None
+
+    for status in ("success", "failed"):
+        path = write_run_status({"run_id": "r1", "run_ts": datetime.now(timezone.utc), "status": status,
+                                 "error_message": None if status == "success" else "boom"}, published)
+    last = last_run_status(path)
+    assert (last["status"], last["error_message"]) == ("failed", "boom")
+    assert [p.name for p in published.parent.iterdir()] == ["last_run.json"]
@@ -0,0 +1,23 @@
+import numpy as np
+from fe_coo_analytics.db import cursor
+from fe_coo_analytics.metrics_rollup import firm_daily, latest_kpis, strategy_daily
+
+def test_strategy_daily_reconciles_with_ticker_grain():
+    df = strategy_daily()
+    with cursor() as con:
+        pnl = con.execute("""
+          SELECT date, strategy, SUM(pnl) AS pnl FROM mart.daily_pnl GROUP BY 1,2 ORDER BY 1,2;
+        """).df()
+    rolled = df[df["pnl"].notna()].reset_index(drop=True)
+    assert len(rolled) == len(pnl) > 0
+    assert np.allclose(rolled["pnl"], pnl["pnl"])
+    last = df.groupby("strategy").tail(1).set_index("strategy")["cum_pnl"]
+    assert np.allclose(last.sort_index(), pnl.groupby("strategy")["pnl"].sum().sort_index())
+
+def test_firm_daily_and_kpis_sum_strategies():
+    firm = firm_daily()
+    by_strat = strategy_daily().groupby("date")["gross_exposure"].sum().reset_index(drop=True)
+    assert np.allclose(firm["gross_exposure"], by_strat)
+    kpis = latest_kpis()
+    assert kpis["date"][0] == firm["date"].iloc[-1]
+    assert np.isclose(kpis["total_pnl"][0], firm["pnl"].iloc[-1])
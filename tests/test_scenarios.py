@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+from fe_coo_analytics.db import cursor
+from fe_coo_analytics.scenarios import attribute_shocks, load_book, revalue, scenario_pnl, ticker_shocks
+
+def _latest():
+    with cursor() as con:
+        return con.execute("SELECT MAX(date) FROM mart.scenario_pnl;").fetchone()[0]
+
+def test_market_shock_is_net_exposure_times_move():
+    stored = scenario_pnl()
+    date = _latest()
+    with cursor() as con:
+        net = con.execute("""
+          SELECT strategy, net_exposure FROM mart.daily_exposures WHERE date = ? ORDER BY strategy;
+        """, [date]).df()
+    down = stored[stored["scenario"] == "market:-10%"].sort_values("strategy")
+    assert np.allclose(down["pnl"].to_numpy(), -0.10 * net["net_exposure"].to_numpy())
+    assert stored["total_pnl"].is_monotonic_increasing
+
+def test_attribute_shocks_match_per_ticker_shocks():
+    book = load_book(_latest())
+    with cursor() as con:
+        sectors = dict(con.execute("SELECT ticker, sector FROM raw.security_master;").fetchall())
+    one = sorted(set(sectors.values()))[0]
+    by_sector = attribute_shocks(book, "sector", pd.DataFrame({one: [-0.1]}, index=["s"]))
+    by_ticker = ticker_shocks(book, pd.DataFrame({t: [-0.1] for t, s in sectors.items() if s == one}, index=["s"]))
+    assert np.allclose(revalue(book, by_sector)["pnl"], revalue(book, by_ticker)["pnl"])
+
+def test_full_refresh_drops_rows_from_earlier_dates(tmp_path):
+    import shutil
+    import duckdb
+    from fe_coo_analytics.db import DEFAULT_DB_PATH
+    from fe_coo_analytics.scenarios import build_scenario_pnl
+    db = tmp_path / "staging.duckdb"
+    shutil.copy(DEFAULT_DB_PATH, db)
+    con = duckdb.connect(str(db))
+    try:
+        # a stale row for an earlier date, as left by a previous dataset
+        con.execute("INSERT INTO mart.scenario_pnl VALUES (DATE '2000-01-03', 'market:-10%', 'market', 'TMT', 1.0);")
+        build_scenario_pnl(con)
+        assert con.execute("SELECT COUNT(DISTINCT date) FROM mart.scenario_pnl;").fetchone()[0] == 2
+        build_scenario_pnl(con, full_refresh=True)
+        assert con.execute("SELECT COUNT(DISTINCT date) FROM mart.scenario_pnl;").fetchone()[0] == 1
+    finally:
+        con.close()
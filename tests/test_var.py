@@ -0,0 +1,28 @@
+import numpy as np
+from fe_coo_analytics.db import cursor
+from fe_coo_analytics.metrics_risk import firm_var, var_by_day
+from fe_coo_analytics.var import load_returns
+
+def test_var_matches_per_date_revaluation():
+    var = var_by_day(["TMT"]).dropna(subset=["var_99"])
+    row = var.iloc[len(var) // 2]
+    with cursor() as con:
+        dates, tickers, returns = load_returns(con)
+        book = con.execute("""
+          SELECT p.ticker, SUM(p.shares::DOUBLE * x.close) AS mv
+          FROM mart.daily_positions p JOIN raw.prices x ON x.ticker = p.ticker AND x.date::DATE = p.date::DATE
+          WHERE p.date::DATE = ? AND p.strategy = 'TMT'
+          GROUP BY 1;
+        """, [row["date"]]).df()
+    mv = np.zeros(len(tickers))
+    mv[[tickers.index(t) for t in book["ticker"]]] = book["mv"]
+    i = dates.index(row["date"])
+    pnl = returns[max(1, i - 249):i + 1] @ mv
+    assert len(pnl) == row["n_obs"]
+    assert np.isclose(row["var_99"], -np.quantile(pnl, 0.01))
+    assert np.isclose(row["es_95"], -pnl[pnl <= np.quantile(pnl, 0.05)].mean())
+
+def test_firm_var_diversifies():
+    per = var_by_day().dropna(subset=["var_99"]).groupby("date")["var_99"].sum()
+    firm = firm_var().dropna(subset=["var_99"]).set_index("date")["var_99"]
+    assert (firm <= per.loc[firm.index] + 1e-6).mean() > 0.9